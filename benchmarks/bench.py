@@ -0,0 +1,357 @@
+"""
+性能基准测试。
+
+在无显示环境下运行:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench --output result.json
+与历史结果比较:
+    python -m benchmarks.bench --compare baseline.json --threshold 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.fixtures import prepare_fixtures
+
+# 默认回归阈值：比基线慢 20% 视为回归
+DEFAULT_THRESHOLD = 0.2
+# 单次等待媒体信号的超时时间（毫秒）
+SIGNAL_TIMEOUT_MS = 10000
+
+
+class SignalWaiter:
+    """
+    等待某个信号满足条件，构造时立即连接，避免错过同步发出的信号。
+    """
+
+    def __init__(self, signal, predicate=lambda *args: True):
+        from PySide6.QtCore import QEventLoop
+
+        self.signal = signal
+        self.predicate = predicate
+        self.loop = QEventLoop()
+        self.matched_at = None
+        self.signal.connect(self._on_signal)
+
+    def _on_signal(self, *args):
+        if self.matched_at is None and self.predicate(*args):
+            self.matched_at = time.perf_counter()
+            self.loop.quit()
+
+    def wait(self, timeout_ms=SIGNAL_TIMEOUT_MS):
+        """
+        等待信号，返回匹配时间点，超时返回 None。
+        """
+        from PySide6.QtCore import QTimer
+
+        if self.matched_at is None:
+            QTimer.singleShot(timeout_ms, self.loop.quit)
+            self.loop.exec()
+        self.signal.disconnect(self._on_signal)
+        return self.matched_at
+
+
+def summarize(samples):
+    """
+    汇总多次测量结果（毫秒）。
+    """
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": len(samples),
+    }
+
+
+def bench_import(runs):
+    """
+    测量 gui.ui 的导入耗时，每次在新进程中执行。
+    """
+    code = (
+        "import time; t = time.perf_counter(); import gui.ui; "
+        "print((time.perf_counter() - t) * 1000)"
+    )
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        )
+        samples.append(float(output.stdout.strip().splitlines()[-1]))
+    return summarize(samples)
+
+
+def bench_construct(runs, lazy_init):
+    """
+    测量 PlayerUI 的构造耗时。
+    """
+    from gui.ui import PlayerUI
+
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        player_ui = PlayerUI(lazy_init=lazy_init)
+        samples.append((time.perf_counter() - start) * 1000)
+        player_ui.deleteLater()
+    return summarize(samples)
+
+
+def bench_playable_formats(runs):
+    """
+    测量 get_playable_formats() 的耗时，分别统计首次构建和命中索引两种情况。
+    """
+    from core.file import FileHandler, PlayableFormatIndex
+
+    cold = []
+    for _ in range(runs):
+        PlayableFormatIndex.reset()
+        start = time.perf_counter()
+        FileHandler().get_playable_formats()
+        cold.append((time.perf_counter() - start) * 1000)
+
+    handler = FileHandler()
+    handler.get_playable_formats()
+    warm = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        handler.get_playable_formats()
+        warm.append((time.perf_counter() - start) * 1000)
+    return {"cold": summarize(cold), "warm": summarize(warm)}
+
+
+def create_bench_player():
+    """
+    创建基准测试用的播放器，无效媒体只记录不弹窗。
+    """
+    from core.player import Player
+
+    class BenchPlayer(Player):
+        # 与无界面播放器一致：不做后台响度分析，不读写续播记录，每次运行测量相同的工作
+        NORMALIZE_LOUDNESS = False
+        RESUME_PLAYBACK = False
+
+        def handle_media_status(self, status):
+            from PySide6.QtMultimedia import QMediaPlayer
+
+            if status == QMediaPlayer.MediaStatus.InvalidMedia:
+                self.invalid_media = True
+
+    player = BenchPlayer()
+    player.invalid_media = False
+    player.audio_output.setMuted(True)
+    return player
+
+
+def bench_play_and_seek(path, runs):
+    """
+    测量 play_file() 到 LoadedMedia/BufferedMedia 的延迟，以及 setPosition 的跳转延迟。
+    """
+    from PySide6.QtCore import QUrl
+    from PySide6.QtMultimedia import QMediaPlayer
+
+    ready_states = (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia)
+    player = create_bench_player()
+    load_samples = []
+    seek_samples = []
+
+    for _ in range(runs):
+        player.media_player.stop()
+        player.media_player.setSource(QUrl())
+
+        waiter = SignalWaiter(player.media_player.mediaStatusChanged, lambda status: status in ready_states)
+        start = time.perf_counter()
+        player.play_file(path)
+        matched_at = waiter.wait()
+        if matched_at is None or player.invalid_media:
+            return {"error": "媒体加载超时或无效"}
+        load_samples.append((matched_at - start) * 1000)
+
+        duration = player.media_player.duration()
+        if duration <= 0:
+            continue
+        target = duration // 2
+        waiter = SignalWaiter(player.media_player.positionChanged, lambda position: abs(position - target) < 500)
+        start = time.perf_counter()
+        player.media_player.setPosition(target)
+        matched_at = waiter.wait()
+        if matched_at is not None:
+            seek_samples.append((matched_at - start) * 1000)
+
+    player.media_player.stop()
+    result = {"load": summarize(load_samples)}
+    if seek_samples:
+        result["seek"] = summarize(seek_samples)
+    return result
+
+
+def run_guarded(results, name, func, *args):
+    """
+    执行单个基准测试，失败时记录错误而不中断整体流程。
+    """
+    print(f"运行 {name} ...", file=sys.stderr)
+    try:
+        results[name] = func(*args)
+    except Exception as e:
+        results[name] = {"error": str(e)}
+
+
+def run_benchmarks(runs, fixtures_dir):
+    """
+    执行全部基准测试。
+    :return: 结果字典
+    """
+    from PySide6.QtWidgets import QApplication
+
+    results = {}
+    run_guarded(results, "import_gui_ui", bench_import, runs)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    run_guarded(results, "playable_formats", bench_playable_formats, runs)
+    run_guarded(results, "construct_player_ui_lazy", bench_construct, runs, True)
+    run_guarded(results, "construct_player_ui_eager", bench_construct, runs, False)
+
+    for name, path in prepare_fixtures(fixtures_dir).items():
+        run_guarded(results, f"play_{name}", bench_play_and_seek, path, runs)
+
+    app.processEvents()
+    return results
+
+
+def collect_meta():
+    """
+    收集运行环境信息，便于跨提交比较。
+    """
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "qpa": os.environ.get("QT_QPA_PLATFORM"),
+    }
+    try:
+        import PySide6
+        meta["pyside6"] = PySide6.__version__
+    except ImportError:
+        pass
+    try:
+        meta["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        pass
+    return meta
+
+
+def flatten(results, prefix=""):
+    """
+    将嵌套结果展开为 {名称: 中位数}。
+    """
+    flat = {}
+    for name, value in results.items():
+        key = f"{prefix}{name}"
+        if isinstance(value, dict) and "median_ms" in value:
+            flat[key] = value["median_ms"]
+        elif isinstance(value, dict):
+            flat.update(flatten(value, prefix=f"{key}."))
+    return flat
+
+
+def collect_errors(results, prefix=""):
+    """
+    收集执行失败的基准项。
+    :return: {名称: 错误信息}
+    """
+    errors = {}
+    for name, value in results.items():
+        key = f"{prefix}{name}"
+        if isinstance(value, dict) and "error" in value:
+            errors[key] = value["error"]
+        elif isinstance(value, dict):
+            errors.update(collect_errors(value, prefix=f"{key}."))
+    return errors
+
+
+def compare(current, baseline, threshold):
+    """
+    与基线结果比较，输出对比表。执行失败的基准项和基线中有、本次缺失的指标都视为回归。
+    :return: 回归项列表
+    """
+    current_flat = flatten(current["results"])
+    baseline_flat = flatten(baseline["results"])
+    errors = collect_errors(current["results"])
+    regressions = []
+
+    print(f"{'基准项':<40}{'基线(ms)':>12}{'当前(ms)':>12}{'变化':>10}")
+    for name in sorted(set(current_flat) | set(baseline_flat)):
+        if name not in baseline_flat:
+            continue
+        old = baseline_flat[name]
+        if name not in current_flat:
+            # 本次执行失败或不再产出该指标
+            regressions.append(name)
+            print(f"{name:<40}{old:>12.3f}{'缺失':>12}{'':>10}  回归")
+            continue
+        new = current_flat[name]
+        change = (new - old) / old if old > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  回归"
+        print(f"{name:<40}{old:>12.3f}{new:>12.3f}{change:>+10.1%}{flag}")
+
+    for name, message in sorted(errors.items()):
+        print(f"{name}: 执行失败: {message}")
+        if name not in regressions:
+            regressions.append(name)
+    return regressions
+
+
+def parse_arguments():
+    """
+    解析命令行参数。
+    """
+    parser = argparse.ArgumentParser(description="媒体播放器性能基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每项测试的重复次数")
+    parser.add_argument("--output", help="结果 JSON 输出路径，默认输出到标准输出")
+    parser.add_argument("--compare", help="用于比较的基线结果 JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="回归阈值，0.2 表示慢 20%% 视为回归")
+    parser.add_argument("--fixtures-dir", default=os.path.join(tempfile.gettempdir(), "play_bench_fixtures"),
+                        help="测试媒体文件目录")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    report = {
+        "meta": collect_meta(),
+        "results": run_benchmarks(args.runs, args.fixtures_dir),
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"检测到 {len(regressions)} 项性能回归: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import math
+import shutil
+import struct
+import subprocess
+import wave
+import logging
+
+
+def generate_wav(path, seconds=5, sample_rate=44100, frequency=440):
+    """
+    生成一段单声道正弦波 WAV 文件。
+    :return: 文件路径
+    """
+    if os.path.exists(path):
+        return path
+
+    frame_count = int(seconds * sample_rate)
+    step = 2 * math.pi * frequency / sample_rate
+    samples = struct.pack(
+        f"<{frame_count}h",
+        *(int(12000 * math.sin(step * i)) for i in range(frame_count))
+    )
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples)
+    return path
+
+
+def generate_mp4(path, seconds=5):
+    """
+    使用 ffmpeg 生成测试视频，系统没有 ffmpeg 时返回 None。
+    :return: 文件路径或 None
+    """
+    if os.path.exists(path):
+        return path
+
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        logging.warning("未找到 ffmpeg，跳过 MP4 测试文件生成")
+        return None
+
+    command = [
+        ffmpeg, "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc=duration={seconds}:size=640x360:rate=30",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-g", "30",
+        "-c:a", "aac", "-shortest", path
+    ]
+    try:
+        subprocess.run(command, check=True, timeout=120)
+        return path
+    except (subprocess.SubprocessError, OSError) as e:
+        logging.warning(f"生成 MP4 测试文件失败: {e}")
+        return None
+
+
+def prepare_fixtures(directory):
+    """
+    在指定目录下准备所有测试文件。
+    :return: {名称: 路径}，生成失败的文件不包含在内
+    """
+    os.makedirs(directory, exist_ok=True)
+    fixtures = {"wav": generate_wav(os.path.join(directory, "tone.wav"))}
+    mp4 = generate_mp4(os.path.join(directory, "testsrc.mp4"))
+    if mp4:
+        fixtures["mp4"] = mp4
+    return fixtures
@@ -0,0 +1,461 @@
+import os
+import re
+import shutil
+import hashlib
+import logging
+import threading
+import urllib.request
+from concurrent.futures import CancelledError, Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote
+
+from core.file import get_cache_dir
+from core.hls import HlsSession
+from core.http_client import FetchPool, HttpClient, HttpError
+from core.sparse import SparseFile, DEFAULT_CHUNK_SIZE, cached_size
+
+# Range: bytes=0-99 / bytes=100- / bytes=-100
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+
+# 等待单个分块下载的超时时间（秒）
+CHUNK_TIMEOUT = 30
+
+# 每写入多少个分块保存一次位图
+SAVE_META_INTERVAL = 16
+
+
+class CachedResource:
+    """
+    一个远程资源的本地缓存，已下载的字节范围保存在稀疏文件中。
+    服务器不支持范围请求或大小未知时不缓存，直接转发。
+    播放器正在等待的分块优先下载；每次新的范围请求（即跳转）会取消窗口外尚未开始的预读。
+    """
+
+    def __init__(self, url, directory, client, pool, chunk_size, read_ahead):
+        self.url = url
+        self.client = client
+        self.pool = pool
+        self.read_ahead = read_ahead
+        self.lock = threading.Lock()
+        self.inflight = {}  # 分块序号 -> Future
+        self.written = 0
+
+        info = client.probe(url)
+        self.total_size, self.content_type = info.total_size, info.content_type
+        self.sparse = None
+        if self.total_size and info.supports_range:
+            name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+            self.sparse = SparseFile(
+                os.path.join(directory, name + ".data"), self.total_size, chunk_size,
+                info={"url": url, "content_type": self.content_type}, validator=info.validator
+            )
+            # 更新元信息的修改时间，淘汰缓存时按最近使用排序
+            if os.path.exists(self.sparse.meta_path):
+                os.utime(self.sparse.meta_path)
+
+    def ensure_chunk(self, index, priority=FetchPool.PREFETCH):
+        """
+        确保分块已下载，返回下载任务；已缓存时返回已完成的 Future。
+        已在排队的预读任务以 URGENT 再次请求时提升优先级。
+        """
+        with self.lock:
+            if self.sparse.has_chunk(index):
+                future = Future()
+                future.set_result(None)
+                return future
+            future = self.inflight.get(index)
+            if future is None:
+                future = self.inflight[index] = self.pool.submit(self._fetch_chunk, index, priority=priority)
+            elif priority == FetchPool.URGENT:
+                self.pool.promote(future)
+            return future
+
+    def _fetch_chunk(self, index):
+        try:
+            start, end = self.sparse.chunk_range(index)
+            response = self.client.get(self.url, start, end - 1)
+            if response.status != 206:
+                raise HttpError(f"服务器未返回分段内容: {response.status}")
+            self.sparse.write_chunk(index, response.body)
+            with self.lock:
+                self.written += 1
+                save = self.written % SAVE_META_INTERVAL == 0
+            if save:
+                self.sparse.save_meta()
+        finally:
+            with self.lock:
+                self.inflight.pop(index, None)
+
+    def schedule_read_ahead(self, index):
+        """
+        并行预读当前分块之后的若干分块。
+        """
+        last = min(self.sparse.chunk_count, index + 1 + self.read_ahead)
+        for ahead in range(index + 1, last):
+            if not self.sparse.has_chunk(ahead):
+                self.ensure_chunk(ahead)
+
+    def cancel_read_ahead(self, index):
+        """
+        取消 [index, index + 预读数] 窗口之外尚未开始的预读，跳转后旧位置的预读不再占用连接。
+        """
+        with self.lock:
+            for ahead, future in list(self.inflight.items()):
+                if not index <= ahead <= index + self.read_ahead and future.cancel():
+                    del self.inflight[ahead]
+
+    def wait_chunk(self, index):
+        """
+        以最高优先级获取分块并等待完成，同时安排后续预读。
+        """
+        while True:
+            future = self.ensure_chunk(index, FetchPool.URGENT)
+            self.schedule_read_ahead(index)
+            try:
+                future.result(timeout=CHUNK_TIMEOUT)
+                return
+            except CancelledError:
+                # 另一个连接跳转时取消了该分块的排队任务，重新提交
+                continue
+
+    def iter_range(self, start, end):
+        """
+        按分块输出 [start, end) 范围内的数据，缺失的分块先下载。
+        """
+        position = start
+        self.cancel_read_ahead(self.sparse.chunk_of(start))
+        while position < end:
+            index = self.sparse.chunk_of(position)
+            self.wait_chunk(index)
+            _, chunk_end = self.sparse.chunk_range(index)
+            length = min(chunk_end, end) - position
+            yield self.sparse.read(position, length)
+            position += length
+
+    def close(self):
+        if self.sparse is not None:
+            self.sparse.close()
+
+
+def segment_extension(segment):
+    """
+    本地片段地址沿用源片段的扩展名，便于后端识别封装格式。
+    """
+    return os.path.splitext(urlsplit(segment.uri).path)[1] or ".ts"
+
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    """
+    代理请求处理：
+    /media/<键>/<文件名>，支持 Range 请求；
+    /hls/<键>/index.m3u8 与 /hls/<键>/seg/<序号>，HLS 播放列表和片段。
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.handle_media(send_body=False)
+
+    def do_GET(self):
+        self.handle_media(send_body=True)
+
+    def log_message(self, format, *args):
+        logging.debug("缓存代理: " + format % args)
+
+    def handle_media(self, send_body):
+        parts = urlsplit(self.path).path.split("/")
+        if len(parts) >= 4 and parts[1] == "hls":
+            self.handle_hls(parts[2], parts[3:], send_body)
+            return
+        if len(parts) < 3 or parts[1] != "media":
+            self.send_error(404)
+            return
+        try:
+            resource = self.server.proxy.resource(parts[2])
+        except (KeyError, HttpError) as e:
+            logging.warning(f"缓存代理无法打开资源: {e}")
+            self.send_error(404 if isinstance(e, KeyError) else 502)
+            return
+
+        try:
+            if resource.sparse is None:
+                self.forward(resource, send_body)
+            else:
+                self.serve_cached(resource, send_body)
+        except (BrokenPipeError, ConnectionResetError):
+            # 播放器跳转时会主动断开旧连接
+            pass
+        except (HttpError, TimeoutError, OSError) as e:
+            logging.warning(f"缓存代理读取失败: {e}")
+            self.close_connection = True
+
+    def handle_hls(self, key, rest, send_body):
+        try:
+            session = self.server.proxy.hls_session(key)
+            if rest == ["index.m3u8"]:
+                body = session.render_playlist(segment_extension).encode("utf-8")
+                content_type = "application/vnd.apple.mpegurl"
+            elif len(rest) == 2 and rest[0] == "seg":
+                body = session.segment(int(os.path.splitext(rest[1])[0]))
+                content_type = "video/mp2t" if rest[1].endswith(".ts") else "application/octet-stream"
+            else:
+                self.send_error(404)
+                return
+        except (KeyError, ValueError) as e:
+            logging.warning(f"HLS 请求无效: {e}")
+            self.send_error(404)
+            return
+        except (HttpError, TimeoutError, OSError) as e:
+            logging.warning(f"HLS 读取失败: {e}")
+            self.send_error(502)
+            return
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def parse_range(self, total_size):
+        """
+        解析 Range 请求头。
+        :return: [start, end) 范围，无 Range 时返回 None
+        """
+        match = RANGE_PATTERN.match(self.headers.get("Range", ""))
+        if not match or (not match.group(1) and not match.group(2)):
+            return None
+        if match.group(1):
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else total_size
+        else:
+            start = max(0, total_size - int(match.group(2)))
+            end = total_size
+        return start, min(end, total_size)
+
+    def serve_cached(self, resource, send_body):
+        total_size = resource.total_size
+        requested = self.parse_range(total_size)
+        start, end = requested or (0, total_size)
+        if start >= total_size or start >= end:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{total_size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(206 if requested else 200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", resource.content_type or "application/octet-stream")
+        self.send_header("Content-Length", str(end - start))
+        if requested:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{total_size}")
+        self.end_headers()
+        if send_body:
+            for data in resource.iter_range(start, end):
+                self.wfile.write(data)
+
+    def forward(self, resource, send_body):
+        """
+        不可缓存的资源直接转发原始响应。
+        """
+        request = urllib.request.Request(resource.url, method="GET" if send_body else "HEAD")
+        with urllib.request.urlopen(request, timeout=CHUNK_TIMEOUT) as response:
+            self.send_response(response.status)
+            for key in ("Content-Type", "Content-Length"):
+                if response.headers.get(key):
+                    self.send_header(key, response.headers[key])
+            if not response.headers.get("Content-Length"):
+                self.close_connection = True
+            self.end_headers()
+            if send_body:
+                shutil.copyfileobj(response, self.wfile, DEFAULT_CHUNK_SIZE)
+
+
+class CachingProxy:
+    """
+    本地 HTTP 缓存代理。
+    播放器访问代理地址，代理按分块从源站下载并写入磁盘稀疏缓存，
+    同时并行预读后续分块；重播和向后跳转直接读取本地缓存。
+    缓存总量超过上限时按最近使用时间淘汰，源站内容变化（ETag/Last-Modified 不一致）时重新下载。
+    """
+
+    DEFAULT_READ_AHEAD = 8  # 预读分块数
+    DEFAULT_WORKERS = 4  # 并行下载的连接数
+    DEFAULT_MAX_CACHE_SIZE = 2 * 1024 ** 3  # 磁盘缓存上限（字节）
+
+    def __init__(self, cache_dir=None, chunk_size=DEFAULT_CHUNK_SIZE, read_ahead=DEFAULT_READ_AHEAD,
+                 workers=DEFAULT_WORKERS, max_cache_size=DEFAULT_MAX_CACHE_SIZE):
+        self.cache_dir = cache_dir or get_cache_dir("http")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.read_ahead = read_ahead
+        self.max_cache_size = max_cache_size
+        self.client = HttpClient()
+        self.pool = FetchPool(workers, "proxy-fetch")
+        self.urls = {}  # 键 -> 源地址
+        self.resources = {}  # 键 -> CachedResource
+        self.creating = {}  # 键 -> 正在创建的资源的 Future
+        self.hls_sessions = {}  # 键 -> HlsSession
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        """
+        在后台线程启动代理服务，监听本机随机端口。
+        """
+        if self.server is not None:
+            return
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ProxyRequestHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+        self.thread = threading.Thread(target=self.server.serve_forever, name="cache-proxy", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        停止代理服务并保存缓存位图。
+        """
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        self.pool.shutdown()
+        with self.lock:
+            for resource in self.resources.values():
+                resource.close()
+            self.resources.clear()
+            self.hls_sessions.clear()
+
+    def proxy_url(self, url):
+        """
+        获取源地址对应的代理地址，保留原文件名便于后端识别格式。
+        """
+        self.start()
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        with self.lock:
+            self.urls[key] = url
+        name = os.path.basename(unquote(urlsplit(url).path)) or "stream"
+        return f"http://127.0.0.1:{self.port}/media/{key}/{name}"
+
+    def serve_resource(self, resource, name):
+        """
+        通过代理提供已有的资源（如下载中的部分文件），返回代理地址。
+        资源需提供 total_size、content_type、sparse、iter_range() 和 close()。
+        """
+        self.start()
+        key = hashlib.sha1(f"resource:{id(resource)}".encode("utf-8")).hexdigest()[:16]
+        with self.lock:
+            self.urls[key] = getattr(resource, "url", name)
+            self.resources[key] = resource
+        return f"http://127.0.0.1:{self.port}/media/{key}/{name}"
+
+    def hls_url(self, url):
+        """
+        获取 HLS 播放列表对应的本地播放列表地址。
+        """
+        self.start()
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        with self.lock:
+            self.urls[key] = url
+        return f"http://127.0.0.1:{self.port}/hls/{key}/index.m3u8"
+
+    def hls_session(self, key):
+        """
+        获取键对应的 HLS 会话，首次访问时读取主播放列表（在锁外进行）。
+        :raises KeyError: 未注册的键
+        """
+        return self._get_or_create(
+            self.hls_sessions, key, lambda url: HlsSession(url, self.client, self.pool)
+        )
+
+    def _get_or_create(self, table, key, factory):
+        """
+        获取或创建键对应的对象，创建过程（网络请求）在锁外进行：
+        同一个键并发请求时只创建一次，其余请求等待结果，不同键之间互不阻塞。
+        :raises KeyError: 未注册的键
+        """
+        with self.lock:
+            url = self.urls[key]
+            value = table.get(key)
+            if value is not None:
+                return value
+            pending = self.creating.get(key)
+            owner = pending is None
+            if owner:
+                pending = self.creating[key] = Future()
+        if not owner:
+            return pending.result()
+
+        try:
+            value = factory(url)
+        except BaseException as e:
+            with self.lock:
+                self.creating.pop(key, None)
+            pending.set_exception(e)
+            raise
+        with self.lock:
+            table[key] = value
+            self.creating.pop(key, None)
+        pending.set_result(value)
+        return value
+
+    def resource(self, key):
+        """
+        获取键对应的缓存资源，首次访问时探测源站。
+        :raises KeyError: 未注册的键
+        """
+        return self._get_or_create(self.resources, key, self._create_resource)
+
+    def _create_resource(self, url):
+        resource = CachedResource(url, self.cache_dir, self.client, self.pool, self.chunk_size, self.read_ahead)
+        if resource.sparse is not None:
+            self.evict_cache(keep=resource.sparse.data_path)
+        return resource
+
+    def evict_cache(self, keep=None):
+        """
+        磁盘缓存超过上限时按最近使用时间删除旧的缓存文件，正在使用的资源不删除。
+        :param keep: 正在创建、需要保留的缓存文件
+        """
+        with self.lock:
+            in_use = {
+                resource.sparse.data_path for resource in self.resources.values()
+                if getattr(resource, "sparse", None) is not None
+            }
+        in_use.add(keep)
+        total = 0
+        candidates = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".data"):
+                continue
+            data_path = os.path.join(self.cache_dir, name)
+            size = cached_size(data_path + ".meta")
+            total += size
+            if data_path not in in_use:
+                try:
+                    used_at = os.path.getmtime(data_path + ".meta")
+                except OSError:
+                    used_at = 0
+                candidates.append((used_at, data_path, size))
+
+        for _, data_path, size in sorted(candidates):
+            if total <= self.max_cache_size:
+                break
+            for path in (data_path, data_path + ".meta"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            logging.info(f"缓存代理淘汰缓存文件: {data_path}")
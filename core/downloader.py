@@ -0,0 +1,356 @@
+import os
+import time
+import logging
+import threading
+import mimetypes
+from collections import deque
+
+from PySide6.QtCore import QObject, Signal
+
+from core.http_client import HttpClient, HttpError
+from core.sparse import SparseFile, DEFAULT_CHUNK_SIZE
+
+# 等待单个分块下载的超时时间（秒）
+CHUNK_TIMEOUT = 30
+
+# 每写入多少个分块保存一次位图
+SAVE_META_INTERVAL = 16
+
+# 单个分块的最大重试次数
+MAX_RETRIES = 3
+
+# 下载进度信号的最短间隔（秒），小分块时不会每个分块都发出信号
+PROGRESS_INTERVAL = 0.2
+
+
+class DownloadTask(QObject):
+    """
+    多连接分块下载任务，支持边下载边播放。
+    数据写入 <目标文件>.part 稀疏文件，位图记录已完成的分块，中断后重新创建任务即可续传；
+    下载线程优先获取文件头尾（容器索引常位于两端），之后从当前播放位置向后获取，
+    跳转时调用 focus_on() 调整下载顺序。全部完成后重命名为目标文件。
+    信号从下载线程发出，接收方需为 QObject 的方法以便排队到主线程执行。
+    取消和关闭不等待下载线程，最后一个退出的线程负责保存位图并关闭文件。
+    """
+
+    progressChanged = Signal(int, int)  # 已完成分块数，总分块数，按 PROGRESS_INTERVAL 限流
+    headerReady = Signal()  # 文件头尾已下载，可以开始播放
+    finished = Signal(str)  # 下载完成，参数为目标文件路径
+    failed = Signal(str)  # 下载失败，参数为错误信息
+
+    DEFAULT_CONNECTIONS = 4  # 并行连接数
+
+    def __init__(self, url, path, connections=DEFAULT_CONNECTIONS, chunk_size=DEFAULT_CHUNK_SIZE, client=None):
+        """
+        :param url: 下载地址，服务器需支持范围请求
+        :param path: 目标文件路径
+        :param connections: 并行连接数
+        :param chunk_size: 分块大小
+        """
+        super().__init__()
+        self.url = url
+        self.path = path
+        self.part_path = path + ".part"
+        self.connections = connections
+        self.chunk_size = chunk_size
+        self.client = client or HttpClient()
+        self.condition = threading.Condition()
+        self.sparse = None
+        self.file = None  # 下载完成后用于读取的目标文件
+        self.total_size = None
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.header_chunks = ()
+        self.focus = 0  # 优先下载的起始分块
+        self.cursor = 0  # 下一个待检查的分块，只向后移动，跳转时回到优先位置
+        self.retry = deque()  # 下载失败、等待重试的分块
+        self.inflight = set()
+        self.failures = {}  # 分块序号 -> 失败次数
+        self.active = 0  # 仍在运行的下载线程数
+        self.closing = False
+        self.written = 0
+        self.header_sent = False
+        self.last_progress = 0.0  # 上次发出进度信号的时间
+        self.cancelled = False
+        self.error = None
+
+    def start(self):
+        """
+        在后台线程探测资源并启动下载。
+        """
+        with self.condition:
+            self.active += 1
+        threading.Thread(target=self._run, name="download", daemon=True).start()
+
+    def _run(self):
+        try:
+            self._prepare()
+        finally:
+            self._thread_exited()
+
+    def _prepare(self):
+        try:
+            info = self.client.probe(self.url)
+            if not info.total_size or not info.supports_range:
+                raise HttpError(f"服务器不支持分段下载: {self.url}")
+            self.total_size = info.total_size
+            if info.content_type:
+                self.content_type = info.content_type
+            # 源站文件变化时不续传旧的分块
+            self.sparse = SparseFile(
+                self.part_path, info.total_size, self.chunk_size, info={"url": self.url}, validator=info.validator
+            )
+        except (HttpError, OSError) as e:
+            self._fail(str(e))
+            return
+        if self.cancelled:
+            return
+
+        last = self.sparse.chunk_count - 1
+        self.header_chunks = (0, last) if last > 0 else (0,)
+        self._check_progress()
+        if self.sparse.is_complete():
+            self._complete()
+            return
+
+        with self.condition:
+            self.cursor = self.focus
+            self.active += self.connections
+        for number in range(self.connections):
+            threading.Thread(target=self._worker, name=f"download-{number}", daemon=True).start()
+
+    def focus_on(self, offset):
+        """
+        将下载顺序调整到指定字节偏移之后，播放跳转时调用。
+        """
+        if self.sparse is None:
+            return
+        with self.condition:
+            self._set_focus(self.sparse.chunk_of(offset))
+
+    def _set_focus(self, index):
+        """
+        调整优先位置并把游标移到该处（调用方持有锁）。
+        """
+        self.focus = self.cursor = index
+        self.condition.notify_all()
+
+    def _available(self, index):
+        return index not in self.inflight and not self.sparse.has_chunk(index)
+
+    def _next_chunk(self):
+        """
+        选择下一个要下载的分块：文件头尾优先，其次是重试的分块，最后从游标向后（到末尾后回绕）。
+        游标只在跳转时回退，整个下载过程中每个分块只被检查常数次。
+        :return: 分块序号，全部完成或已取消时返回 None
+        """
+        with self.condition:
+            while not self.cancelled and self.error is None:
+                index = next((index for index in self.header_chunks if self._available(index)), None)
+                while index is None and self.retry:
+                    candidate = self.retry.popleft()
+                    if self._available(candidate):
+                        index = candidate
+                remaining = self.sparse.chunk_count - self.sparse.completed - len(self.inflight)
+                if index is None and remaining > 0:
+                    index = self._advance()
+                if index is not None:
+                    self.inflight.add(index)
+                    return index
+                if not self.inflight:
+                    return None
+                # 剩余分块都在其他连接中下载，等待结果（失败的分块会重新放回）
+                self.condition.wait()
+            return None
+
+    def _advance(self):
+        """
+        从游标开始查找下一个未完成且不在下载中的分块（调用方持有锁）。
+        """
+        count = self.sparse.chunk_count
+        for _ in range(count):
+            index = self.cursor
+            self.cursor = (self.cursor + 1) % count
+            if self._available(index):
+                return index
+        return None
+
+    def _worker(self):
+        try:
+            self._download_chunks()
+        finally:
+            self._thread_exited()
+
+    def _download_chunks(self):
+        while True:
+            index = self._next_chunk()
+            if index is None:
+                break
+            try:
+                start, end = self.sparse.chunk_range(index)
+                response = self.client.get(self.url, start, end - 1)
+                if response.status != 206:
+                    raise HttpError(f"服务器未返回分段内容: {response.status}")
+                self.sparse.write_chunk(index, response.body)
+            except (HttpError, ValueError, OSError) as e:
+                with self.condition:
+                    self.inflight.discard(index)
+                    if self.cancelled:
+                        break
+                    self.failures[index] = self.failures.get(index, 0) + 1
+                    retry = self.failures[index] < MAX_RETRIES
+                    if retry:
+                        self.retry.append(index)
+                    self.condition.notify_all()
+                if retry:
+                    logging.warning(f"分块 {index} 下载失败，重试: {e}")
+                    continue
+                self._fail(f"分块 {index} 下载失败: {e}")
+                break
+
+            with self.condition:
+                self.inflight.discard(index)
+                self.written += 1
+                save = self.written % SAVE_META_INTERVAL == 0
+                self.condition.notify_all()
+            if save:
+                self.sparse.save_meta()
+            self._check_progress()
+
+        with self.condition:
+            done = self.sparse.is_complete() and self.file is None and not self.cancelled
+            if done:
+                # 只由一个线程执行收尾
+                self.file = False
+        if done:
+            self._complete()
+
+    def _check_progress(self):
+        completed, count = self.sparse.completed, self.sparse.chunk_count
+        now = time.monotonic()
+        with self.condition:
+            # 进度按时间限流，全部完成时总会发出
+            notify = completed == count or now - self.last_progress >= PROGRESS_INTERVAL
+            if notify:
+                self.last_progress = now
+        if notify:
+            self.progressChanged.emit(completed, count)
+        if not self.header_sent and all(self.sparse.has_chunk(index) for index in self.header_chunks):
+            self.header_sent = True
+            self.headerReady.emit()
+
+    def _complete(self):
+        """
+        下载完成：关闭稀疏文件，重命名为目标文件并删除位图。
+        """
+        try:
+            with self.condition:
+                self.sparse.close()
+                os.replace(self.part_path, self.path)
+                if os.path.exists(self.sparse.meta_path):
+                    os.remove(self.sparse.meta_path)
+                self.file = open(self.path, "rb")
+                if self.closing:
+                    # 收尾期间已被关闭
+                    self.file.close()
+                    self.file = None
+                self.condition.notify_all()
+        except OSError as e:
+            self._fail(f"保存下载文件失败: {e}")
+            return
+        self.finished.emit(self.path)
+
+    def _thread_exited(self):
+        """
+        下载线程退出；关闭已请求且这是最后一个线程时释放稀疏文件。
+        """
+        with self.condition:
+            self.active -= 1
+            release = self.closing and self.active == 0
+        if release:
+            self._release()
+
+    def _fail(self, message):
+        with self.condition:
+            if self.error is not None or self.cancelled:
+                return
+            self.error = message
+            self.condition.notify_all()
+        logging.error(message)
+        self.failed.emit(message)
+
+    def is_complete(self):
+        return bool(self.file)
+
+    def wait_chunk(self, index, timeout=CHUNK_TIMEOUT):
+        """
+        等待分块下载完成，尚未轮到时将下载顺序调整到该分块。
+        :raises HttpError: 下载失败
+        :raises TimeoutError: 等待超时
+        """
+        with self.condition:
+            if not self.sparse.has_chunk(index) and index not in self.inflight:
+                self._set_focus(index)
+            ready = self.condition.wait_for(
+                lambda: self.sparse.has_chunk(index) or self.error is not None or self.cancelled, timeout
+            )
+            if self.error is not None:
+                raise HttpError(self.error)
+            if not ready or self.cancelled:
+                raise TimeoutError(f"等待分块 {index} 超时")
+
+    def read(self, start, length):
+        """
+        读取已下载的数据，下载完成后改为读取目标文件。
+        """
+        with self.condition:
+            if self.closing:
+                raise HttpError("下载已关闭")
+            if self.file:
+                self.file.seek(start)
+                return self.file.read(length)
+            return self.sparse.read(start, length)
+
+    def iter_range(self, start, end):
+        """
+        按分块输出 [start, end) 范围内的数据，缺失的分块等待下载，
+        供缓存代理直接读取本地部分文件。
+        """
+        self.focus_on(start)
+        position = start
+        while position < end:
+            index = self.sparse.chunk_of(position)
+            if not self.is_complete():
+                self.wait_chunk(index)
+            _, chunk_end = self.sparse.chunk_range(index)
+            length = min(chunk_end, end) - position
+            yield self.read(position, length)
+            position += length
+
+    def cancel(self):
+        """
+        停止下载，不等待下载线程：正在进行的请求完成后线程自行退出，已完成的分块保留用于续传。
+        """
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify_all()
+
+    def close(self):
+        """
+        取消下载并释放文件；仍有下载线程运行时由最后退出的线程保存位图并关闭稀疏文件。
+        """
+        with self.condition:
+            self.cancelled = True
+            self.closing = True
+            self.condition.notify_all()
+            release = self.active == 0
+            if self.file:
+                self.file.close()
+                self.file = None
+        if release:
+            self._release()
+
+    def _release(self):
+        with self.condition:
+            sparse = self.sparse if self.file is None else None
+        if sparse is not None and not sparse.file.closed:
+            sparse.close()
@@ -1,6 +1,9 @@
 import os
+import json
+import hashlib
+import logging
 import platform
-from PySide6.QtMultimedia import QMediaFormat
+import threading
 from PySide6.QtWidgets import QFileDialog
 
 # 媒体格式对应文件扩展名映射表
@@ -46,6 +49,161 @@ FORMAT_TO_EXTENSION_MAP = {
     # 可进一步扩展...
 }
 
+# 默认可播放格式（后端探测失败时使用）
+DEFAULT_PLAYABLE_EXTENSIONS = ["mp4", "mp3"]
+
+# 格式索引缓存文件名
+FORMAT_INDEX_CACHE_FILE = "format_index.json"
+
+
+def get_cache_dir(*parts):
+    """
+    获取应用的本地缓存目录，不存在时自动创建。
+    :param parts: 缓存目录下的子路径
+    :return: 缓存目录路径
+    """
+    if platform.system() == "Windows":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.environ.get("USERPROFILE", ""), "AppData", "Local")
+    elif platform.system() == "Darwin":
+        base = os.path.join(os.environ.get("HOME", ""), "Library", "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.environ.get("HOME", ""), ".cache")
+    path = os.path.join(base, "play", *parts)
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError as e:
+        logging.warning(f"创建缓存目录失败: {path}, {e}")
+    return path
+
+
+def get_extension(file_path):
+    """
+    获取文件扩展名（小写，不含点）。
+    """
+    return os.path.splitext(file_path)[1][1:].lower()
+
+
+class PlayableFormatIndex:
+    """
+    可播放格式索引，进程内只构建一次。
+    包含 小写格式名 -> 扩展名 以及 扩展名 -> 格式名集合 两个映射，
+    结果按 PySide6/Qt 版本和多媒体后端缓存到磁盘，避免每次都探测后端。
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, format_to_extensions, extension_to_formats):
+        self.format_to_extensions = format_to_extensions
+        self.extension_to_formats = extension_to_formats
+        self.extensions = frozenset(extension_to_formats)
+
+    @classmethod
+    def get(cls):
+        """
+        获取进程级的格式索引，首次调用时构建。
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls._load_or_build()
+        return cls._instance
+
+    @classmethod
+    def reset(cls):
+        """
+        清除进程内的索引（切换后端后使用）。
+        """
+        with cls._lock:
+            cls._instance = None
+
+    @staticmethod
+    def cache_key():
+        """
+        生成缓存键，由 PySide6/Qt 版本、多媒体后端和映射表内容组成。
+        """
+        import PySide6
+        from PySide6.QtCore import qVersion
+
+        map_digest = hashlib.sha1(
+            json.dumps(FORMAT_TO_EXTENSION_MAP, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+        backend = os.environ.get("QT_MEDIA_BACKEND", "default")
+        return f"{PySide6.__version__}-{qVersion()}-{backend}-{map_digest}"
+
+    @classmethod
+    def _load_or_build(cls):
+        """
+        优先从磁盘缓存加载索引，缓存缺失或失效时探测后端重新构建。
+        """
+        cache_path = os.path.join(get_cache_dir(), FORMAT_INDEX_CACHE_FILE)
+        key = cls.cache_key()
+
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("key") == key:
+                return cls.from_format_names(data["formats"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        format_names = cls.probe_backend_formats()
+        if format_names is None:
+            return cls.from_format_names([])
+
+        try:
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "formats": format_names}, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logging.warning(f"写入格式索引缓存失败: {e}")
+        return cls.from_format_names(format_names)
+
+    @staticmethod
+    def probe_backend_formats():
+        """
+        探测多媒体后端支持解码的文件格式名称。
+        :return: 格式名称列表，探测失败时返回 None
+        """
+        try:
+            from PySide6.QtMultimedia import QMediaFormat
+
+            formats = QMediaFormat().supportedFileFormats(QMediaFormat.ConversionMode.Decode)
+            return sorted(QMediaFormat.fileFormatName(fmt) for fmt in formats)
+        except Exception as e:
+            print(f"获取可播放格式时出错: {e}")
+            return None
+
+    @classmethod
+    def from_format_names(cls, format_names):
+        """
+        根据后端格式名称构建索引，比较时忽略大小写。
+        """
+        lookup = {key.lower(): extensions for key, extensions in FORMAT_TO_EXTENSION_MAP.items()}
+        format_to_extensions = {}
+        extension_to_formats = {}
+        for name in format_names:
+            name_lower = name.lower()
+            extensions = lookup.get(name_lower)
+            if not extensions:
+                continue
+            format_to_extensions[name_lower] = tuple(extensions)
+            for ext in extensions:
+                extension_to_formats.setdefault(ext, set()).add(name_lower)
+        return cls(format_to_extensions, extension_to_formats)
+
+    def is_playable(self, file_path):
+        """
+        判断文件扩展名是否可播放。
+        """
+        return get_extension(file_path) in self.extensions
+
+    def formats_for(self, file_path):
+        """
+        获取文件扩展名对应的格式名称集合。
+        """
+        return self.extension_to_formats.get(get_extension(file_path), set())
 
 
 class FileHandler:
@@ -54,8 +212,8 @@ class FileHandler:
     """
 
     def __init__(self):
-        # 初始化时创建 QMediaFormat 对象
-        self.media_format = QMediaFormat()
+        # 格式索引在首次使用时构建，进程内共享
+        self.format_index = None
 
     @staticmethod
     def get_default_download_folder():
@@ -72,30 +230,26 @@ class FileHandler:
             return os.getcwd()
 
 
+    def get_format_index(self):
+        """
+        获取进程共享的可播放格式索引。
+        """
+        if self.format_index is None:
+            self.format_index = PlayableFormatIndex.get()
+        return self.format_index
+
     def get_playable_formats(self):
         """
         获取系统支持的可播放文件格式
-        :return: 支持的文件格式名称列表
+        :return: 支持的文件扩展名列表
         """
-        try:
-            # 获取系统支持解码的文件格式列表
-            formats = self.media_format.supportedFileFormats(QMediaFormat.ConversionMode.Decode)
-            extensions = []
-
-            for fmt in formats:
-                # 获取每个支持格式的名称
-                format_name = QMediaFormat.fileFormatName(fmt)
-
-                # 根据名称获取对应的文件扩展名，比较时忽略大小写
-                format_name_lower = format_name.lower()
-                if any(key.lower() == format_name_lower for key in FORMAT_TO_EXTENSION_MAP):
-                    # 获取正确的key
-                    matching_key = next(key for key in FORMAT_TO_EXTENSION_MAP if key.lower() == format_name_lower)
-                    extensions.extend(FORMAT_TO_EXTENSION_MAP[matching_key])
-            return list(set(extensions))  # 返回去重的扩展名列表
-        except Exception as e:
-            print(f"获取可播放格式时出错: {e}")
-            return []
+        return sorted(self.get_format_index().extensions)
+
+    def is_playable(self, file_path):
+        """
+        判断文件是否为可播放的格式。
+        """
+        return self.get_format_index().is_playable(file_path)
 
     def select_file(self):
         """
@@ -105,12 +259,13 @@ class FileHandler:
         playable_extensions = self.get_playable_formats()
 
         if not playable_extensions:  # 如果支持的格式为空
-            playable_extensions = ["mp4", "mp3"]  # 默认为一些常见格式
+            playable_extensions = DEFAULT_PLAYABLE_EXTENSIONS  # 默认为一些常见格式
 
 
-        # 使用文件扩展名生成过滤器
-        file_types = " ".join([f"*.{ext.lower()}" for ext in playable_extensions])
-        filter_str = f"媒体文件类型 ({file_types})"
+        # 使用文件扩展名生成过滤器，播放列表单独一项
+        file_types = " ".join([f"*.{ext}" for ext in playable_extensions])
+        playlist_types = " ".join([f"*.{ext}" for ext in FORMAT_TO_EXTENSION_MAP["Playlist"]])
+        filter_str = f"媒体文件类型 ({file_types});;播放列表 ({playlist_types})"
 
         print(filter_str)
 
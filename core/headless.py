@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import time
+import logging
+
+from PySide6.QtCore import QObject, QTimer, QUrl, Signal
+
+from core.player import Player
+from core.playlist import is_playlist, load_playlist
+
+# 默认倍速
+DEFAULT_RATE = 4.0
+# 每个文件默认播放的媒体时长（毫秒）
+DEFAULT_PLAY_MS = 5000
+# 单个文件的默认超时时间（毫秒）
+DEFAULT_TIMEOUT_MS = 30000
+# 跳转后位置与目标的容差（毫秒）
+SEEK_TOLERANCE = 500
+
+
+def expand_sources(paths):
+    """
+    展开命令行传入的文件和播放列表。
+    """
+    sources = []
+    for path in paths:
+        if not path.startswith(('http://', 'https://')) and is_playlist(path):
+            sources.extend(load_playlist(path))
+        else:
+            sources.append(path)
+    return sources
+
+
+class HeadlessPlayer(Player):
+    """
+    无界面播放器：视频帧送入不渲染的 QVideoSink 只做计数，音频静音，
+    无效媒体只记录不弹窗，不使用续播位置和响度归一化。
+    """
+
+    RESUME_PLAYBACK = False
+    NORMALIZE_LOUDNESS = False
+
+    def __init__(self):
+        super().__init__(lazy_init=True)
+        self.video_sink = None
+        self.frame_count = 0
+        self.media_error = None
+
+    def on_player_created(self):
+        from PySide6.QtMultimedia import QVideoSink
+
+        self.video_sink = QVideoSink()
+        self.video_sink.videoFrameChanged.connect(self.count_frame)
+        self._audio_output.setMuted(True)
+
+    def on_player_attached(self, media_player):
+        media_player.setVideoSink(self.video_sink)
+        media_player.errorOccurred.connect(self.record_error)
+
+    def on_player_detached(self, media_player):
+        media_player.errorOccurred.disconnect(self.record_error)
+        media_player.setVideoSink(None)
+
+    def count_frame(self, frame):
+        if frame.isValid():
+            self.frame_count += 1
+
+    def record_error(self, error, message):
+        self.media_error = message or str(error)
+
+    def handle_media_status(self, status):
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        if status == QMediaPlayer.MediaStatus.InvalidMedia:
+            logging.warning(f"无效的媒体资源: {self.current_file}")
+            return
+        super().handle_media_status(status)
+
+
+class FileTiming:
+    """
+    单个文件的验证结果和各阶段耗时（毫秒）。
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.status = "pending"  # ok / invalid / timeout / missing
+        self.error = None
+        self.start = time.perf_counter()
+        self.load_ms = None
+        self.first_frame_ms = None
+        self.decode_ms = None  # 播放指定媒体时长实际花费的时间
+        self.decoded_media_ms = None
+        self.frames = 0
+        self.seek_ms = None
+        self.duration_ms = None
+        self.has_video = None
+
+    def elapsed_ms(self):
+        return round((time.perf_counter() - self.start) * 1000, 1)
+
+    def to_dict(self):
+        result = {
+            "source": self.source,
+            "status": self.status,
+            "total_ms": self.elapsed_ms(),
+            "load_ms": self.load_ms,
+            "first_frame_ms": self.first_frame_ms,
+            "decode_ms": self.decode_ms,
+            "decoded_media_ms": self.decoded_media_ms,
+            "frames": self.frames,
+            "seek_ms": self.seek_ms,
+            "duration_ms": self.duration_ms,
+            "has_video": self.has_video,
+        }
+        if self.decode_ms and self.decoded_media_ms:
+            # 解码速度相对实时播放的倍数
+            result["speed"] = round(self.decoded_media_ms / self.decode_ms, 2)
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class BatchRunner(QObject):
+    """
+    批量无界面播放：逐个加载文件，以指定倍速播放一段媒体时长，再跳转到中点，
+    由播放器信号驱动各阶段，记录加载、首帧、解码和跳转耗时；
+    每个文件有独立的超时，超时或无效时继续下一个文件。
+    """
+
+    fileFinished = Signal(dict)
+    finished = Signal(list)
+
+    def __init__(self, sources, rate=DEFAULT_RATE, play_ms=DEFAULT_PLAY_MS,
+                 timeout_ms=DEFAULT_TIMEOUT_MS, seek=True, player=None):
+        super().__init__()
+        self.sources = iter(sources)  # 可以是从队列读取的迭代器，取到 None 或耗尽时结束
+        self.rate = rate
+        self.play_ms = play_ms
+        self.seek = seek
+        self.player = player or HeadlessPlayer()
+        self.results = []
+        self.timing = None
+        self.stage = None  # loading / playing / seeking
+        self.play_start = None  # (位置, 时间点)
+        self.seek_target = None
+        self.timeout = QTimer(self)
+        self.timeout.setSingleShot(True)
+        self.timeout.setInterval(timeout_ms)
+        self.timeout.timeout.connect(self.on_timeout)
+
+    def start(self):
+        self.player.init_player()
+        media_player = self.player.media_player
+        media_player.mediaStatusChanged.connect(self.on_media_status)
+        media_player.positionChanged.connect(self.on_position)
+        self.player.video_sink.videoFrameChanged.connect(self.on_frame)
+        QTimer.singleShot(0, self.next_file)
+
+    def next_file(self):
+        source = next(self.sources, None)
+        if source is None:
+            self.finished.emit(self.results)
+            return
+
+        self.timing = FileTiming(source)
+        if not source.startswith(('http://', 'https://')) and not os.path.exists(source):
+            self.finish_file("missing", "文件不存在")
+            return
+
+        self.stage = "loading"
+        self.play_start = None
+        self.seek_target = None
+        self.player.frame_count = 0
+        self.player.media_error = None
+        self.timeout.start()
+        self.player.play_file(source)
+
+    def finish_file(self, status, error=None):
+        """
+        记录当前文件的结果并安排下一个文件。
+        """
+        if self.stage is None and self.timing.status != "pending":
+            return
+        self.timeout.stop()
+        self.stage = None
+        # 超时后到达的文件检查结果不再启动播放
+        self.player.opener.cancel()
+        media_player = self.player.media_player
+        media_player.stop()
+        media_player.setSource(QUrl())
+
+        self.timing.status = status
+        self.timing.error = error
+        self.timing.frames = self.player.frame_count
+        result = self.timing.to_dict()
+        self.results.append(result)
+        self.fileFinished.emit(result)
+        QTimer.singleShot(0, self.next_file)
+
+    def on_media_status(self, status):
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        Status = QMediaPlayer.MediaStatus
+        if self.stage is None:
+            return
+        if status == Status.InvalidMedia:
+            self.finish_file("invalid", self.player.media_error or "无效的媒体资源")
+        elif status in (Status.LoadedMedia, Status.BufferedMedia) and self.stage == "loading":
+            media_player = self.player.media_player
+            self.timing.load_ms = self.timing.elapsed_ms()
+            self.timing.duration_ms = media_player.duration()
+            self.timing.has_video = media_player.hasVideo()
+            media_player.setPlaybackRate(self.rate)
+            self.stage = "playing"
+        elif status == Status.EndOfMedia and self.stage == "playing":
+            self.finish_playing(self.player.media_player.duration())
+
+    def on_frame(self, frame):
+        if self.stage is not None and self.timing.first_frame_ms is None and frame.isValid():
+            self.timing.first_frame_ms = self.timing.elapsed_ms()
+
+    def on_position(self, position):
+        if self.stage == "playing":
+            if self.play_start is None:
+                self.play_start = (position, time.perf_counter())
+            elif position - self.play_start[0] >= self.play_ms:
+                self.finish_playing(position)
+        elif self.stage == "seeking" and abs(position - self.seek_target[0]) <= SEEK_TOLERANCE:
+            self.timing.seek_ms = round((time.perf_counter() - self.seek_target[1]) * 1000, 1)
+            self.finish_file("ok")
+
+    def finish_playing(self, position):
+        """
+        播放阶段结束，记录解码耗时后进入跳转阶段。
+        """
+        if self.play_start is not None:
+            start_position, started = self.play_start
+            self.timing.decode_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.timing.decoded_media_ms = position - start_position
+
+        duration = self.player.media_player.duration()
+        if not self.seek or duration <= 0 or not self.player.media_player.isSeekable():
+            self.finish_file("ok")
+            return
+        self.stage = "seeking"
+        target = duration // 2
+        self.seek_target = (target, time.perf_counter())
+        self.player.seek(target)
+
+    def on_timeout(self):
+        stage = self.stage
+        self.finish_file("timeout", f"{stage} 阶段超时")
+
+
+def summarize_results(results):
+    """
+    汇总批量验证结果。
+    """
+    summary = {"files": len(results)}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    for key in ("load_ms", "first_frame_ms", "seek_ms"):
+        values = sorted(result[key] for result in results if result.get(key) is not None)
+        if values:
+            summary[key] = {"median": values[len(values) // 2], "max": values[-1]}
+    return summary
+
+
+def run_headless(paths, rate=DEFAULT_RATE, play_ms=DEFAULT_PLAY_MS, timeout_ms=DEFAULT_TIMEOUT_MS,
+                 seek=True, report_path=None):
+    """
+    运行批量无界面播放，输出 JSON 报告。
+    :return: 进程退出码，存在失败的文件时为 1
+    """
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    runner = BatchRunner(expand_sources(paths), rate, play_ms, timeout_ms, seek)
+    runner.fileFinished.connect(
+        lambda result: print(f"[{result['status']}] {result['source']} ({result['total_ms']} ms)", file=sys.stderr)
+    )
+    runner.finished.connect(app.quit)
+    runner.start()
+    app.exec()
+    runner.player.release_resources()
+
+    report = {"summary": summarize_results(runner.results), "results": runner.results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0 if all(result["status"] == "ok" for result in runner.results) else 1
@@ -0,0 +1,363 @@
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import urljoin, urlsplit
+
+from core.http_client import FetchPool, HttpError
+
+# 属性列表: BANDWIDTH=1280000,RESOLUTION=640x360,CODECS="avc1,mp4a"
+ATTRIBUTE_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+# 带 URI 属性、需要改写为绝对地址的标签
+URI_TAGS = ("#EXT-X-KEY", "#EXT-X-MAP", "#EXT-X-SESSION-KEY")
+
+# 按片段顺序保留的标签；EXT-X-BYTERANGE 由代理按范围下载，每个范围作为独立的本地片段，不再保留
+SEGMENT_TAGS = URI_TAGS + ("#EXT-X-DISCONTINUITY", "#EXT-X-PROGRAM-DATE-TIME")
+
+
+def parse_attributes(text):
+    """
+    解析标签中的属性列表。
+    """
+    return {key: value.strip('"') for key, value in ATTRIBUTE_PATTERN.findall(text)}
+
+
+def absolutize_uri_attribute(line, base_url):
+    """
+    将标签中的 URI 属性改写为绝对地址，使本地代理转发后仍可访问。
+    """
+    return re.sub(r'URI="([^"]*)"', lambda m: f'URI="{urljoin(base_url, m.group(1))}"', line)
+
+
+class Variant:
+    """
+    主播放列表中的一个码率版本。
+    """
+
+    def __init__(self, bandwidth, uri, resolution="", codecs=""):
+        self.bandwidth = bandwidth
+        self.uri = uri
+        self.resolution = resolution
+        self.codecs = codecs
+
+
+class Segment:
+    """
+    媒体播放列表中的一个片段。
+    """
+
+    def __init__(self, sequence, duration, uri, tags, byterange=None):
+        self.sequence = sequence
+        self.duration = duration
+        self.uri = uri
+        self.tags = tags  # 片段之前的 KEY/MAP/DISCONTINUITY 等标签
+        self.byterange = byterange  # (起始偏移, 长度)，整个文件时为 None
+
+
+class MediaPlaylist:
+    """
+    媒体播放列表。
+    """
+
+    def __init__(self):
+        self.version = None
+        self.target_duration = 10
+        self.media_sequence = 0
+        self.ended = False
+        self.has_map = False
+        self.encrypted = False
+        self.segments = []
+        self.by_sequence = {}
+
+    def segment(self, sequence):
+        return self.by_sequence.get(sequence)
+
+
+def parse_master(text, base_url):
+    """
+    解析主播放列表。
+    :return: 按码率升序排列的 Variant 列表，不是主播放列表时返回空列表
+    """
+    variants = []
+    lines = [line.strip() for line in text.splitlines()]
+    for position, line in enumerate(lines):
+        if not line.startswith("#EXT-X-STREAM-INF:"):
+            continue
+        attributes = parse_attributes(line.split(":", 1)[1])
+        uri = next((item for item in lines[position + 1:] if item and not item.startswith("#")), None)
+        if uri:
+            variants.append(Variant(
+                int(attributes.get("BANDWIDTH", 0)), urljoin(base_url, uri),
+                attributes.get("RESOLUTION", ""), attributes.get("CODECS", "")
+            ))
+    return sorted(variants, key=lambda variant: variant.bandwidth)
+
+
+def parse_media(text, base_url):
+    """
+    解析媒体播放列表。
+    """
+    playlist = MediaPlaylist()
+    duration = None
+    tags = []
+    sequence = None
+    byterange = None
+    range_ends = {}  # 片段地址 -> 上一个范围的结束位置，省略偏移时从这里继续
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-VERSION:"):
+            playlist.version = line.split(":", 1)[1]
+        elif line.startswith("#EXT-X-TARGETDURATION:"):
+            playlist.target_duration = int(float(line.split(":", 1)[1]))
+        elif line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+            playlist.media_sequence = int(line.split(":", 1)[1])
+        elif line.startswith("#EXT-X-ENDLIST"):
+            playlist.ended = True
+        elif line.startswith("#EXTINF:"):
+            duration = float(line.split(":", 1)[1].split(",", 1)[0])
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            length, _, offset = line.split(":", 1)[1].partition("@")
+            byterange = (int(offset) if offset else None, int(length))
+        elif line.startswith(SEGMENT_TAGS):
+            if line.startswith("#EXT-X-MAP"):
+                playlist.has_map = True
+            elif line.startswith("#EXT-X-KEY") and parse_attributes(line.split(":", 1)[1]).get("METHOD") != "NONE":
+                playlist.encrypted = True
+            tags.append(absolutize_uri_attribute(line, base_url) if line.startswith(URI_TAGS) else line)
+        elif not line.startswith("#"):
+            if sequence is None:
+                sequence = playlist.media_sequence
+            uri = urljoin(base_url, line)
+            if byterange is not None:
+                offset, length = byterange
+                if offset is None:
+                    offset = range_ends.get(uri, 0)
+                range_ends[uri] = offset + length
+                byterange = (offset, length)
+            segment = Segment(sequence, duration or 0.0, uri, tags, byterange)
+            playlist.segments.append(segment)
+            playlist.by_sequence[sequence] = segment
+            sequence += 1
+            duration = None
+            tags = []
+            byterange = None
+    return playlist
+
+
+class HlsSession:
+    """
+    一个 HLS 流的本地会话。
+    向播放器提供改写后的单一媒体播放列表，片段地址指向本地代理；
+    片段按序号从当前选中的码率版本下载，并发预取后续片段，
+    根据实测吞吐量选择不超过可用带宽的最高码率。
+    每个序号记录实际提供数据的版本，片段缓存按 (版本, 序号) 保存，
+    播放列表中该片段之前的 KEY/MAP 等标签也取自同一版本。
+    """
+
+    PREFETCH_SEGMENTS = 3  # 预取的片段数
+    SEGMENT_CACHE_SIZE = 24  # 内存中保留的片段数
+    SOURCE_HISTORY = 1000  # 记录片段来源版本的序号数
+    BANDWIDTH_SAFETY = 0.8  # 只使用实测吞吐量的一部分，留出余量
+    THROUGHPUT_SMOOTHING = 0.3  # 吞吐量指数平滑系数
+
+    def __init__(self, url, client, pool):
+        self.url = url
+        self.client = client
+        self.pool = pool
+        self.lock = threading.Lock()
+        self.variants = []
+        self.current = None
+        self.playlists = {}  # 版本地址 -> (MediaPlaylist, 获取时间)
+        self.segments = OrderedDict()  # (版本地址, 序号) -> 片段数据
+        self.sources = OrderedDict()  # 序号 -> 提供该片段的 Variant
+        self.inflight = {}  # 序号 -> Future
+        self.throughput = None  # 比特/秒
+        self.adaptive = True
+        self.load()
+
+    def load(self):
+        """
+        读取主播放列表，从最低码率开始以缩短起播时间。
+        """
+        text = self.client.get(self.url).body.decode("utf-8", errors="replace")
+        self.variants = parse_master(text, self.url) or [Variant(0, self.url)]
+        self.current = self.variants[0]
+        # 使用 EXT-X-MAP 的 fMP4 流切换码率需要重新初始化解码器，加密流各版本的密钥可能不同，
+        # 交给播放器的播放列表不会随之更新，这两类流只在起播时选择一次
+        playlist = self.media_playlist(self.current)
+        if playlist.has_map or playlist.encrypted:
+            self.adaptive = False
+
+    def media_playlist(self, variant, refresh=False):
+        """
+        获取码率版本的媒体播放列表，直播流超过半个目标时长后重新获取。
+        """
+        with self.lock:
+            cached = self.playlists.get(variant.uri)
+        if cached is not None:
+            playlist, fetched_at = cached
+            stale = not playlist.ended and time.monotonic() - fetched_at > playlist.target_duration / 2
+            if not refresh and not stale:
+                return playlist
+
+        text = self.client.get(variant.uri).body.decode("utf-8", errors="replace")
+        playlist = parse_media(text, variant.uri)
+        with self.lock:
+            self.playlists[variant.uri] = (playlist, time.monotonic())
+        return playlist
+
+    def segment_tags(self, segment):
+        """
+        片段之前的标签，已从其他版本下载的片段使用该版本播放列表中的标签。
+        """
+        with self.lock:
+            source = self.sources.get(segment.sequence)
+            cached = self.playlists.get(source.uri) if source is not None else None
+        if cached is not None:
+            other = cached[0].segment(segment.sequence)
+            if other is not None:
+                return other.tags
+        return segment.tags
+
+    def render_playlist(self, segment_extension):
+        """
+        生成交给播放器的本地媒体播放列表。
+        """
+        playlist = self.media_playlist(self.current)
+        lines = ["#EXTM3U"]
+        if playlist.version:
+            lines.append(f"#EXT-X-VERSION:{playlist.version}")
+        lines.append(f"#EXT-X-TARGETDURATION:{playlist.target_duration}")
+        lines.append(f"#EXT-X-MEDIA-SEQUENCE:{playlist.media_sequence}")
+        for segment in playlist.segments:
+            lines.extend(self.segment_tags(segment))
+            lines.append(f"#EXTINF:{segment.duration:.3f},")
+            lines.append(f"seg/{segment.sequence}{segment_extension(segment)}")
+        if playlist.ended:
+            lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def choose_variant(self):
+        """
+        根据实测吞吐量选择码率版本。
+        """
+        if not self.adaptive or self.throughput is None or len(self.variants) == 1:
+            return self.current
+        budget = self.throughput * self.BANDWIDTH_SAFETY
+        chosen = self.variants[0]
+        for variant in self.variants:
+            if variant.bandwidth <= budget:
+                chosen = variant
+        if chosen is not self.current:
+            logging.info(f"HLS 切换码率: {self.current.bandwidth} -> {chosen.bandwidth} (实测 {int(self.throughput)} bps)")
+            self.current = chosen
+        return chosen
+
+    def segment(self, sequence):
+        """
+        获取片段数据，同时预取后续片段。
+        :raises HttpError: 下载失败或片段不存在
+        """
+        future = self._ensure_segment(sequence)
+        for ahead in range(sequence + 1, sequence + 1 + self.PREFETCH_SEGMENTS):
+            self._ensure_segment(ahead, prefetch=True)
+        return future.result()
+
+    def _ensure_segment(self, sequence, prefetch=False):
+        """
+        播放器请求的片段以最高优先级下载，已在排队的预取任务提升优先级。
+        """
+        with self.lock:
+            source = self.sources.get(sequence)
+            data = self.segments.get((source.uri, sequence)) if source is not None else None
+            if data is not None:
+                self.segments.move_to_end((source.uri, sequence))
+                future = Future()
+                future.set_result(data)
+                return future
+            future = self.inflight.get(sequence)
+            if future is None:
+                if prefetch and sequence not in self.media_playlist_sequences():
+                    return None
+                priority = FetchPool.PREFETCH if prefetch else FetchPool.URGENT
+                future = self.inflight[sequence] = self.pool.submit(self._fetch_segment, sequence, priority=priority)
+            elif not prefetch:
+                self.pool.promote(future)
+            return future
+
+    def media_playlist_sequences(self):
+        """
+        当前版本播放列表中已知的片段序号（调用方持有锁，只读取缓存）。
+        """
+        cached = self.playlists.get(self.current.uri)
+        return cached[0].by_sequence if cached else {}
+
+    def _fetch_segment(self, sequence):
+        try:
+            # 已从某个版本下载过的片段（缓存被淘汰后再次请求）仍从该版本获取，与播放列表中的标签一致
+            with self.lock:
+                variant = self.sources.get(sequence)
+            variant = variant or self.choose_variant()
+            playlist = self.media_playlist(variant)
+            segment = playlist.segment(sequence)
+            if segment is None and not playlist.ended:
+                segment = self.media_playlist(variant, refresh=True).segment(sequence)
+            if segment is None:
+                raise HttpError(f"HLS 片段不存在: {sequence}")
+
+            start = time.perf_counter()
+            data = self._download(segment)
+            self._record_throughput(len(data), time.perf_counter() - start)
+
+            key = (variant.uri, sequence)
+            with self.lock:
+                self.segments[key] = data
+                self.sources[sequence] = variant
+                self.sources.move_to_end(sequence)
+                while len(self.segments) > self.SEGMENT_CACHE_SIZE:
+                    self.segments.popitem(last=False)
+                while len(self.sources) > self.SOURCE_HISTORY:
+                    self.sources.popitem(last=False)
+            return data
+        finally:
+            with self.lock:
+                self.inflight.pop(sequence, None)
+
+    def _download(self, segment):
+        """
+        下载片段，EXT-X-BYTERANGE 片段只请求对应的字节范围。
+        """
+        if segment.byterange is None:
+            return self.client.get(segment.uri).body
+        offset, length = segment.byterange
+        response = self.client.get(segment.uri, offset, offset + length - 1)
+        if response.status == 206:
+            return response.body
+        # 源站忽略 Range 时返回完整文件，截取需要的部分
+        return response.body[offset:offset + length]
+
+    def _record_throughput(self, size, elapsed):
+        """
+        记录一次下载的吞吐量（指数平滑）。
+        并发下载时单个连接的速度偏低，估算结果偏保守。
+        """
+        if elapsed <= 0 or size <= 0:
+            return
+        sample = size * 8 / elapsed
+        with self.lock:
+            if self.throughput is None:
+                self.throughput = sample
+            else:
+                self.throughput += self.THROUGHPUT_SMOOTHING * (sample - self.throughput)
+
+
+def is_hls_url(url):
+    """
+    判断 URL 是否指向 HLS 播放列表。
+    """
+    return urlsplit(url).path.lower().endswith(".m3u8")
@@ -0,0 +1,237 @@
+import re
+import heapq
+import itertools
+import threading
+import http.client
+from concurrent.futures import Future
+from urllib.parse import urlsplit, urljoin
+
+# 请求超时时间（秒）
+DEFAULT_TIMEOUT = 15
+
+# Content-Range: bytes 0-99/1000
+CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class HttpError(Exception):
+    """
+    HTTP 请求失败。
+    """
+
+
+class HttpResponse:
+    """
+    HTTP 响应内容。
+    """
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers  # 小写键的字典
+        self.body = body
+
+    @property
+    def total_size(self):
+        """
+        资源总大小，优先从 Content-Range 中解析，未知时返回 None。
+        """
+        match = CONTENT_RANGE_PATTERN.match(self.headers.get("content-range", ""))
+        if match:
+            return int(match.group(3)) if match.group(3) != "*" else None
+        if self.status == 200 and "content-length" in self.headers:
+            return int(self.headers["content-length"])
+        return None
+
+
+class ResourceInfo:
+    """
+    资源探测结果。
+    """
+
+    def __init__(self, total_size, content_type, supports_range, validator=""):
+        self.total_size = total_size  # 总大小，未知时为 None
+        self.content_type = content_type
+        self.supports_range = supports_range
+        self.validator = validator  # ETag 或 Last-Modified，用于判断缓存是否过期
+
+
+def validator_of(headers):
+    """
+    从响应头中取出缓存校验值，优先使用 ETag。
+    """
+    return headers.get("etag") or headers.get("last-modified", "")
+
+
+class HttpClient:
+    """
+    支持长连接复用的 HTTP 客户端。
+    每个线程为每个 (协议, 主机, 端口) 保留一个连接，连接断开时自动重连一次。
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connection(self, scheme, netloc):
+        connections = getattr(self.local, "connections", None)
+        if connections is None:
+            connections = self.local.connections = {}
+        key = (scheme, netloc)
+        connection = connections.get(key)
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            connection = connections[key] = connection_class(netloc, timeout=self.timeout)
+        return connection
+
+    def _drop_connection(self, scheme, netloc):
+        connection = self.local.connections.pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def request(self, method, url, headers=None, max_redirects=5, read_body=True):
+        """
+        发送请求并读取响应。
+        :param read_body: 为 False 时只读取状态和响应头，随后关闭连接，
+                          用于响应体可能无限长（如网络电台）或不需要响应体的请求
+        :raises HttpError: 网络错误或重定向过多
+        """
+        for _ in range(max_redirects + 1):
+            parts = urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+
+            response = None
+            for attempt in range(2):
+                connection = self._connection(parts.scheme, parts.netloc)
+                try:
+                    connection.request(method, path, headers=headers or {})
+                    raw = connection.getresponse()
+                    body = raw.read() if read_body else b""
+                    response = HttpResponse(raw.status, {k.lower(): v for k, v in raw.getheaders()}, body)
+                    if raw.will_close or not read_body:
+                        # 未读取的响应体留在连接上，连接不能再复用
+                        self._drop_connection(parts.scheme, parts.netloc)
+                    break
+                except (OSError, http.client.HTTPException) as e:
+                    # 复用的连接可能已被服务器关闭，重连后再试一次
+                    self._drop_connection(parts.scheme, parts.netloc)
+                    if attempt == 1:
+                        raise HttpError(f"请求失败: {url}, {e}") from e
+
+            if response.status in (301, 302, 303, 307, 308) and "location" in response.headers:
+                url = urljoin(url, response.headers["location"])
+                continue
+            return response
+        raise HttpError(f"重定向次数过多: {url}")
+
+    def get(self, url, start=None, end=None):
+        """
+        发送 GET 请求，可指定字节范围 [start, end]（闭区间）。
+        :raises HttpError: 请求失败或返回错误状态码
+        """
+        headers = {}
+        if start is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        response = self.request("GET", url, headers)
+        if response.status >= 400:
+            raise HttpError(f"服务器返回错误 {response.status}: {url}")
+        return response
+
+    def probe(self, url):
+        """
+        获取资源总大小、内容类型、是否支持范围请求以及缓存校验值。
+        优先使用 HEAD，服务器不支持 HEAD 时改为请求第一个字节，且只读取响应头：
+        不支持范围请求的源站会返回完整（可能无限长）的响应体。
+        :raises HttpError: 请求失败或返回错误状态码
+        """
+        try:
+            response = self.request("HEAD", url)
+        except HttpError:
+            response = None
+        if response is not None and response.status < 400 and "content-length" in response.headers:
+            headers = response.headers
+            supports_range = headers.get("accept-ranges", "").lower() == "bytes"
+            return ResourceInfo(
+                int(headers["content-length"]), headers.get("content-type", ""), supports_range, validator_of(headers)
+            )
+
+        response = self.request("GET", url, {"Range": "bytes=0-0"}, read_body=False)
+        if response.status >= 400:
+            raise HttpError(f"服务器返回错误 {response.status}: {url}")
+        headers = response.headers
+        if response.status != 206:
+            return ResourceInfo(None, headers.get("content-type", ""), False, validator_of(headers))
+        return ResourceInfo(response.total_size, headers.get("content-type", ""), True, validator_of(headers))
+
+
+class FetchPool:
+    """
+    带优先级的下载线程池。
+    播放器正在等待的请求（URGENT）先于预读请求（PREFETCH）执行，
+    已排队的预读任务变为急需时可以提升优先级，不需要排在其他预读任务之后。
+    """
+
+    URGENT = 0
+    PREFETCH = 1
+
+    def __init__(self, workers, name="fetch"):
+        self.condition = threading.Condition()
+        self.queue = []  # (优先级, 序号, Future) 的最小堆
+        self.pending = {}  # 尚未开始的 Future -> (函数, 参数)
+        self.counter = itertools.count()
+        self.closed = False
+        for number in range(workers):
+            threading.Thread(target=self._worker, name=f"{name}-{number}", daemon=True).start()
+
+    def submit(self, func, *args, priority=PREFETCH):
+        """
+        提交任务，返回 Future。
+        :raises RuntimeError: 线程池已关闭
+        """
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("下载线程池已关闭")
+            self.pending[future] = (func, args)
+            heapq.heappush(self.queue, (priority, next(self.counter), future))
+            self.condition.notify()
+        return future
+
+    def promote(self, future, priority=URGENT):
+        """
+        提升尚未开始的任务的优先级，原队列项在出队时跳过。
+        """
+        with self.condition:
+            if future in self.pending:
+                heapq.heappush(self.queue, (priority, next(self.counter), future))
+                self.condition.notify()
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                _, _, future = heapq.heappop(self.queue)
+                task = self.pending.pop(future, None)
+            # 已被提升优先级执行过或已取消的任务直接跳过
+            if task is None or not future.set_running_or_notify_cancel():
+                continue
+            func, args = task
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self):
+        """
+        关闭线程池并取消尚未开始的任务，正在执行的任务继续完成。
+        """
+        with self.condition:
+            self.closed = True
+            for future in self.pending:
+                future.cancel()
+            self.pending.clear()
+            self.queue.clear()
+            self.condition.notify_all()
@@ -0,0 +1,143 @@
+import os
+import json
+import getpass
+import hashlib
+import logging
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QAbstractSocket, QLocalServer, QLocalSocket
+
+# 第二个实例连接和等待确认的超时时间（毫秒）
+CONNECT_TIMEOUT_MS = 500
+
+# 单条消息的最大长度，防止异常客户端占用内存
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+
+def server_name():
+    """
+    本地套接字名称，按用户区分，避免不同用户的实例互相接管。
+    """
+    user = hashlib.sha1(getpass.getuser().encode("utf-8")).hexdigest()[:12]
+    return f"play-instance-{user}"
+
+
+def normalize_sources(files):
+    """
+    将相对路径转换为绝对路径，运行中实例的工作目录可能不同。
+    """
+    return [item if item.startswith(('http://', 'https://')) else os.path.abspath(item) for item in files]
+
+
+def is_server_running(name, timeout_ms=CONNECT_TIMEOUT_MS):
+    """
+    能否连接到指定名称的本地套接字，用于区分运行中的实例和残留的套接字文件。
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout_ms):
+        return False
+    socket.abort()
+    return True
+
+
+def send_to_running_instance(files, enqueue=False, library=None, timeout_ms=CONNECT_TIMEOUT_MS):
+    """
+    把参数转发给已运行的实例。
+    只使用 QtCore/QtNetwork，不创建 QApplication，也不导入界面和多媒体模块。
+    :param library: 要添加到媒体库的目录列表，空列表表示重新扫描已添加的目录，None 表示不涉及媒体库
+    :return: 已有实例确认接收时返回 True，没有运行中的实例时返回 False
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(server_name())
+    if not socket.waitForConnected(timeout_ms):
+        return False
+
+    message = {"files": normalize_sources(files), "enqueue": enqueue}
+    if library is not None:
+        message["library"] = [os.path.abspath(path) for path in library]
+    socket.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+    if not socket.waitForBytesWritten(timeout_ms):
+        socket.abort()
+        return False
+    # 等待确认，确保运行中的实例已收到消息后再退出
+    acknowledged = socket.waitForReadyRead(timeout_ms) and socket.readLine().data().strip() == b"ok"
+    socket.disconnectFromServer()
+    return acknowledged
+
+
+class InstanceServer(QObject):
+    """
+    单实例服务：监听本地套接字，接收后续启动转发过来的参数。
+    每个连接发送一行 JSON：{"files": [...], "enqueue": bool, "library": [...]}，处理后回复 "ok"，
+    library 可省略。
+    """
+
+    messageReceived = Signal(list, bool, object)  # 文件列表，是否加入队列，媒体库目录列表或 None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        # 只允许当前用户连接
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.on_new_connection)
+        self.buffers = {}
+
+    def listen(self):
+        """
+        开始监听；名称已被占用时先尝试连接，连接不上说明是上次异常退出残留的套接字文件，清理后重试。
+        :return: 是否监听成功
+        """
+        name = server_name()
+        # 设置访问权限后 Qt 会直接替换已有的套接字文件，监听前先确认没有实例在运行
+        if is_server_running(name):
+            logging.warning("单实例服务启动失败: 已有实例在运行")
+            return False
+        if self.server.listen(name):
+            return True
+        if self.server.serverError() == QAbstractSocket.SocketError.AddressInUseError and not is_server_running(name):
+            QLocalServer.removeServer(name)
+            if self.server.listen(name):
+                return True
+        logging.warning(f"单实例服务启动失败: {self.server.errorString()}")
+        return False
+
+    def close(self):
+        self.server.close()
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.buffers[socket] = b""
+            socket.readyRead.connect(lambda socket=socket: self.on_ready_read(socket))
+            socket.disconnected.connect(lambda socket=socket: self.on_disconnected(socket))
+
+    def on_ready_read(self, socket):
+        data = self.buffers.get(socket, b"") + socket.readAll().data()
+        if b"\n" not in data:
+            if len(data) > MAX_MESSAGE_SIZE:
+                socket.abort()
+            else:
+                self.buffers[socket] = data
+            return
+
+        line, _, rest = data.partition(b"\n")
+        self.buffers[socket] = rest
+        try:
+            message = json.loads(line.decode("utf-8"))
+            files = [str(item) for item in message.get("files", [])]
+            enqueue = bool(message.get("enqueue", False))
+            library = message.get("library")
+            if library is not None:
+                library = [str(item) for item in library]
+        except (ValueError, AttributeError, TypeError) as e:
+            logging.warning(f"单实例服务收到无效消息: {e}")
+            socket.abort()
+            return
+        socket.write(b"ok\n")
+        socket.flush()
+        self.messageReceived.emit(files, enqueue, library)
+
+    def on_disconnected(self, socket):
+        self.buffers.pop(socket, None)
+        socket.deleteLater()
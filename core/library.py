@@ -0,0 +1,365 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from core.file import FORMAT_TO_EXTENSION_MAP, PlayableFormatIndex, get_cache_dir, get_extension
+
+# 媒体库数据库文件名
+LIBRARY_DB_FILE = "library.db"
+
+# 写入数据库时每批的记录数
+WRITE_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    duration INTEGER,
+    codec TEXT,
+    has_video INTEGER,
+    has_audio INTEGER
+);
+CREATE INDEX IF NOT EXISTS media_root ON media(root);
+"""
+
+
+def get_library_extensions():
+    """
+    获取媒体库扫描时使用的扩展名集合。
+    优先使用后端支持的格式索引，探测失败时使用映射表中的全部媒体扩展名。
+    """
+    extensions = PlayableFormatIndex.get().extensions
+    if extensions:
+        return extensions
+    return frozenset(
+        ext for name, exts in FORMAT_TO_EXTENSION_MAP.items() if name != "Playlist" for ext in exts
+    )
+
+
+def scan_directory(path, extensions):
+    """
+    扫描单个目录（不递归）。
+    :return: (媒体文件列表 [(路径, 大小, 修改时间)], 子目录列表)
+    """
+    files = []
+    directories = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            directories.append(entry.path)
+                    elif entry.is_file() and get_extension(entry.name) in extensions:
+                        stat = entry.stat()
+                        files.append((entry.path, stat.st_size, stat.st_mtime))
+                except OSError:
+                    continue
+    except OSError as e:
+        logging.warning(f"无法扫描目录: {path}, {e}")
+    return files, directories
+
+
+def walk_parallel(root, extensions, executor):
+    """
+    在线程池上并行遍历目录树，每个目录作为一个任务。
+    :return: 媒体文件生成器 (路径, 大小, 修改时间)
+    """
+    pending = {executor.submit(scan_directory, root, extensions)}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            files, directories = future.result()
+            for directory in directories:
+                pending.add(executor.submit(scan_directory, directory, extensions))
+            yield from files
+
+
+def is_under(path, directory):
+    """
+    path 是否为 directory 本身或位于其下。
+    """
+    return path == directory or path.startswith(os.path.join(directory, ""))
+
+
+def normalize_roots(paths):
+    """
+    规范化扫描目录：转为绝对路径、去重，并去掉已被其他目录包含的子目录。
+    """
+    roots = []
+    for path in sorted({os.path.abspath(path) for path in paths}):
+        # 排序后上级目录总在其子目录之前
+        if not roots or not is_under(path, roots[-1]):
+            roots.append(path)
+    return roots
+
+
+def log_background_error(future):
+    """
+    后台任务的完成回调，记录任务中未处理的异常。
+    """
+    error = None if future.cancelled() else future.exception()
+    if error is not None:
+        logging.error(f"媒体库后台任务失败: {error}", exc_info=error)
+
+
+@dataclass
+class ScanResult:
+    """
+    单次扫描的统计结果。
+    """
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    elapsed: float = 0.0
+
+
+class MediaLibrary:
+    """
+    媒体库，将配置目录下的媒体文件索引到本地 SQLite 数据库。
+    重新扫描时只更新大小或修改时间发生变化的文件。
+    """
+
+    def __init__(self, db_path=None, workers=None):
+        self.db_path = db_path or os.path.join(get_cache_dir(), LIBRARY_DB_FILE)
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.background = None
+
+    def close(self):
+        """
+        关闭数据库连接。
+        """
+        if self.background:
+            self.background.shutdown(wait=True)
+        with self.lock:
+            self.connection.close()
+
+    def add_root(self, path):
+        """
+        添加扫描目录。目录已被某个扫描目录包含时不重复添加；
+        新目录包含已有的扫描目录时，合并这些目录及其索引记录。
+        :return: 实际负责该目录的扫描目录
+        """
+        path = os.path.abspath(path)
+        with self.lock, self.connection:
+            nested = []
+            for root in self.roots():
+                if is_under(path, root):
+                    return root
+                if is_under(root, path):
+                    nested.append(root)
+            for root in nested:
+                self.connection.execute("DELETE FROM roots WHERE path = ?", (root,))
+                self.connection.execute("UPDATE media SET root = ? WHERE root = ?", (path, root))
+            self.connection.execute("INSERT INTO roots(path) VALUES (?)", (path,))
+        return path
+
+    def remove_root(self, path):
+        """
+        移除扫描目录及其下的索引记录。
+        """
+        path = os.path.abspath(path)
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM roots WHERE path = ?", (path,))
+            self.connection.execute("DELETE FROM media WHERE root = ?", (path,))
+
+    def roots(self):
+        """
+        获取已配置的扫描目录。
+        """
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT path FROM roots ORDER BY path")]
+
+    def root_of(self, path):
+        """
+        获取包含该路径的扫描目录，不属于任何扫描目录时返回 None。
+        """
+        path = os.path.abspath(path)
+        return next((root for root in self.roots() if is_under(path, root)), None)
+
+    def scan(self, roots=None):
+        """
+        扫描目录并增量更新索引。
+        :param roots: 要扫描的目录，默认扫描全部已配置目录；可以是扫描目录下的子目录，
+            索引记录仍归属于包含它的扫描目录
+        :return: ScanResult
+        """
+        start = time.perf_counter()
+        result = ScanResult()
+        extensions = get_library_extensions()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="library-scan") as executor:
+            # 目录相互嵌套时只扫描最上层的目录，避免同一文件被重复扫描
+            for directory in normalize_roots(roots or self.roots()):
+                root = self.root_of(directory) or directory
+                self._scan_root(directory, root, extensions, executor, result)
+
+        result.elapsed = time.perf_counter() - start
+        logging.info(
+            f"媒体库扫描完成: 新增 {result.added}, 更新 {result.updated}, "
+            f"删除 {result.removed}, 未变化 {result.unchanged}, 耗时 {result.elapsed:.2f}s"
+        )
+        return result
+
+    def run_in_background(self, func, *args):
+        """
+        在媒体库的后台线程按提交顺序执行任务，任务中的异常写入日志。
+        :return: concurrent.futures.Future
+        """
+        if self.background is None:
+            self.background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="library")
+        future = self.background.submit(func, *args)
+        future.add_done_callback(log_background_error)
+        return future
+
+    def scan_in_background(self, roots=None, callback=None):
+        """
+        在后台线程执行扫描，扫描失败时记录日志。
+        :param callback: 扫描成功后以 ScanResult 调用，运行在后台线程
+        :return: concurrent.futures.Future
+        """
+        future = self.run_in_background(self.scan, roots)
+        if callback:
+            future.add_done_callback(lambda f: not f.cancelled() and f.exception() is None and callback(f.result()))
+        return future
+
+    def _scan_root(self, directory, root, extensions, executor, result):
+        """
+        扫描单个目录树，对比已有索引写入变化。
+        :param root: 记录所属的扫描目录
+        """
+        known = self._known_under(directory)
+
+        changed = []
+        for path, size, mtime in walk_parallel(directory, extensions, executor):
+            previous = known.pop(path, None)
+            if previous is None:
+                result.added += 1
+            elif previous != (size, mtime):
+                result.updated += 1
+            else:
+                result.unchanged += 1
+                continue
+            changed.append((path, root, size, mtime))
+            if len(changed) >= WRITE_BATCH_SIZE:
+                self._write_changes(changed, [])
+                changed = []
+
+        removed = list(known)
+        self._write_changes(changed, removed)
+        result.removed += len(removed)
+
+    def _write_changes(self, changed, removed):
+        """
+        批量写入新增/变化的文件并删除已不存在的文件，变化的文件清空元数据等待重新提取。
+        """
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO media(path, root, size, mtime) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET root = excluded.root, size = excluded.size, "
+                "mtime = excluded.mtime, duration = NULL, codec = NULL, has_video = NULL, has_audio = NULL",
+                changed
+            )
+            self.connection.executemany("DELETE FROM media WHERE path = ?", ((path,) for path in removed))
+
+    def _known_under(self, directory, direct_only=False):
+        """
+        获取索引中某个目录下的文件记录。
+        :param direct_only: 只返回该目录的直接子文件
+        :return: {路径: (大小, 修改时间)}
+        """
+        prefix = os.path.join(directory, "")
+        # 以 prefix 开头的字符串都落在 [prefix, upper) 区间内，可以使用主键索引
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT path, size, mtime FROM media WHERE path >= ? AND path < ?", (prefix, upper)
+            ).fetchall()
+        return {
+            path: (size, mtime) for path, size, mtime in rows
+            if not direct_only or os.path.dirname(path) == directory
+        }
+
+    def refresh_directory(self, directory, root, extensions=None, files=None):
+        """
+        只重新扫描单个目录的直接子文件并增量更新索引。
+        :param files: 调用方已扫描到的媒体文件列表 [(路径, 大小, 修改时间)]，提供时不再重新扫描
+        :return: (新增或变化的路径列表, 删除的路径列表)
+        """
+        if files is None:
+            files, _ = scan_directory(directory, extensions or get_library_extensions())
+        known = self._known_under(directory, direct_only=True)
+
+        changed = []
+        for path, size, mtime in files:
+            if known.pop(path, None) != (size, mtime):
+                changed.append((path, root, size, mtime))
+        removed = list(known)
+        if changed or removed:
+            self._write_changes(changed, removed)
+        return [row[0] for row in changed], removed
+
+    def remove_tree(self, directory):
+        """
+        删除某个目录（含子目录）下的全部索引记录。
+        :return: 删除的路径列表
+        """
+        removed = list(self._known_under(directory))
+        if removed:
+            self._write_changes([], removed)
+        return removed
+
+    def update_metadata(self, path, size, mtime, duration=None, codec=None, has_video=None, has_audio=None):
+        """
+        写入文件的元数据。只更新大小和修改时间与探测时一致的记录，
+        探测期间文件发生变化时记录已被扫描重置，旧结果不会写入，文件之后会重新探测。
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE media SET duration = ?, codec = ?, has_video = ?, has_audio = ? "
+                "WHERE path = ? AND size = ? AND mtime = ?",
+                (duration, codec, has_video, has_audio, path, size, mtime)
+            )
+
+    def pending_metadata(self, limit=1000):
+        """
+        获取尚未提取元数据的文件。
+        :return: [(路径, 大小, 修改时间)]
+        """
+        with self.lock:
+            return self.connection.execute(
+                "SELECT path, size, mtime FROM media WHERE duration IS NULL LIMIT ?", (limit,)
+            ).fetchall()
+
+    def search(self, keyword="", limit=200):
+        """
+        按路径关键字搜索媒体文件。
+        :return: [(路径, 大小, 修改时间, 时长)]
+        """
+        with self.lock:
+            return list(self.connection.execute(
+                "SELECT path, size, mtime, duration FROM media WHERE path LIKE ? ORDER BY path LIMIT ?",
+                (f"%{keyword}%", limit)
+            ))
+
+    def count(self):
+        """
+        索引中的文件总数。
+        """
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM media").fetchone()[0]
@@ -0,0 +1,493 @@
+import os
+import json
+import math
+import logging
+import threading
+from collections import OrderedDict, deque
+from PySide6.QtCore import QObject, QThread, QTimer, QUrl, QMetaObject, Qt, Signal, Slot
+
+from core.file import get_cache_dir
+from core.probe import media_key
+from core.waveform import WaveformBuilder, WaveformCache, buffer_samples, np
+
+# 归一化的目标响度（LUFS），与 ReplayGain 2.0 的参考响度一致
+TARGET_LUFS = -18.0
+
+# 最小增益，避免异常分析结果把音量压得过低
+MIN_GAIN = 0.05
+
+# 门限：绝对门限 -70 LUFS，相对门限低于未门限响度 10 LU
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+
+# ITU-R BS.1770 K 加权滤波器在 48 kHz 下的系数：高频搁架 + 高通
+K_WEIGHTING = (
+    ((1.53512485958697, -2.69169618940638, 1.19839281085285), (1.0, -1.69065929318241, 0.73248077421585)),
+    ((1.0, -2.0, 1.0), (1.0, -1.99004745483398, 0.99007225036621)),
+)
+
+
+def loudness_of(energy):
+    """
+    均方能量转换为响度（LUFS）。
+    """
+    return -0.691 + 10 * math.log10(energy)
+
+
+def track_gain(loudness, peak, target=TARGET_LUFS):
+    """
+    计算把文件响度调整到目标值的线性增益，并限制在不削波的范围内。
+    :param loudness: 整体响度（LUFS），None 时不调整
+    :param peak: 采样峰值（0~1）
+    """
+    if loudness is None:
+        return 1.0
+    gain = 10 ** ((target - loudness) / 20)
+    if peak > 0:
+        gain = min(gain, 1 / peak)
+    return max(MIN_GAIN, gain)
+
+
+def k_weighting_response(frequencies):
+    """
+    K 加权滤波器在各频率上的功率响应 |H(f)|²。
+    """
+    z = np.exp(-2j * np.pi * np.asarray(frequencies) / 48000)
+    response = np.ones(len(z))
+    for b, a in K_WEIGHTING:
+        numerator = b[0] + b[1] * z + b[2] * z * z
+        denominator = a[0] + a[1] * z + a[2] * z * z
+        response *= np.abs(numerator / denominator) ** 2
+    return response
+
+
+class LoudnessBuilder:
+    """
+    按 ITU-R BS.1770 计算整体响度和采样峰值。
+    采样按 100 毫秒分段，每批分段一起做 FFT，在频域乘以 K 加权响应后由帕塞瓦尔定理得到滤波后的能量，
+    避免逐个采样运行 IIR 滤波器；400 毫秒测量块由相邻 4 个分段组成（75% 重叠）。
+    没有 NumPy 时不做 K 加权，使用抽取后的采样估算。
+    """
+
+    SEGMENT_MS = 100
+    SEGMENTS_PER_BLOCK = 4
+    BATCH_SECONDS = 5.0  # 每批处理的音频时长
+
+    def __init__(self):
+        self.pending = []
+        self.pending_frames = 0
+        self.sample_rate = 0
+        self.channels = 0
+        self.weights = None
+        self.energies = []  # 每个分段各声道能量之和
+        self.peak = 0.0
+
+    def add_samples(self, samples, channels, sample_rate):
+        """
+        添加一块由 buffer_samples 转换好的采样。
+        """
+        if (sample_rate, channels) != (self.sample_rate, self.channels):
+            self.process(final=True)
+            self.sample_rate, self.channels = sample_rate, channels
+            self.weights = None
+        self.pending.append(samples)
+        self.pending_frames += len(samples) if np is not None else len(samples) // channels
+        if self.pending_frames >= self.BATCH_SECONDS * sample_rate:
+            self.process()
+
+    def _segment_weights(self, size):
+        """
+        rfft 结果的功率加权：K 加权响应乘以帕塞瓦尔系数，除以分段长度得到均方值。
+        """
+        weights = k_weighting_response(np.fft.rfftfreq(size, 1 / self.sample_rate))
+        weights[1:(size + 1) // 2] *= 2
+        return weights / (size * size)
+
+    def process(self, final=False):
+        """
+        处理已攒下的数据，不足一个分段的尾部留到下一批，final 时丢弃。
+        """
+        if not self.pending or self.sample_rate <= 0:
+            self.pending, self.pending_frames = [], 0
+            return
+        size = self.sample_rate * self.SEGMENT_MS // 1000
+
+        if np is not None:
+            samples = np.concatenate(self.pending) if len(self.pending) > 1 else self.pending[0]
+            if len(samples):
+                self.peak = max(self.peak, float(np.abs(samples).max()))
+            whole = len(samples) // size * size
+            if whole:
+                if self.weights is None:
+                    self.weights = self._segment_weights(size)
+                # (分段, 采样, 声道) 沿采样轴做 FFT
+                spectrum = np.fft.rfft(samples[:whole].reshape(-1, size, self.channels), axis=1)
+                power = spectrum.real ** 2 + spectrum.imag ** 2
+                self.energies.extend(np.einsum("sfc,f->s", power, self.weights).tolist())
+            rest = samples[whole:]
+            self.pending = [rest] if len(rest) and not final else []
+            self.pending_frames = len(rest) if self.pending else 0
+            return
+
+        # 没有 NumPy 时按抽取后的交错采样估算能量，各声道能量之和约为平均值乘以声道数
+        from core.waveform import FALLBACK_STRIDE
+
+        values = [value for chunk in self.pending for value in chunk]
+        if values:
+            self.peak = max(self.peak, max(abs(value) for value in values))
+        step = max(1, size * self.channels // FALLBACK_STRIDE)
+        whole = len(values) // step * step
+        for start in range(0, whole, step):
+            chunk = values[start:start + step]
+            self.energies.append(sum(value * value for value in chunk) / len(chunk) * self.channels)
+        rest = values[whole:]
+        self.pending = [rest] if rest and not final else []
+        self.pending_frames = len(rest) * FALLBACK_STRIDE // self.channels if self.pending else 0
+
+    def block_energies(self):
+        """
+        400 毫秒测量块的能量，步长 100 毫秒。
+        """
+        count = self.SEGMENTS_PER_BLOCK
+        segments = self.energies
+        if len(segments) < count:
+            # 不足一个测量块的短文件按整体计算
+            return [sum(segments) / len(segments)] if segments else []
+        if np is not None:
+            window = np.convolve(np.asarray(segments), np.ones(count) / count, mode="valid")
+            return window.tolist()
+        return [sum(segments[i:i + count]) / count for i in range(len(segments) - count + 1)]
+
+    def result(self):
+        """
+        :return: (整体响度 LUFS, 采样峰值)，静音或没有解码到数据时响度为 None
+        """
+        self.process(final=True)
+        blocks = [energy for energy in self.block_energies() if energy > 0]
+        gated = [energy for energy in blocks if loudness_of(energy) > ABSOLUTE_GATE]
+        if not gated:
+            return None, self.peak
+        threshold = loudness_of(sum(gated) / len(gated)) + RELATIVE_GATE
+        gated = [energy for energy in gated if loudness_of(energy) > threshold]
+        return round(loudness_of(sum(gated) / len(gated)), 2), round(self.peak, 4)
+
+
+class LoudnessStore:
+    """
+    响度分析结果的持久化存储，按文件记录键保存 [响度, 峰值]。
+    读盘、写入和写盘都在分析线程进行；界面线程通过 peek 只查询已加载到内存的记录，
+    不会等待磁盘读取，内存记录通过锁保护。
+    """
+
+    DEFAULT_CAPACITY = 20000  # 最多保留的记录数
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY):
+        self.path = path or os.path.join(get_cache_dir(), "loudness.json")
+        self.capacity = capacity
+        self.entries = OrderedDict()  # 键 -> [响度, 峰值]，按最近写入排序
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.dirty = False
+
+    def load(self):
+        """
+        读取磁盘上的记录，只在分析线程中调用；读取时不持有锁，界面线程的查询不会被阻塞。
+        """
+        if self.loaded:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        with self.lock:
+            for key, value in data.items():
+                if isinstance(value, list) and len(value) == 2:
+                    self.entries.setdefault(key, value)
+            self.loaded = True
+
+    def lookup(self, key):
+        """
+        查询记录，尚未读盘时先读盘，只在分析线程中调用。
+        :return: (响度, 峰值)，没有记录时返回 None
+        """
+        self.load()
+        return self.peek(key)
+
+    def peek(self, key):
+        """
+        只查询已加载到内存的记录，供界面线程使用。
+        :return: (响度, 峰值)，没有记录或尚未读盘时返回 None
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+        return tuple(entry) if entry is not None else None
+
+    def put(self, key, loudness, peak):
+        self.load()
+        with self.lock:
+            self.entries[key] = [loudness, peak]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+            self.dirty = True
+
+    def flush(self):
+        """
+        将记录写入磁盘。
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            data = json.dumps(self.entries, separators=(",", ":"))
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"保存响度分析结果失败: {e}")
+
+
+class LoudnessWorker(QObject):
+    """
+    响度和波形分析器，运行在独立线程中，用 QAudioDecoder 按原始格式解码整个文件，
+    每个解码缓冲只转换一次，同时交给响度和波形计算。
+    文件记录键和缓存读取也在该线程中进行，已有的结果不再计算，全部已有时不解码。
+    """
+
+    # 文件路径, 记录键, (响度, 峰值) 或 None, Waveform 或 None
+    finished = Signal(str, object, object, object)
+
+    def __init__(self, store, waveform_cache=None):
+        super().__init__()
+        self.store = store
+        self.waveform_cache = waveform_cache  # 首次需要波形时在工作线程中创建
+        self.decoder = None
+        self.reset_job()
+
+    def reset_job(self):
+        self.path = None
+        self.key = None
+        self.loudness = None
+        self.waveform = None
+        self.loudness_builder = None
+        self.waveform_builder = None
+
+    def _ensure_decoder(self):
+        """
+        在工作线程中创建解码器，保证其属于该线程的事件循环。
+        """
+        if self.decoder is not None:
+            return
+        from PySide6.QtMultimedia import QAudioDecoder
+
+        self.decoder = QAudioDecoder(self)
+        self.decoder.bufferReady.connect(self.on_buffer_ready)
+        self.decoder.finished.connect(self.on_finished)
+        self.decoder.error.connect(self.on_error)
+
+    @Slot(str, str, bool)
+    def analyze(self, path, key, waveform):
+        """
+        :param key: 文件记录键，为空时在此计算
+        :param waveform: 是否同时获取波形
+        """
+        key = key or media_key(path)
+        if key is None:
+            self.finished.emit(path, None, None, None)
+            return
+        loudness = self.store.lookup(key)
+        cached_waveform = None
+        if waveform:
+            if self.waveform_cache is None:
+                self.waveform_cache = WaveformCache()
+            cached_waveform = self.waveform_cache.get(key)
+        if loudness is not None and (not waveform or cached_waveform is not None):
+            self.finished.emit(path, key, loudness, cached_waveform)
+            return
+        self._ensure_decoder()
+        self.path = path
+        self.key = key
+        self.loudness = loudness
+        self.waveform = cached_waveform
+        self.loudness_builder = LoudnessBuilder() if loudness is None else None
+        self.waveform_builder = WaveformBuilder() if waveform and cached_waveform is None else None
+        self.decoder.setSource(QUrl.fromLocalFile(path))
+        self.decoder.start()
+
+    def on_buffer_ready(self):
+        while self.path is not None and self.decoder.bufferAvailable():
+            converted = buffer_samples(self.decoder.read())
+            if converted is None:
+                continue
+            if self.loudness_builder is not None:
+                self.loudness_builder.add_samples(*converted)
+            if self.waveform_builder is not None:
+                self.waveform_builder.add_samples(*converted)
+
+    def on_finished(self):
+        if self.path is None:
+            return
+        self.on_buffer_ready()
+        if self.loudness_builder is not None:
+            self.loudness = self.loudness_builder.result()
+            self.store.put(self.key, *self.loudness)
+        if self.waveform_builder is not None:
+            self.waveform = self.waveform_builder.result()
+            if self.waveform is not None:
+                self.waveform_cache.put(self.key, self.waveform)
+        self.finish()
+
+    def on_error(self, error):
+        if self.path is None:
+            return
+        logging.info(f"解码分析失败: {self.path}: {self.decoder.errorString()}")
+        self.decoder.stop()
+        self.finish()
+
+    def finish(self):
+        path, key, loudness, waveform = self.path, self.key, self.loudness, self.waveform
+        self.reset_job()
+        self.finished.emit(path, key, loudness, waveform)
+
+    @Slot()
+    def load(self):
+        self.store.load()
+
+    @Slot()
+    def flush(self):
+        self.store.flush()
+
+    @Slot()
+    def release(self):
+        """
+        停止解码并保存结果。
+        """
+        if self.decoder is not None:
+            self.decoder.stop()
+        self.path = None
+        self.store.flush()
+
+
+class LoudnessAnalyzer(QObject):
+    """
+    后台响度和波形分析队列，在界面线程中使用。
+    文件依次交给分析线程，当前曲目的请求插到队首，播放列表中即将播放的条目提前排队，
+    曲目开始播放时通常已有结果，播放从不等待分析。
+    同一文件的响度和波形请求合并为一次解码。
+    """
+
+    # 文件路径, 记录键, (响度, 峰值)
+    analyzed = Signal(str, object, object)
+    # 文件路径, Waveform
+    waveformReady = Signal(str, object)
+    _analyze = Signal(str, str, bool)
+    _load = Signal()
+    _flush = Signal()
+
+    MAX_QUEUE = 50  # 排队上限，队列已满时忽略新的预分析请求
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        self.store = store or LoudnessStore()
+        self.queue = deque()
+        self.options = {}  # 排队中的文件 -> (记录键, 是否需要波形)
+        self.active = None  # 正在分析的文件
+        self.active_waveform = False
+        self.scheduled = False
+        self.thread = None
+        self.worker = None
+
+    def _ensure_worker(self):
+        if self.worker is not None:
+            return
+        self.thread = QThread(self)
+        self.thread.setObjectName("loudness-worker")
+        self.worker = LoudnessWorker(self.store)
+        self.worker.moveToThread(self.thread)
+        self._analyze.connect(self.worker.analyze)
+        self._load.connect(self.worker.load)
+        self._flush.connect(self.worker.flush)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.thread.start(QThread.Priority.LowestPriority)
+        # 结果记录在分析线程中读盘
+        self._load.emit()
+
+    def lookup(self, key):
+        """
+        查询已加载的分析结果，不读磁盘；记录尚未读入时返回 None，
+        之后的分析请求会在分析线程中读到已有结果并通过 analyzed 信号返回。
+        :return: (响度, 峰值)，尚未分析时返回 None
+        """
+        self._ensure_worker()
+        return self.store.peek(key) if key is not None else None
+
+    def request(self, path, priority=False, key=None, waveform=False):
+        """
+        请求分析文件，已在队列中的请求不会重复加入，只合并选项。
+        :param priority: 是否插到队首（当前正在播放的文件）
+        :param key: 已计算好的文件记录键，未提供时在分析线程中计算
+        :param waveform: 是否同时生成波形，结果由 waveformReady 信号返回
+        """
+        if path == self.active and (self.active_waveform or not waveform):
+            return
+        queued = self.options.get(path)
+        if queued is not None:
+            self.options[path] = (key or queued[0], waveform or queued[1])
+            if not priority:
+                return
+            self.queue.remove(path)
+        elif not priority and len(self.queue) >= self.MAX_QUEUE:
+            return
+        else:
+            self.options[path] = (key, waveform)
+        if priority:
+            self.queue.appendleft(path)
+        else:
+            self.queue.append(path)
+        self._schedule()
+
+    def _schedule(self):
+        """
+        延迟到本轮事件处理完再分派，开始播放时先后发出的响度和波形请求合并为一次解码。
+        """
+        if not self.scheduled:
+            self.scheduled = True
+            QTimer.singleShot(0, self._dispatch)
+
+    def _dispatch(self):
+        self.scheduled = False
+        if self.active is not None or not self.queue:
+            return
+        self._ensure_worker()
+        self.active = self.queue.popleft()
+        key, self.active_waveform = self.options.pop(self.active)
+        self._analyze.emit(self.active, key or "", self.active_waveform)
+
+    def on_worker_finished(self, path, key, loudness, waveform):
+        self.active = None
+        self.active_waveform = False
+        if loudness is not None:
+            self.analyzed.emit(path, key, loudness)
+        if waveform is not None:
+            self.waveformReady.emit(path, waveform)
+        if self.queue:
+            self._dispatch()
+        else:
+            # 队列空闲时写盘
+            self._flush.emit()
+
+    def shutdown(self):
+        """
+        停止后台线程并保存结果。
+        """
+        self.queue.clear()
+        self.options.clear()
+        if self.thread is not None:
+            QMetaObject.invokeMethod(self.worker, "release", Qt.ConnectionType.BlockingQueuedConnection)
+            self.thread.quit()
+            self.thread.wait()
+            self.thread = None
@@ -0,0 +1,50 @@
+import os
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+
+class SourceOpener(QObject):
+    """
+    在后台线程中检查本地文件，避免网络挂载等慢速存储卡住界面线程。
+    每次打开分配一个递增的请求序号，新的打开请求会使之前未完成的请求失效，
+    失效请求的结果到达后直接丢弃。
+    """
+
+    # 请求序号，路径，打开方式，文件是否存在，文件记录键
+    resolved = Signal(int, str, str, bool, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+
+    def open(self, path, mode, key_func=None):
+        """
+        发起一次打开请求。
+        :param mode: 由调用方解释的打开方式，原样随结果返回
+        :param key_func: 在后台线程中计算文件记录键（续播位置、响度、波形等缓存）的函数，可选
+        :return: 请求序号
+        """
+        self.generation += 1
+        generation = self.generation
+        # 每个请求使用独立线程，卡在慢速存储上的旧请求不会阻塞新请求
+        threading.Thread(
+            target=self._check, args=(generation, path, mode, key_func),
+            name="source-open", daemon=True
+        ).start()
+        return generation
+
+    def _check(self, generation, path, mode, key_func):
+        exists = os.path.exists(path)
+        key = key_func(path) if exists and key_func is not None else None
+        if generation == self.generation:
+            self.resolved.emit(generation, path, mode, exists, key)
+
+    def cancel(self):
+        """
+        使所有未完成的请求失效。
+        """
+        self.generation += 1
+
+    def is_current(self, generation):
+        return generation == self.generation
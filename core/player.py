@@ -1,11 +1,15 @@
 from PySide6.QtCore import QUrl
 from PySide6.QtWidgets import QWidget, QMessageBox
-from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 import os
 import logging
 
 # 导入 FileHandler 类
 from core.file import FileHandler
+from core.hls import is_hls_url
+from core.opener import SourceOpener
+from core.playlist import PlaylistEngine, is_playlist, load_playlist
+from core.probe import media_key
+from core.profiler import profiler
 
 # 设置日志基础配置
 logging.basicConfig(
@@ -21,94 +25,657 @@ class Player(QWidget):
     支持边下载边播放功能。
     """
 
-    def __init__(self, progress_bar=None, file_info_label=None):
+    USE_STREAM_CACHE = True  # 流媒体是否经过本地缓存代理
+    RESUME_PLAYBACK = True  # 是否记录并恢复上次的播放位置
+    NORMALIZE_LOUDNESS = True  # 是否按响度分析结果自动调整每个文件的增益
+    LATE_GAIN_WINDOW_MS = 3000  # 分析结果在播放开始后多久内到达仍然应用
+    NORMALIZED_LEVEL = 0.5  # 已分析文件的参考输出音量（约 -6 dB），留出余量使较安静的文件在最大音量下也能提升
+
+    def __init__(self, progress_bar=None, file_info_label=None, lazy_init=False):
         super().__init__()
-        self.init_player()
+        # 播放器和音频输出只创建一份，lazy_init 时推迟到首次使用
+        self._media_player = None
+        self._audio_output = None
+
+        # 播放器状态
+        self.is_playing = False
+        self.current_file = None
+
         # 初始化 FileHandler 实例
         self.file_handler = FileHandler()
+        # 播放列表引擎
+        self.playlist_engine = PlaylistEngine(self)
+        # 流媒体本地缓存代理，首次播放流媒体时启动
+        self.stream_proxy = None
+        # 边下载边播放的下载任务
+        self.download_task = None
+        # 播放指标采集，启用后由 set_telemetry() 设置
+        self.telemetry = None
+        # 续播位置存储，首次打开文件时创建
+        self.resume_store = None
+        self.resume_key = None
+        self.pending_resume = None
+        # 响度分析队列，首次播放本地文件时创建
+        self.loudness_analyzer = None
+        self.volume = 1.0  # 用户设置的音量（0~1）
+        self.track_gain = 1.0  # 当前文件的响度归一化增益
+        # 媒体库及其目录监听，添加目录时创建
+        self.library = None
+        self.library_watcher = None
+        self.probe_pool = None  # 媒体库元数据探测池
+        # 本地文件的检查在后台线程中进行，新的打开请求会取消旧请求
+        self.opener = SourceOpener(self)
+        self.opener.resolved.connect(self.on_source_resolved)
         # 新增：保存进度条和文件信息标签
         self.progress_bar = progress_bar
         self.file_info_label = file_info_label
 
-        if self.progress_bar:
-            self.media_player.positionChanged.connect(self.update_progress)
-            self.media_player.durationChanged.connect(self.set_progress_range)
+        if not lazy_init:
+            self.init_player()
+
+    @property
+    def media_player(self):
+        """
+        获取媒体播放器，首次访问时初始化多媒体后端。
+        """
+        if self._media_player is None:
+            self.init_player()
+        return self._media_player
+
+    @property
+    def audio_output(self):
+        """
+        获取音频输出，首次访问时初始化多媒体后端。
+        """
+        if self._audio_output is None:
+            self.init_player()
+        return self._audio_output
+
+    def is_player_ready(self):
+        """
+        多媒体后端是否已初始化。
+        """
+        return self._media_player is not None
 
     def init_player(self):
         """
-        初始化播放器逻辑和状态。
+        初始化播放器逻辑和状态，重复调用时不会重新创建。
         """
-        self.media_player = QMediaPlayer()
-        self.audio_output = QAudioOutput()
-        self.media_player.setAudioOutput(self.audio_output)
+        if self._media_player is not None:
+            return
 
-        # 播放器状态
-        self.is_playing = False
-        self.current_file = None
+        # 延迟导入多媒体模块，避免拖慢启动
+        from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+        self._audio_output = QAudioOutput()
+        self.apply_volume()
+        self.on_player_created()
+        self.attach_media_player(QMediaPlayer())
+        profiler.mark("multimedia_ready")
+
+    def on_player_created(self):
+        """
+        多媒体后端初始化时的扩展点，子类可在此创建视频输出等一次性资源。
+        """
+        pass
+
+    def attach_media_player(self, media_player):
+        """
+        将媒体播放器设为当前播放器，绑定音频输出和信号。
+        """
+        self._media_player = media_player
+        media_player.setAudioOutput(self._audio_output)
 
         # 信号绑定
-        self.media_player.mediaStatusChanged.connect(self.handle_media_status)
-        self.media_player.playbackStateChanged.connect(self.update_play_state)
+        media_player.mediaStatusChanged.connect(self.handle_media_status)
+        media_player.playbackStateChanged.connect(self.update_play_state)
+        media_player.positionChanged.connect(self.remember_position)
+        if self.progress_bar:
+            media_player.positionChanged.connect(self.update_progress)
+            media_player.durationChanged.connect(self.set_progress_range)
+
+        self.on_player_attached(media_player)
+        if self.telemetry is not None:
+            self.telemetry.attach(media_player)
+
+    def detach_media_player(self, media_player):
+        """
+        解除媒体播放器的输出和信号绑定。
+        """
+        if self.telemetry is not None:
+            self.telemetry.detach(media_player)
+        self.on_player_detached(media_player)
+
+        media_player.mediaStatusChanged.disconnect(self.handle_media_status)
+        media_player.playbackStateChanged.disconnect(self.update_play_state)
+        media_player.positionChanged.disconnect(self.remember_position)
+        if self.progress_bar:
+            media_player.positionChanged.disconnect(self.update_progress)
+            media_player.durationChanged.disconnect(self.set_progress_range)
+        media_player.setAudioOutput(None)
+
+    def on_player_attached(self, media_player):
+        """
+        播放器绑定后的扩展点，子类可在此绑定视频输出和界面信号。
+        """
+        pass
+
+    def on_player_detached(self, media_player):
+        """
+        播放器解绑前的扩展点，子类在此解除视频输出和界面信号。
+        """
+        pass
+
+    def set_telemetry(self, telemetry):
+        """
+        启用播放指标采集，已有播放器时立即开始监听。
+        """
+        self.telemetry = telemetry
+        if self._media_player is not None:
+            telemetry.attach(self._media_player)
+
+    def seek(self, position):
+        """
+        跳转到指定位置（毫秒）。
+        """
+        if self.telemetry is not None:
+            self.telemetry.note_seek(position)
+        self.media_player.setPosition(position)
+
+    def swap_media_player(self, media_player, source):
+        """
+        切换到已预加载完成的媒体播放器并立即播放。
+        :param media_player: 已加载好媒体的播放器
+        :param source: 该播放器加载的文件路径或 URL
+        :return: 被替换下来的原播放器
+        """
+        self.opener.cancel()
+        previous = self._media_player
+        previous.pause()
+        self.detach_media_player(previous)
+        self.prepare_resume(source)
+        self.apply_track_gain(source, self.resume_key)
+        self.attach_media_player(media_player)
+        # 预加载的媒体已就绪，直接跳转到续播位置
+        self.apply_resume()
+        media_player.play()
+
+        self.current_file = source
+        self.is_playing = True
+        self.update_file_info(source, self.resume_key)
+        return previous
 
     def handle_media_status(self, status):
         """
         处理媒体状态事件。
         """
-        if status == QMediaPlayer.MediaStatus.InvalidMedia:
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        if status in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia):
+            self.apply_resume()
+            self.playlist_engine.on_media_loaded()
+            self.on_media_loaded()
+        elif status == QMediaPlayer.MediaStatus.InvalidMedia:
+            self.pending_resume = None
+            if self.playlist_engine.active:
+                self.playlist_engine.on_invalid_media()
+                return
             QMessageBox.critical(self, "错误", "加载媒体失败.")
             logging.error(f"无效的媒体资源: {self.current_file}")
+        elif status == QMediaPlayer.MediaStatus.EndOfMedia:
+            self.playlist_engine.on_end_of_media()
+
+    def on_media_loaded(self):
+        """
+        当前媒体加载完成后的扩展点，子类可在此按媒体信息（如是否有视频）请求附加数据。
+        """
 
     def update_play_state(self, state):
         """
         更新播放状态。
         """
+        from PySide6.QtMultimedia import QMediaPlayer
+
         if state == QMediaPlayer.PlaybackState.StoppedState:
             self.is_playing = False
         elif state == QMediaPlayer.PlaybackState.PlayingState:
             self.is_playing = True
 
     def play_file(self, file_path):
+        """
+        播放文件、流媒体 URL 或播放列表。
+        本地路径先在后台线程中检查，结果由 on_source_resolved() 处理。
+        """
+        if file_path.startswith(('http://', 'https://')):
+            self.opener.cancel()
+            self.playlist_engine.deactivate()
+            self._play_streaming_url(file_path)
+            return
+        self.open_local(file_path, "play_file")
+
+    def open_sources(self, files, enqueue=False):
+        """
+        打开一组文件：单个文件直接播放，多个文件加入播放队列并播放第一个；
+        enqueue 为 True 时只加入队列，当前没有在播放队列时才开始播放。
+        """
+        if not files:
+            return
+        if len(files) == 1 and not enqueue:
+            self.play_file(files[0])
+            return
+        entries = []
+        for item in files:
+            if not item.startswith(('http://', 'https://')) and is_playlist(item):
+                entries.extend(load_playlist(item))
+            else:
+                entries.append(item)
+        self.playlist_engine.enqueue(entries, play_now=not enqueue)
+
+    def open_source(self, file_path):
+        """
+        加载并播放单个文件或流媒体 URL，不改变播放列表状态。
+        """
         if file_path.startswith(('http://', 'https://')):
+            self.opener.cancel()
             self._play_streaming_url(file_path)
-        elif not os.path.exists(file_path):
+        else:
+            self.open_local(file_path, "source")
+
+    def open_local(self, file_path, mode):
+        """
+        发起本地文件的后台检查，同时计算续播位置、响度以及波形等缓存使用的文件记录键。
+        """
+        self.on_open_started(file_path)
+        self.opener.open(file_path, mode, media_key)
+
+    def on_open_started(self, source):
+        """
+        开始打开文件时的扩展点，子类可在此更新界面状态。
+        """
+        pass
+
+    def on_source_resolved(self, generation, file_path, mode, exists, key):
+        """
+        本地文件检查完成；已被新请求取代时忽略。
+        """
+        if not self.opener.is_current(generation):
+            return
+        if not exists:
+            self.on_open_failed(file_path)
             QMessageBox.warning(self, "错误", f"未找到文件: {file_path}")
             return
+        if mode == "play_file":
+            if is_playlist(file_path):
+                # 播放列表在后台读取，读到第一批条目后开始播放
+                self.playlist_engine.load(file_path)
+                return
+            self.playlist_engine.deactivate()
+        self._play_local_file(file_path, key)
+
+    def on_open_failed(self, source):
+        """
+        文件打开失败时的扩展点。
+        """
+        pass
+
+    def on_playlist_failed(self, file_path):
+        """
+        播放列表为空或无法解析。
+        """
+        self.on_open_failed(file_path)
+        QMessageBox.warning(self, "错误", f"播放列表为空或无法解析: {file_path}")
+
+    def get_resume_store(self):
+        """
+        获取续播位置存储，首次使用时创建。
+        """
+        if self.resume_store is None:
+            from core.resume import ResumeStore
+
+            self.resume_store = ResumeStore(parent=self)
+        return self.resume_store
+
+    def prepare_resume(self, source, key=None):
+        """
+        打开文件前查找续播位置，媒体加载完成后再跳转。
+        :param key: 已在后台计算好的记录键，未提供时在此计算
+        """
+        self.resume_key = None
+        self.pending_resume = None
+        if not self.RESUME_PLAYBACK:
+            return
+        store = self.get_resume_store()
+        self.resume_key = key if key is not None else store.key(source)
+        if self.resume_key is not None:
+            self.pending_resume = store.lookup(self.resume_key)
+
+    def apply_resume(self):
+        """
+        跳转到续播位置，只执行一次。
+        """
+        position = self.pending_resume
+        self.pending_resume = None
+        if position is not None and self.media_player.isSeekable():
+            self.seek(position)
+
+    def remember_position(self, position):
+        """
+        记录当前播放位置，由续播存储批量写盘。
+        """
+        # 等待续播跳转期间的位置（通常是 0）不记录，避免覆盖已有记录
+        if self.resume_key is None or self.pending_resume is not None:
+            return
+        self.resume_store.record(self.resume_key, position, self.media_player.duration())
+
+    def get_loudness_analyzer(self):
+        """
+        获取响度分析队列，首次使用时创建。
+        """
+        if self.loudness_analyzer is None:
+            from core.loudness import LoudnessAnalyzer
+
+            self.loudness_analyzer = LoudnessAnalyzer(parent=self)
+            self.loudness_analyzer.analyzed.connect(self.on_loudness_analyzed)
+            self.loudness_analyzer.waveformReady.connect(self.on_waveform_ready)
+        return self.loudness_analyzer
+
+    def apply_track_gain(self, source, key=None):
+        """
+        文件开始播放时按已有的响度分析结果设置增益，尚未分析时不调整并优先分析该文件。
+        :param key: 已计算好的文件记录键，未提供时在此计算
+        """
+        self.track_gain = 1.0
+        if self.NORMALIZE_LOUDNESS and not source.startswith(('http://', 'https://')):
+            analyzer = self.get_loudness_analyzer()
+            result = analyzer.lookup(key if key is not None else media_key(source))
+            if result is not None:
+                self.track_gain = self.normalized_gain(result)
+            else:
+                analyzer.request(source, priority=True, key=key)
+        self.apply_volume()
+
+    def on_loudness_analyzed(self, path, key, result):
+        """
+        当前文件的分析结果在刚开始播放时到达，仍然应用增益，之后到达的结果留到下次播放使用。
+        """
+        if path != self.current_file or self._media_player is None:
+            return
+        if self.media_player.position() <= self.LATE_GAIN_WINDOW_MS:
+            self.track_gain = self.normalized_gain(result)
+            self.apply_volume()
+
+    def normalized_gain(self, result):
+        """
+        按分析结果计算输出增益：归一化增益乘以参考音量 NORMALIZED_LEVEL，
+        使增益不超过 1 / NORMALIZED_LEVEL 的文件在用户音量最大时仍能完整提升。
+        流媒体和尚未分析的文件增益为 1，保持用户音量。
+        :param result: (响度, 峰值)
+        """
+        from core.loudness import track_gain
+
+        return track_gain(*result) * self.NORMALIZED_LEVEL
+
+    def on_waveform_ready(self, path, waveform):
+        """
+        波形生成完成后的扩展点，子类可在此显示波形。
+        """
+
+    def analyze_upcoming(self, sources):
+        """
+        提前分析即将播放的本地文件，播放时直接使用结果。
+        """
+        if not self.NORMALIZE_LOUDNESS:
+            return
+        for source in sources:
+            if not source.startswith(('http://', 'https://')):
+                self.get_loudness_analyzer().request(source)
+
+    def apply_volume(self):
+        """
+        输出音量为用户音量乘以当前文件的归一化增益，不超过最大音量。
+        """
+        if self._audio_output is not None:
+            self._audio_output.setVolume(min(1.0, self.volume * self.track_gain))
+
+    def get_library(self):
+        """
+        获取媒体库，首次使用时创建。
+        """
+        if self.library is None:
+            from core.library import MediaLibrary
+
+            self.library = MediaLibrary()
+        return self.library
+
+    def get_library_watcher(self):
+        """
+        获取媒体库目录监听器，首次使用时创建。
+        """
+        if self.library_watcher is None:
+            from core.watcher import LibraryWatcher
+
+            self.library_watcher = LibraryWatcher(self.get_library(), parent=self)
+            self.library_watcher.indexed.connect(self.on_library_scanned)
+            self.library_watcher.libraryChanged.connect(self.on_library_changed)
+        return self.library_watcher
+
+    def get_probe_pool(self):
+        """
+        获取元数据探测池，首次使用时创建。
+        """
+        if self.probe_pool is None:
+            from core.probe import ProbePool
+
+            self.probe_pool = ProbePool(parent=self)
+        return self.probe_pool
+
+    def open_library(self, roots=()):
+        """
+        添加媒体库目录，在后台增量扫描全部已配置目录后监听其中的变化，
+        扫描完成后在界面线程调用 on_library_scanned()。
+        """
+        self.get_library_watcher().watch_library(roots)
+
+    def on_library_scanned(self, result, count):
+        """
+        媒体库扫描完成，为新增和变化的文件提取元数据；子类可在此更新界面状态。
+        """
+        logging.info(f"媒体库共 {count} 个文件")
+        self.get_probe_pool().fill_library(self.library)
+
+    def on_library_changed(self, changed, removed):
+        """
+        监听到媒体库文件变化，为新增和变化的文件提取元数据。
+        """
+        logging.info(f"媒体库更新: 新增或变化 {len(changed)}，删除 {len(removed)}")
+        if changed:
+            self.get_probe_pool().fill_library(self.library)
+
+    def stream_source(self, url):
+        """
+        获取流媒体实际交给播放器的地址，启用缓存时指向本地缓存代理，
+        HLS 播放列表由代理预取片段并按实测带宽选择码率。
+        """
+        if not self.USE_STREAM_CACHE:
+            return QUrl(url)
+        proxy = self.get_stream_proxy()
+        source = QUrl(proxy.hls_url(url) if is_hls_url(url) else proxy.proxy_url(url))
+        self.name_telemetry_source(source, url)
+        return source
+
+    def name_telemetry_source(self, source, original):
+        """
+        播放指标中记录原始地址而不是本地代理地址。
+        """
+        if self.telemetry is not None:
+            self.telemetry.name_source(source.toString(), original)
+
+    def get_stream_proxy(self):
+        """
+        获取本地缓存代理，首次使用时创建。
+        """
+        if self.stream_proxy is None:
+            from core.cache_proxy import CachingProxy
+
+            self.stream_proxy = CachingProxy()
+        return self.stream_proxy
+
+    def download_and_play(self, url, path):
+        """
+        边下载边播放：多连接下载到本地文件，文件头尾到达后即从部分文件开始播放，
+        播放跳转时下载顺序随之调整。再次下载同一目标文件时从中断处续传。
+        """
+        from core.downloader import DownloadTask
+
+        self.opener.cancel()
+        self.playlist_engine.deactivate()
+        if self.download_task is not None:
+            self.download_task.close()
+        self.download_task = DownloadTask(url, path)
+        self.download_task.headerReady.connect(self.on_download_header_ready)
+        self.download_task.finished.connect(self.on_download_finished)
+        self.download_task.failed.connect(self.on_download_failed)
+        self.download_task.start()
+        # 下载完成前只有 .part 文件，先显示下载地址
+        self.update_file_info(url)
+
+    def on_download_header_ready(self):
+        """
+        文件头尾已下载，通过本地代理读取部分文件开始播放。
+        """
+        task = self.download_task
+        if task is None:
+            return
+        name = os.path.basename(task.path)
+        # 下载中的部分文件大小和修改时间不断变化，不记录续播位置
+        self.resume_key = None
+        self.pending_resume = None
+        self.apply_track_gain(task.url)
+        try:
+            source = QUrl(self.get_stream_proxy().serve_resource(task, name))
+            self.name_telemetry_source(source, task.url)
+            self.media_player.setSource(source)
+            self.media_player.play()
+            self.current_file = task.path
+            self.is_playing = True
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"播放文件时出错: {e}")
+            logging.error(str(e))
+
+    def on_download_finished(self, path):
+        """
+        下载完成，目标文件已存在，更新为本地文件的信息。
+        """
+        task = self.download_task
+        if task is not None and task.path == path and self.current_file == path:
+            self.update_file_info(path)
+
+    def on_download_failed(self, message):
+        """
+        下载失败；尚未开始播放时改为直接在线播放。
+        """
+        task = self.download_task
+        if task is None:
+            return
+        if not task.header_sent:
+            logging.warning(f"无法边下载边播放，改为在线播放: {message}")
+            self.download_task = None
+            self._play_streaming_url(task.url)
         else:
-            self._play_local_file(file_path)
+            QMessageBox.warning(self, "错误", f"下载失败: {message}")
+
+    def release_resources(self):
+        """
+        退出前释放后台资源，保存缓存状态和下载进度。
+        """
+        if self.download_task is not None:
+            self.download_task.close()
+            self.download_task = None
+        if self.stream_proxy is not None:
+            self.stream_proxy.stop()
+            self.stream_proxy = None
+        if self.telemetry is not None:
+            self.telemetry.close()
+            self.telemetry = None
+        if self.resume_store is not None:
+            self.resume_store.close()
+        if self.loudness_analyzer is not None:
+            self.loudness_analyzer.shutdown()
+            self.loudness_analyzer = None
+        if self.library_watcher is not None:
+            self.library_watcher.stop()
+            self.library_watcher = None
+        # 先丢弃未完成的探测，避免结果在媒体库关闭后写回
+        if self.probe_pool is not None:
+            self.probe_pool.shutdown()
+            self.probe_pool = None
+        if self.library is not None:
+            self.library.close()
+            self.library = None
+        self.resume_store = None
+        self.resume_key = None
+        self.pending_resume = None
 
     def _play_streaming_url(self, url):
         """
         处理流媒体资源
         """
         try:
-            url = QUrl(url)
-            self.media_player.setSource(url)
+            self.prepare_resume(url)
+            self.apply_track_gain(url)
+            self.media_player.setSource(self.stream_source(url))
             self.media_player.play()
             self.current_file = url
             self.is_playing = True
-            if self.file_info_label:
-                self.file_info_label.setText(f"正在播放: {url}")
+            self.update_file_info(url)
         except Exception as e:
             QMessageBox.critical(self, "错误", f"播放文件时出错: {e}")
             logging.error(str(e))
 
-    def _play_local_file(self, file_path):
+    def _play_local_file(self, file_path, key=None):
         """
         播放本地媒体资源
         """
         try:
             url = QUrl.fromLocalFile(file_path)
+            self.prepare_resume(file_path, key)
+            self.apply_track_gain(file_path, key)
             self.media_player.setSource(url)
             self.media_player.play()
             self.current_file = file_path
             self.is_playing = True
-            if self.file_info_label:
-                file_name = os.path.basename(file_path)
-                self.file_info_label.setText(f"正在播放: {file_name}")
+            self.update_file_info(file_path, key)
         except Exception as e:
             QMessageBox.critical(self, "错误", f"播放文件时出错: {e}")
             logging.error(str(e))
 
+    def update_file_info(self, source, key=None):
+        """
+        更新当前播放文件的信息显示。
+        :param key: 后台线程中已计算好的文件记录键，可选
+        """
+        if self.file_info_label:
+            name = source if source.startswith(('http://', 'https://')) else os.path.basename(source)
+            self.file_info_label.setText(f"正在播放: {name}")
+
+    def on_playlist_changed(self):
+        """
+        播放列表条目变化后的扩展点，子类可在此刷新列表显示。
+        """
+        pass
+
+    def play_next(self):
+        """
+        播放列表中的下一条目。
+        """
+        self.playlist_engine.next()
+
+    def play_previous(self):
+        """
+        播放列表中的上一条目。
+        """
+        self.playlist_engine.previous()
+
     def toggle_play(self):
         """
         切换播放/暂停状态。
@@ -124,7 +691,8 @@ class Player(QWidget):
         """
         设置播放音量。
         """
-        self.audio_output.setVolume(value / 100)
+        self.volume = value / 100
+        self.apply_volume()
 
     def open_file(self):
         """
@@ -0,0 +1,558 @@
+import os
+import random
+import logging
+import threading
+from itertools import islice
+import xml.etree.ElementTree as ElementTree
+from urllib.parse import urlparse, unquote
+
+from PySide6.QtCore import QObject, Signal
+
+from core.file import FORMAT_TO_EXTENSION_MAP, get_extension
+
+# 播放列表文件扩展名
+PLAYLIST_EXTENSIONS = frozenset(FORMAT_TO_EXTENSION_MAP["Playlist"])
+
+# XSPF 命名空间
+XSPF_NAMESPACE = "{http://xspf.org/ns/0/}"
+
+
+def is_playlist(file_path):
+    """
+    判断文件是否为播放列表。
+    """
+    return get_extension(file_path) in PLAYLIST_EXTENSIONS
+
+
+def resolve_entry(base_dir, entry):
+    """
+    将播放列表中的条目解析为可播放的路径或 URL。
+    :param base_dir: 播放列表文件所在目录，用于解析相对路径
+    :param entry: 条目原始内容
+    """
+    entry = entry.strip()
+    if entry.startswith(('http://', 'https://')):
+        return entry
+    if entry.startswith("file://"):
+        return unquote(urlparse(entry).path)
+    if not os.path.isabs(entry):
+        entry = os.path.join(base_dir, entry)
+    return os.path.normpath(entry)
+
+
+def parse_m3u(file_path):
+    """
+    逐行解析 M3U/M3U8 播放列表，忽略注释和扩展信息行。
+    """
+    with open(file_path, "r", encoding="utf-8-sig", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def parse_pls(file_path):
+    """
+    逐行解析 PLS 播放列表中的 FileN 条目，按文件中出现的顺序输出。
+    """
+    with open(file_path, "r", encoding="utf-8-sig", errors="replace") as f:
+        for line in f:
+            key, sep, value = line.partition("=")
+            key = key.strip().lower()
+            if sep and key.startswith("file") and key[4:].isdigit() and value.strip():
+                yield value.strip()
+
+
+def parse_xspf(file_path):
+    """
+    增量解析 XSPF 播放列表中的 track/location，已处理的节点及时释放。
+    """
+    track_list = None
+    for event, element in ElementTree.iterparse(file_path, events=("start", "end")):
+        if event == "start":
+            if element.tag == f"{XSPF_NAMESPACE}trackList":
+                track_list = element
+            continue
+        if element.tag == f"{XSPF_NAMESPACE}location" and element.text:
+            yield element.text.strip()
+        elif element.tag == f"{XSPF_NAMESPACE}track" and track_list is not None:
+            track_list.clear()
+
+
+# 扩展名对应的解析函数
+PLAYLIST_PARSERS = {
+    "m3u": parse_m3u,
+    "m3u8": parse_m3u,
+    "pls": parse_pls,
+    "xspf": parse_xspf,
+}
+
+# 解析时可能出现的异常
+PLAYLIST_ERRORS = (OSError, UnicodeError, ElementTree.ParseError)
+
+
+def iter_playlist(file_path):
+    """
+    流式读取播放列表文件中的原始条目，不解析相对路径。
+    :return: 条目生成器，不支持的格式返回空生成器
+    """
+    parser = PLAYLIST_PARSERS.get(get_extension(file_path))
+    if parser is None:
+        return iter(())
+    return parser(file_path)
+
+
+def load_playlist(file_path):
+    """
+    一次性加载播放列表文件。
+    :return: 解析后的条目列表，加载失败时返回空列表
+    """
+    base_dir = os.path.dirname(os.path.abspath(file_path))
+    try:
+        return [resolve_entry(base_dir, entry) for entry in iter_playlist(file_path)]
+    except PLAYLIST_ERRORS as e:
+        logging.error(f"加载播放列表失败: {file_path}, {e}")
+        return []
+
+
+class PlaylistReader(QObject):
+    """
+    在后台线程中分批读取播放列表文件，避免慢速存储或超大文件卡住界面线程。
+    每批条目通过 batchRead 信号交给界面线程，不足一批（可能为空）的批次表示已读完；
+    新的读取请求会使旧请求失效，旧的读取线程在下一批之前退出。
+    """
+
+    # 读取序号, 条目列表, 错误信息（为空表示成功）
+    batchRead = Signal(int, list, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+
+    def read(self, file_path, batch_size):
+        """
+        开始读取播放列表文件。
+        :return: 读取序号
+        """
+        self.generation += 1
+        generation = self.generation
+        threading.Thread(
+            target=self._read, args=(generation, file_path, batch_size), name="playlist-read", daemon=True
+        ).start()
+        return generation
+
+    def cancel(self):
+        self.generation += 1
+
+    def _read(self, generation, file_path, batch_size):
+        entries = iter_playlist(file_path)
+        try:
+            while generation == self.generation:
+                batch = list(islice(entries, batch_size))
+                self.batchRead.emit(generation, batch, "")
+                if len(batch) < batch_size:
+                    return
+        except PLAYLIST_ERRORS as e:
+            self.batchRead.emit(generation, [], str(e) or type(e).__name__)
+
+
+class Playlist:
+    """
+    播放队列，支持随机播放和循环模式。
+    entries 保存原始顺序，order 保存实际播放顺序（随机时打乱）。
+    """
+
+    REPEAT_OFF = "off"
+    REPEAT_ONE = "one"
+    REPEAT_ALL = "all"
+    REPEAT_MODES = (REPEAT_OFF, REPEAT_ALL, REPEAT_ONE)
+
+    def __init__(self, entries=None, base_dir=""):
+        self.base_dir = base_dir  # 相对路径条目的基准目录
+        self.generation = 0  # 每次清空递增，供视图判断列表是否被替换
+        self.entries = []
+        self.order = []
+        self.cursor = -1  # 当前条目在 order 中的位置
+        self.shuffle = False
+        self.repeat = self.REPEAT_OFF
+        if entries:
+            self.add(entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entries, defer_shuffle=False):
+        """
+        向队列末尾添加条目，随机模式下插入到未播放部分的随机位置。
+        :param defer_shuffle: 批量加载时先追加到末尾，加载结束后调用一次 shuffle_upcoming()
+        """
+        start = len(self.entries)
+        self.entries.extend(entries)
+        added = range(start, len(self.entries))
+        if not self.shuffle or self.cursor < 0 or defer_shuffle:
+            self.order.extend(added)
+            return
+
+        # 新条目随机排列后与未播放部分随机交错合并，等价于逐个插入随机位置，整体只需线性时间
+        upcoming = self.order[self.cursor + 1:]
+        new = list(added)
+        random.shuffle(new)
+        total = len(upcoming) + len(new)
+        slots = set(random.sample(range(total), len(new)))
+        new_items, old_items = iter(new), iter(upcoming)
+        self.order[self.cursor + 1:] = [
+            next(new_items) if position in slots else next(old_items) for position in range(total)
+        ]
+
+    def shuffle_upcoming(self):
+        """
+        随机模式下重新打乱当前条目之后的播放顺序。
+        """
+        if not self.shuffle:
+            return
+        upcoming = self.order[self.cursor + 1:]
+        random.shuffle(upcoming)
+        self.order[self.cursor + 1:] = upcoming
+
+    def resolve(self, index):
+        """
+        获取条目的实际路径或 URL，相对路径在使用时才解析。
+        """
+        return resolve_entry(self.base_dir, self.entries[index])
+
+    def clear(self):
+        """
+        清空队列。
+        """
+        self.generation += 1
+        self.entries.clear()
+        self.order.clear()
+        self.cursor = -1
+
+    @property
+    def current_index(self):
+        """
+        当前条目在 entries 中的下标，没有时返回 None。
+        """
+        if 0 <= self.cursor < len(self.order):
+            return self.order[self.cursor]
+        return None
+
+    def current(self):
+        """
+        当前条目的实际路径，没有时返回 None。
+        """
+        index = self.current_index
+        return self.resolve(index) if index is not None else None
+
+    def set_current(self, index):
+        """
+        将 entries 中的某个下标设为当前条目。
+        """
+        self.cursor = self.order.index(index)
+
+    def _step(self, offset):
+        """
+        计算相对当前位置偏移后的 order 位置，按循环模式处理边界。
+        """
+        if not self.order:
+            return None
+        cursor = self.cursor + offset
+        if 0 <= cursor < len(self.order):
+            return cursor
+        if self.repeat == self.REPEAT_ALL:
+            return cursor % len(self.order)
+        return None
+
+    def peek_next(self, auto=True):
+        """
+        查看下一条目的下标，不移动当前位置。
+        :param auto: 是否为播放结束后的自动切换，单曲循环只影响自动切换
+        """
+        if auto and self.repeat == self.REPEAT_ONE:
+            return self.current_index
+        cursor = self._step(1)
+        return self.order[cursor] if cursor is not None else None
+
+    def upcoming(self, count):
+        """
+        按播放顺序查看之后的若干条目下标，不包含当前条目，不移动当前位置。
+        """
+        indices = []
+        for offset in range(1, min(count, len(self.order) - 1) + 1):
+            cursor = self._step(offset)
+            if cursor is None:
+                break
+            indices.append(self.order[cursor])
+        return indices
+
+    def advance(self, auto=True):
+        """
+        移动到下一条目。
+        :return: 新的当前下标，已到末尾时返回 None
+        """
+        if auto and self.repeat == self.REPEAT_ONE:
+            return self.current_index
+        cursor = self._step(1)
+        if cursor is None:
+            return None
+        self.cursor = cursor
+        return self.order[cursor]
+
+    def previous(self):
+        """
+        移动到上一条目。
+        :return: 新的当前下标，已到开头时返回 None
+        """
+        cursor = self._step(-1)
+        if cursor is None:
+            return None
+        self.cursor = cursor
+        return self.order[cursor]
+
+    def set_shuffle(self, enabled):
+        """
+        切换随机播放，当前条目保持不变并排在最前。
+        """
+        self.shuffle = enabled
+        current = self.current_index
+        self.order = list(range(len(self.entries)))
+        if enabled:
+            random.shuffle(self.order)
+            if current is not None:
+                self.order.remove(current)
+                self.order.insert(0, current)
+        self.cursor = self.order.index(current) if current is not None else -1
+
+    def cycle_repeat(self):
+        """
+        依次切换循环模式：不循环 -> 列表循环 -> 单曲循环。
+        :return: 新的循环模式
+        """
+        position = self.REPEAT_MODES.index(self.repeat)
+        self.repeat = self.REPEAT_MODES[(position + 1) % len(self.REPEAT_MODES)]
+        return self.repeat
+
+
+class PlaylistEngine:
+    """
+    播放列表引擎，负责按队列顺序播放。
+    当前曲目播放时，使用一个备用的 QMediaPlayer 预加载下一条目，
+    播放结束后直接切换到备用播放器，减少曲目之间的间隙。
+    播放列表文件在后台线程中分批流式读取，读到第一批条目即开始播放，其余条目读到后追加到队列；
+    随机模式下后续批次先按顺序追加，全部读完后再一次性打乱未播放部分。
+    """
+
+    LOAD_BATCH_SIZE = 2000  # 每批读取的条目数
+    ANALYZE_AHEAD = 3  # 提前做响度分析的条目数
+
+    def __init__(self, player):
+        self.player = player
+        self.playlist = Playlist()
+        self.active = False  # 当前播放是否来自播放列表
+        self.standby_player = None
+        self.standby_index = None
+        self.reader = PlaylistReader()
+        self.reader.batchRead.connect(self.on_batch_read)
+        self.load_generation = 0  # 当前读取请求的序号，用于丢弃过期的批次
+        self.loading = None  # 正在读取的播放列表文件
+        self.load_started = False  # 是否已收到第一批条目并开始播放
+        self.invalid_streak = 0  # 连续无效的条目数，整个列表都无效时停止跳过
+
+    def load(self, file_path):
+        """
+        在后台读取播放列表文件，读到第一批条目后从第一条开始播放；
+        播放列表为空或无法解析时调用 player.on_playlist_failed()。
+        """
+        self.loading = file_path
+        self.load_started = False
+        self.load_generation = self.reader.read(file_path, self.LOAD_BATCH_SIZE)
+
+    def on_batch_read(self, generation, batch, error):
+        """
+        后台读到一批条目：第一批替换播放列表并开始播放，之后的批次追加到队列。
+        """
+        if generation != self.load_generation or self.loading is None:
+            return
+        file_path = self.loading
+        finished = bool(error) or len(batch) < self.LOAD_BATCH_SIZE
+        if finished:
+            self.loading = None
+        if error:
+            logging.error(f"读取播放列表失败: {file_path}, {error}")
+
+        if not self.load_started:
+            if not batch:
+                if not error:
+                    logging.warning(f"播放列表为空: {file_path}")
+                self.player.on_playlist_failed(file_path)
+                return
+            self.load_started = True
+            self.invalid_streak = 0
+            self.playlist.clear()
+            self.playlist.base_dir = os.path.dirname(os.path.abspath(file_path))
+            self.playlist.add(batch)
+            if self.playlist.shuffle:
+                self.playlist.set_shuffle(True)
+            self.player.on_playlist_changed()
+            self.play_index(self.playlist.order[0])
+            return
+
+        if batch:
+            self.playlist.add(batch, defer_shuffle=True)
+        if finished:
+            self.playlist.shuffle_upcoming()
+        if batch or finished:
+            self.player.on_playlist_changed()
+            self.preload_next()
+
+    def enqueue(self, entries, play_now=False):
+        """
+        将条目加入队列，当前没有播放列表在播放时立即开始播放。
+        :param play_now: 是否立即播放新加入的第一条
+        """
+        start = len(self.playlist)
+        self.playlist.add(entries)
+        self.player.on_playlist_changed()
+        if (play_now or not self.active) and len(self.playlist) > start:
+            self.play_index(start)
+        else:
+            self.preload_next()
+
+    def play_index(self, index):
+        """
+        播放 entries 中指定下标的条目，已预加载时直接切换。
+        """
+        self.playlist.set_current(index)
+        self.active = True
+        entry = self.playlist.resolve(index)
+
+        standby = self.take_standby(index)
+        if standby is not None:
+            # 原播放器转为备用播放器，继续用于预加载；预加载完成的条目一定有效
+            self.invalid_streak = 0
+            previous = self.player.swap_media_player(standby, entry)
+            previous.stop()
+            self.standby_player = previous
+        else:
+            self.player.open_source(entry)
+        self.preload_next()
+
+    def next(self):
+        """
+        手动切换到下一条目。
+        """
+        index = self.playlist.advance(auto=False)
+        if index is not None:
+            self.play_index(index)
+
+    def previous(self):
+        """
+        手动切换到上一条目。
+        """
+        index = self.playlist.previous()
+        if index is not None:
+            self.play_index(index)
+
+    def deactivate(self):
+        """
+        播放了播放列表之外的文件，停止自动切换并释放预加载。
+        """
+        self.active = False
+        self.release_standby()
+
+    def on_end_of_media(self):
+        """
+        当前曲目播放结束，切换到下一条目。
+        """
+        if not self.active:
+            return
+        if self.playlist.repeat == Playlist.REPEAT_ONE:
+            self.player.seek(0)
+            self.player.media_player.play()
+            return
+        index = self.playlist.advance()
+        if index is None:
+            self.active = False
+            return
+        self.play_index(index)
+
+    def on_media_loaded(self):
+        """
+        当前条目加载成功。
+        """
+        self.invalid_streak = 0
+
+    def on_invalid_media(self):
+        """
+        当前条目无效时跳过；连续一整轮都无效时停止，避免列表循环时无限跳过。
+        """
+        logging.error(f"跳过无效的播放列表条目: {self.playlist.current()}")
+        self.invalid_streak += 1
+        if self.invalid_streak >= len(self.playlist):
+            logging.error("播放列表中的条目均无法播放，停止播放")
+            self.invalid_streak = 0
+            self.deactivate()
+            return
+        self.next()
+
+    def preload_next(self):
+        """
+        使用备用播放器预加载下一条目。
+        """
+        if not self.active:
+            return
+        # 即将播放的条目提前排队做响度分析
+        self.player.analyze_upcoming(
+            [self.playlist.resolve(index) for index in self.playlist.upcoming(self.ANALYZE_AHEAD)]
+        )
+
+        from PySide6.QtCore import QUrl
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        index = self.playlist.peek_next()
+        if index is None or index == self.playlist.current_index:
+            self.release_standby()
+            return
+        if index == self.standby_index:
+            return
+
+        entry = self.playlist.resolve(index)
+        if entry.startswith(('http://', 'https://')):
+            url = self.player.stream_source(entry)
+        else:
+            # 不在界面线程检查文件是否存在：文件缺失时备用播放器加载失败，不会被 take_standby() 取用
+            url = QUrl.fromLocalFile(entry)
+
+        if self.standby_player is None:
+            self.standby_player = QMediaPlayer()
+        # 备用播放器不绑定任何输出，只负责加载
+        self.standby_player.setSource(url)
+        self.standby_index = index
+
+    def take_standby(self, index):
+        """
+        取出已为指定条目加载完成的备用播放器，未就绪时返回 None。
+        """
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        ready_states = (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia)
+        if self.standby_player is None or self.standby_index != index:
+            return None
+        if self.standby_player.mediaStatus() not in ready_states:
+            return None
+
+        standby = self.standby_player
+        self.standby_player = None
+        self.standby_index = None
+        return standby
+
+    def release_standby(self):
+        """
+        停止预加载并清空备用播放器的资源。
+        """
+        from PySide6.QtCore import QUrl
+
+        if self.standby_player is not None:
+            self.standby_player.setSource(QUrl())
+        self.standby_index = None
@@ -0,0 +1,309 @@
+import os
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from PySide6.QtCore import QObject, QTimer, QUrl, Signal
+
+
+@dataclass
+class MediaInfo:
+    """
+    媒体文件的探测结果。
+    """
+    path: str
+    duration: int = 0  # 毫秒
+    has_video: bool = False
+    has_audio: bool = False
+    width: int = 0
+    height: int = 0
+    video_codec: str = ""
+    audio_codec: str = ""
+    title: str = ""
+    error: str = ""
+
+    @property
+    def codec(self):
+        """
+        汇总的编码描述，例如 "H.264/AAC"。
+        """
+        return "/".join(codec for codec in (self.video_codec, self.audio_codec) if codec)
+
+
+def media_identity(path):
+    """
+    文件身份标识 (绝对路径, 大小, 修改时间)，文件不存在时返回 None。
+    流媒体 URL 只使用 URL 本身。
+    """
+    if path.startswith(('http://', 'https://')):
+        return path, 0, 0
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), stat.st_size, stat.st_mtime
+
+
+def identity_key(identity):
+    """
+    根据文件身份标识生成紧凑的记录键。续播位置、响度、波形、预览帧和关键帧索引
+    等按文件保存的记录和缓存都使用该键，文件变化后键随之变化。
+    """
+    return hashlib.sha1(repr(identity).encode("utf-8")).hexdigest()[:20]
+
+
+def media_key(path):
+    """
+    获取文件的记录键，文件不存在时返回 None。
+    """
+    identity = media_identity(path)
+    if identity is None:
+        return None
+    return identity_key(identity)
+
+
+class ProbeSlot:
+    """
+    探测池中的一个播放器槽位，一次只处理一个文件。
+    """
+
+    def __init__(self, pool):
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        self.pool = pool
+        self.player = QMediaPlayer()  # 不绑定任何音视频输出
+        self.player.mediaStatusChanged.connect(self.on_media_status)
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.on_timeout)
+        self.path = None
+
+    def start(self, path):
+        """
+        开始加载文件。
+        """
+        self.path = path
+        url = QUrl(path) if path.startswith(('http://', 'https://')) else QUrl.fromLocalFile(path)
+        self.timer.start(self.pool.timeout_ms)
+        self.player.setSource(url)
+
+    def on_media_status(self, status):
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        if self.path is None:
+            return
+        if status in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia):
+            self.finish(self.read_info())
+        elif status == QMediaPlayer.MediaStatus.InvalidMedia:
+            self.finish(MediaInfo(self.path, error=self.player.errorString() or "无效的媒体资源"))
+
+    def on_timeout(self):
+        if self.path is not None:
+            self.finish(MediaInfo(self.path, error="探测超时"))
+
+    def read_info(self):
+        """
+        读取播放器中已加载媒体的元数据。
+        """
+        from PySide6.QtMultimedia import QMediaFormat, QMediaMetaData
+
+        meta = self.player.metaData()
+        info = MediaInfo(
+            self.path,
+            duration=max(0, self.player.duration()),
+            has_video=self.player.hasVideo(),
+            has_audio=self.player.hasAudio(),
+        )
+        resolution = meta.value(QMediaMetaData.Key.Resolution)
+        if resolution is not None and not resolution.isEmpty():
+            info.width, info.height = resolution.width(), resolution.height()
+        video_codec = meta.value(QMediaMetaData.Key.VideoCodec)
+        if video_codec is not None and video_codec != QMediaFormat.VideoCodec.Unspecified:
+            info.video_codec = QMediaFormat.videoCodecName(video_codec)
+        audio_codec = meta.value(QMediaMetaData.Key.AudioCodec)
+        if audio_codec is not None and audio_codec != QMediaFormat.AudioCodec.Unspecified:
+            info.audio_codec = QMediaFormat.audioCodecName(audio_codec)
+        info.title = meta.stringValue(QMediaMetaData.Key.Title)
+        return info
+
+    def stop(self):
+        """
+        放弃当前探测，不通知探测池。
+        """
+        self.timer.stop()
+        self.path = None
+        self.player.setSource(QUrl())
+
+    def finish(self, info):
+        """
+        结束当前探测，释放媒体资源并通知探测池。
+        """
+        self.timer.stop()
+        self.path = None
+        self.player.setSource(QUrl())
+        self.pool.on_slot_finished(self, info)
+
+
+class ProbePool(QObject):
+    """
+    元数据探测池，使用固定数量的无输出 QMediaPlayer 并发加载文件读取元数据。
+    结果按 (路径, 大小, 修改时间) 缓存，重复查询不会再访问多媒体后端。
+    需要在界面线程（有事件循环的线程）中使用。
+    """
+
+    # 文件路径, MediaInfo
+    probed = Signal(str, object)
+    # 媒体库后台线程查询到的待探测文件：媒体库, [(路径, 大小, 修改时间)], 单批上限
+    _pendingFound = Signal(object, list, int)
+
+    DEFAULT_SIZE = 2
+    DEFAULT_TIMEOUT_MS = 5000
+    MEMO_SIZE = 10000
+
+    def __init__(self, size=DEFAULT_SIZE, timeout_ms=DEFAULT_TIMEOUT_MS, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.timeout_ms = timeout_ms
+        self.idle_slots = []
+        self.slot_count = 0
+        self.queue = deque()  # 等待探测的 (身份标识, 路径)
+        self.waiting = {}  # 身份标识 -> [Future]
+        self.memo = OrderedDict()  # 身份标识 -> MediaInfo
+        self.slot_identity = {}  # 槽位 -> 正在探测的身份标识
+        self.refill = None  # 当前批次探测完后继续填充的 (媒体库, 单批上限)
+        self.closed = False
+        self._pendingFound.connect(self.on_pending_found)
+
+    def probe(self, path, identity=None):
+        """
+        探测文件元数据。
+        :param identity: 已知的身份标识（如媒体库中记录的大小和修改时间），提供时不再读取文件状态
+        :return: concurrent.futures.Future，结果为 MediaInfo
+        """
+        future = Future()
+        identity = identity or media_identity(path)
+        if identity is None:
+            future.set_result(MediaInfo(path, error="文件不存在"))
+            return future
+
+        cached = self.memo.get(identity)
+        if cached is not None:
+            self.memo.move_to_end(identity)
+            future.set_result(cached)
+            return future
+
+        if identity in self.waiting:
+            self.waiting[identity].append(future)
+            return future
+        self.waiting[identity] = [future]
+        self.queue.append((identity, path))
+        self.dispatch()
+        return future
+
+    def cached(self, path):
+        """
+        只查询缓存，不触发探测。
+        """
+        identity = media_identity(path)
+        return self.memo.get(identity) if identity else None
+
+    def pending_count(self):
+        """
+        排队和正在探测的文件数。
+        """
+        return len(self.waiting)
+
+    def dispatch(self):
+        """
+        将排队的文件分配给空闲槽位，必要时创建新槽位。
+        """
+        while self.queue:
+            if self.idle_slots:
+                slot = self.idle_slots.pop()
+            elif self.slot_count < self.size:
+                slot = ProbeSlot(self)
+                self.slot_count += 1
+            else:
+                return
+            identity, path = self.queue.popleft()
+            self.slot_identity[slot] = identity
+            slot.start(path)
+
+    def on_slot_finished(self, slot, info):
+        """
+        槽位完成探测，保存结果并继续分配任务。
+        """
+        identity = self.slot_identity.pop(slot)
+        if info.error:
+            logging.warning(f"探测媒体失败: {info.path}, {info.error}")
+        else:
+            # 只缓存成功的结果，失败的文件下次仍会重试
+            self.memo[identity] = info
+            if len(self.memo) > self.MEMO_SIZE:
+                self.memo.popitem(last=False)
+
+        for future in self.waiting.pop(identity, []):
+            future.set_result(info)
+        self.probed.emit(info.path, info)
+
+        self.idle_slots.append(slot)
+        # 等本次状态回调返回后再复用该槽位
+        QTimer.singleShot(0, self.dispatch)
+        if not self.waiting and self.refill is not None:
+            # 上一批已满，之后可能还有未探测的文件
+            library, limit = self.refill
+            self.refill = None
+            self.fill_library(library, limit)
+
+    def fill_library(self, library, limit=1000):
+        """
+        为媒体库中尚未提取元数据的文件排队探测，结果写回媒体库。
+        数据库的查询和写入都在媒体库的后台线程进行；一批探测完后继续下一批，直到全部探测完。
+        """
+        library.run_in_background(
+            lambda: self._pendingFound.emit(library, library.pending_metadata(limit), limit)
+        )
+
+    def on_pending_found(self, library, rows, limit):
+        """
+        按媒体库记录的大小和修改时间排队探测，已在排队的文件不重复添加。
+        """
+        if self.closed:
+            return
+        for path, size, mtime in rows:
+            identity = (path, size, mtime)
+            if identity in self.waiting:
+                continue
+            self.probe(path, identity).add_done_callback(
+                lambda future, identity=identity: self._store_in_library(library, identity, future.result())
+            )
+        if len(rows) >= limit:
+            if self.waiting:
+                self.refill = (library, limit)
+            else:
+                # 本批全部命中缓存，结果已排在查询之前写回
+                self.fill_library(library, limit)
+
+    def shutdown(self):
+        """
+        丢弃排队和正在进行的探测，等待中的 Future 不再完成，结果也不再写回媒体库。
+        需要在关闭媒体库之前调用。
+        """
+        self.closed = True
+        self.refill = None
+        self.queue.clear()
+        self.waiting.clear()
+        for slot in self.slot_identity:
+            slot.stop()
+        self.slot_identity.clear()
+
+    @staticmethod
+    def _store_in_library(library, identity, info):
+        # 探测失败的文件也写入时长 0，避免每次都重新探测；文件变化后扫描会清空元数据。
+        # 按探测时的 (路径, 大小, 修改时间) 写回，探测期间文件变化时不写入旧结果
+        path, size, mtime = identity
+        library.run_in_background(
+            library.update_metadata, path, size, mtime,
+            info.duration, info.codec, int(info.has_video), int(info.has_audio)
+        )
@@ -0,0 +1,74 @@
+import sys
+import time
+
+# 进程启动时间点，尽可能早地记录
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """
+    启动耗时分析器，记录各个启动阶段的时间点并输出耗时明细。
+    未启用时 mark() 不做任何事情，开销可以忽略。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.phases = []
+        self.reported = False
+        self.report_phase = None
+
+    def enable(self, report_phase=None):
+        """
+        启用分析器。
+        :param report_phase: 记录到该阶段时自动输出报告
+        """
+        self.enabled = True
+        self.report_phase = report_phase
+        self.phases.append(("process_start", PROCESS_START))
+
+    def mark(self, phase):
+        """
+        记录一个阶段的完成时间点，同一阶段只记录第一次。
+        """
+        if not self.enabled or self.has(phase):
+            return
+        self.phases.append((phase, time.perf_counter()))
+        if phase == self.report_phase:
+            self.report()
+
+    def has(self, phase):
+        """
+        判断某个阶段是否已记录。
+        """
+        return any(name == phase for name, _ in self.phases)
+
+    def elapsed(self, phase):
+        """
+        获取从进程启动到某个阶段的耗时（毫秒），未记录时返回 None。
+        """
+        for name, timestamp in self.phases:
+            if name == phase:
+                return (timestamp - PROCESS_START) * 1000
+        return None
+
+    def report(self, stream=None):
+        """
+        输出各阶段耗时明细，只输出一次。
+        """
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        stream = stream or sys.stderr
+
+        stream.write("启动耗时分析:\n")
+        previous = PROCESS_START
+        for name, timestamp in self.phases:
+            total_ms = (timestamp - PROCESS_START) * 1000
+            delta_ms = (timestamp - previous) * 1000
+            stream.write(f"  {name:<24} +{delta_ms:9.1f} ms  (累计 {total_ms:9.1f} ms)\n")
+            previous = timestamp
+        stream.flush()
+
+
+# 进程级的启动分析器实例
+profiler = StartupProfiler()
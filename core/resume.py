@@ -0,0 +1,130 @@
+import os
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer
+
+from core.file import get_cache_dir
+from core.probe import media_key
+
+# 播放位置少于该值（毫秒）时不记录
+MIN_RESUME_MS = 5000
+
+# 距离结尾少于该值（毫秒）时视为已看完，删除记录
+END_MARGIN_MS = 10000
+
+
+class ResumeStore(QObject):
+    """
+    续播位置存储，按文件身份标识（路径 + 大小 + 修改时间，流媒体为 URL）记录播放位置。
+    位置更新只修改内存中的记录，由定时器批量写盘，写盘在后台线程中进行；
+    记录数超出上限时淘汰最久未使用的条目。
+    """
+
+    DEFAULT_CAPACITY = 1000  # 最多保留的记录数
+    FLUSH_INTERVAL_MS = 5000  # 批量写盘间隔
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.path = path or os.path.join(get_cache_dir(), "resume.json")
+        self.capacity = capacity
+        self.entries = OrderedDict()  # 键 -> [位置, 时长]，按最近使用排序
+        self.loaded = False
+        self.dirty = False
+        # 单线程写盘，保证写入顺序与提交顺序一致
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resume-flush")
+        self.writing = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self.timer.timeout.connect(self.flush)
+
+    @staticmethod
+    def key(source):
+        """
+        根据文件身份标识生成紧凑的记录键，文件不存在时返回 None。
+        """
+        return media_key(source)
+
+    def _ensure_loaded(self):
+        """
+        首次使用时读取记录，不拖慢启动。
+        """
+        if self.loaded:
+            return
+        self.loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # 文件中按最近使用顺序保存
+        for key, value in data.items():
+            if isinstance(value, list) and len(value) == 2:
+                self.entries[key] = value
+
+    def lookup(self, key):
+        """
+        获取记录的续播位置（毫秒），没有记录时返回 None。
+        """
+        self._ensure_loaded()
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def record(self, key, position, duration):
+        """
+        更新播放位置，只修改内存并安排一次批量写盘。
+        开头和结尾附近的位置不需要续播，对应记录会被删除。
+        :param key: key() 生成的记录键，由调用方在打开文件时计算一次，避免频繁访问文件系统
+        """
+        self._ensure_loaded()
+        if position < MIN_RESUME_MS or (duration > 0 and duration - position < END_MARGIN_MS):
+            if self.entries.pop(key, None) is None:
+                return
+        else:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] // 1000 == position // 1000:
+                # 同一秒内的更新不需要写盘
+                return
+            self.entries[key] = [position, duration]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        self.dirty = True
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self, wait=False):
+        """
+        将记录写入磁盘。
+        :param wait: 是否同步等待写入完成（退出时使用）
+        """
+        if self.dirty:
+            self.dirty = False
+            data = json.dumps(self.entries, separators=(",", ":"))
+            self.writing = self.executor.submit(self._write, data)
+        if wait and self.writing is not None:
+            self.writing.result()
+
+    def _write(self, data):
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"保存续播位置失败: {e}")
+
+    def close(self):
+        """
+        停止定时器并同步写入未保存的记录。
+        """
+        self.timer.stop()
+        self.flush(wait=True)
+        self.executor.shutdown(wait=False)
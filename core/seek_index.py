@@ -0,0 +1,659 @@
+import os
+import json
+import mmap
+import bisect
+import struct
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, Signal
+
+from core.file import get_cache_dir
+from core.probe import media_key
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺少时不索引 TS 文件
+    np = None
+
+MP4_EXTENSIONS = (".mp4", ".m4v", ".mov", ".3gp")
+MKV_EXTENSIONS = (".mkv", ".webm")
+TS_EXTENSIONS = (".ts", ".m2ts", ".mts")
+
+# PMT 中的视频流类型：MPEG-1/2、MPEG-4、H.264、HEVC
+TS_VIDEO_STREAM_TYPES = {0x01, 0x02, 0x10, 0x1B, 0x24}
+
+# TS 每次向量化处理的数据量
+TS_SCAN_CHUNK = 64 * 1024 * 1024
+
+
+class SeekIndex:
+    """
+    关键帧索引：关键帧时间点（毫秒，升序）及其在文件中的字节偏移。
+    """
+
+    def __init__(self, timestamps, offsets):
+        self.timestamps = timestamps
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def nearest(self, position, tolerance):
+        """
+        查找距离指定时间点最近的关键帧。
+        :param tolerance: 允许的最大偏差（毫秒），超出时返回原位置
+        """
+        index = bisect.bisect_left(self.timestamps, position)
+        candidates = [self.timestamps[i] for i in (index - 1, index) if 0 <= i < len(self.timestamps)]
+        if not candidates:
+            return position
+        keyframe = min(candidates, key=lambda timestamp: abs(timestamp - position))
+        return keyframe if abs(keyframe - position) <= tolerance else position
+
+    def previous(self, position):
+        """
+        不晚于指定时间点的最后一个关键帧，没有时返回 0。
+        """
+        index = bisect.bisect_right(self.timestamps, position)
+        return self.timestamps[index - 1] if index else 0
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"timestamps": self.timestamps, "offsets": self.offsets}, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        """
+        从磁盘加载，文件缺失或损坏时返回 None。
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data["timestamps"], data["offsets"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+def iter_boxes(data, start, end):
+    """
+    遍历 [start, end) 范围内的 MP4 box。
+    :return: (类型, 内容起始, box 结束) 的迭代器
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield kind, offset + header, offset + size
+        offset += size
+
+
+def find_box(data, start, end, *path):
+    """
+    按路径查找第一个匹配的子 box，返回 (内容起始, 结束)，找不到时返回 None。
+    """
+    for kind, body, box_end in iter_boxes(data, start, end):
+        if kind == path[0]:
+            return (body, box_end) if len(path) == 1 else find_box(data, body, box_end, *path[1:])
+    return None
+
+
+def full_box_entries(data, body, fmt):
+    """
+    读取 "版本/标志 + 条目数 + 条目" 结构的 box。
+    """
+    count = struct.unpack_from(">I", data, body + 4)[0]
+    size = struct.calcsize(fmt)
+    return [struct.unpack_from(fmt, data, body + 8 + i * size) for i in range(count)]
+
+
+def mp4_box_timescale(data, body):
+    """
+    读取 mvhd/mdhd 中的时间刻度，两者的版本 0/1 布局相同。
+    """
+    return struct.unpack_from(">I", data, body + (20 if data[body] == 1 else 12))[0]
+
+
+def mp4_track_info(data, body, end):
+    """
+    读取视频轨道的时间刻度和轨道号，不是视频轨道时返回 None。
+    """
+    handler = find_box(data, body, end, b"mdia", b"hdlr")
+    if handler is None or data[handler[0] + 8:handler[0] + 12] != b"vide":
+        return None
+    mdhd = find_box(data, body, end, b"mdia", b"mdhd")
+    tkhd = find_box(data, body, end, b"tkhd")
+    if mdhd is None or tkhd is None:
+        return None
+    timescale = mp4_box_timescale(data, mdhd[0])
+    track_id = struct.unpack_from(">I", data, tkhd[0] + (20 if data[tkhd[0]] == 1 else 12))[0]
+    return timescale, track_id
+
+
+def mp4_edit_shift(data, body, end, movie_timescale, timescale):
+    """
+    根据编辑列表 elst 计算媒体时间到播放时间的偏移（媒体时间刻度）：
+    播放时间 = 媒体时间 - 偏移。开头的空编辑（media_time 为 -1）表示延后播放，
+    第一个非空编辑的 media_time 表示从媒体中的该时间开始播放。没有编辑列表时为 0。
+    """
+    elst = find_box(data, body, end, b"edts", b"elst")
+    if elst is None:
+        return 0
+    entry_format = ">Qqhh" if data[elst[0]] == 1 else ">Iihh"
+    delay = 0
+    for duration, media_time, _, _ in full_box_entries(data, elst[0], entry_format):
+        if media_time == -1:
+            # 空编辑的时长使用影片时间刻度
+            if movie_timescale > 0:
+                delay += duration * timescale // movie_timescale
+            continue
+        return media_time - delay
+    return -delay
+
+
+def mp4_sample_table_index(data, stbl, timescale, shift=0):
+    """
+    根据 stss/stts/ctts/stsc/stsz/stco 计算关键帧的时间和字节偏移。
+    关键帧时间为解码时间加 ctts 中的显示时间偏移，再减去编辑列表的偏移 shift，与播放器的显示时间一致。
+    没有 stss 时所有帧都是关键帧，不需要索引。
+    """
+    start, end = stbl
+    stss = find_box(data, start, end, b"stss")
+    stts = find_box(data, start, end, b"stts")
+    stsc = find_box(data, start, end, b"stsc")
+    stsz = find_box(data, start, end, b"stsz")
+    chunk_box = find_box(data, start, end, b"stco") or find_box(data, start, end, b"co64")
+    if None in (stss, stts, stsc, stsz, chunk_box) or timescale <= 0:
+        return None
+
+    sync_samples = [number for (number,) in full_box_entries(data, stss[0], ">I")]
+    if not sync_samples:
+        return None
+
+    # 各帧的解码时间：按 stts 的分段累加
+    times = {}
+    wanted = iter(sync_samples)
+    target = next(wanted)
+    sample, time = 1, 0
+    for count, delta in full_box_entries(data, stts[0], ">II"):
+        while target is not None and target < sample + count:
+            times[target] = time + (target - sample) * delta
+            target = next(wanted, None)
+        sample += count
+        time += count * delta
+
+    # 显示时间 = 解码时间 + ctts 偏移（B 帧重排时关键帧的偏移通常不为 0）
+    ctts = find_box(data, start, end, b"ctts")
+    if ctts is not None:
+        # 版本 1 的偏移为有符号数，版本 0 实际上也常用有符号数写入负偏移
+        wanted = iter(sync_samples)
+        target = next(wanted)
+        sample = 1
+        for count, offset in full_box_entries(data, ctts[0], ">Ii"):
+            while target is not None and target < sample + count:
+                if target in times:
+                    times[target] += offset
+                target = next(wanted, None)
+            sample += count
+
+    # 各帧大小：stsz 中统一大小或逐帧大小
+    uniform_size, sample_count = struct.unpack_from(">II", data, stsz[0] + 4)
+    sizes = None if uniform_size else struct.unpack_from(f">{sample_count}I", data, stsz[0] + 12)
+
+    chunk_format = ">Q" if data[chunk_box[0] - 4:chunk_box[0]] == b"co64" else ">I"
+    chunk_offsets = [offset for (offset,) in full_box_entries(data, chunk_box[0], chunk_format)]
+    chunk_runs = full_box_entries(data, stsc[0], ">III")  # (首个块序号, 每块帧数, 描述序号)
+
+    # 逐块展开帧到块的映射，只记录关键帧的偏移
+    offsets = {}
+    wanted = set(sync_samples)
+    sample = 1
+    for run, (first_chunk, per_chunk, _) in enumerate(chunk_runs):
+        last_chunk = chunk_runs[run + 1][0] - 1 if run + 1 < len(chunk_runs) else len(chunk_offsets)
+        for chunk in range(first_chunk, last_chunk + 1):
+            offset = chunk_offsets[chunk - 1]
+            for _ in range(per_chunk):
+                if sample in wanted:
+                    offsets[sample] = offset
+                offset += uniform_size or (sizes[sample - 1] if sample <= len(sizes) else 0)
+                sample += 1
+
+    timestamps, positions = [], []
+    for number in sync_samples:
+        if number in times:
+            timestamps.append(max(0, times[number] - shift) * 1000 // timescale)
+            positions.append(offsets.get(number, 0))
+    return SeekIndex(timestamps, positions)
+
+
+def mp4_fragment_index(data, size, timescales):
+    """
+    分片 MP4 从文件末尾的 mfra/tfra 读取随机访问点。
+    :param timescales: 轨道号 -> (时间刻度, 编辑列表偏移)
+    """
+    # mfro 是 16 字节的完整 box：大小、类型、版本/标志、mfra 大小
+    if size < 16 or data[size - 12:size - 8] != b"mfro":
+        return None
+    mfra_size = struct.unpack_from(">I", data, size - 4)[0]
+    mfra_start = size - mfra_size
+    if mfra_start < 0 or data[mfra_start + 4:mfra_start + 8] != b"mfra":
+        return None
+    for kind, body, end in iter_boxes(data, mfra_start + 8, size):
+        if kind != b"tfra":
+            continue
+        version = data[body]
+        track_id, lengths, count = struct.unpack_from(">III", data, body + 4)
+        if track_id not in timescales:
+            continue
+        timescale, shift = timescales[track_id]
+        # traf/trun/sample 序号字段的字节数
+        skip = sum(((lengths >> bit) & 3) + 1 for bit in (4, 2, 0))
+        entry_format = ">QQ" if version == 1 else ">II"
+        step = struct.calcsize(entry_format) + skip
+        timestamps, offsets = [], []
+        for i in range(count):
+            time, moof = struct.unpack_from(entry_format, data, body + 16 + i * step)
+            timestamps.append(max(0, time - shift) * 1000 // timescale)
+            offsets.append(moof)
+        return SeekIndex(timestamps, offsets)
+    return None
+
+
+def index_mp4(data):
+    size = len(data)
+    moov = find_box(data, 0, size, b"moov")
+    if moov is None:
+        return None
+    mvhd = find_box(data, *moov, b"mvhd")
+    movie_timescale = mp4_box_timescale(data, mvhd[0]) if mvhd else 0
+    timescales = {}
+    for kind, body, end in iter_boxes(data, *moov):
+        if kind != b"trak":
+            continue
+        info = mp4_track_info(data, body, end)
+        if info is None:
+            continue
+        timescale, track_id = info
+        shift = mp4_edit_shift(data, body, end, movie_timescale, timescale)
+        timescales[track_id] = (timescale, shift)
+        stbl = find_box(data, body, end, b"mdia", b"minf", b"stbl")
+        index = mp4_sample_table_index(data, stbl, timescale, shift) if stbl else None
+        if index is not None and len(index) > 1:
+            return index
+    return mp4_fragment_index(data, size, timescales)
+
+
+def read_ebml_id(data, offset):
+    """
+    读取 EBML 元素 ID（保留长度标记位），返回 (ID, 下一个位置)。
+    """
+    first = data[offset]
+    length = 1
+    while length <= 4 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 4:
+        raise ValueError("无效的 EBML ID")
+    return int.from_bytes(data[offset:offset + length], "big"), offset + length
+
+
+def read_ebml_size(data, offset):
+    """
+    读取 EBML 长度，返回 (长度, 下一个位置)，未知长度返回 None。
+    """
+    first = data[offset]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ValueError("无效的 EBML 长度")
+    value = first & (0xFF >> length)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    if value == (1 << (7 * length)) - 1:
+        return None, offset + length
+    return value, offset + length
+
+
+def iter_ebml(data, start, end):
+    """
+    遍历 [start, end) 范围内的 EBML 元素，返回 (ID, 内容起始, 内容结束)。
+    未知长度的元素延伸到范围末尾，遍历随之结束。
+    """
+    offset = start
+    while offset < end:
+        element_id, offset = read_ebml_id(data, offset)
+        size, offset = read_ebml_size(data, offset)
+        element_end = end if size is None else offset + size
+        if element_end > end:
+            return
+        yield element_id, offset, element_end
+        offset = element_end
+
+
+def ebml_uint(data, start, end):
+    return int.from_bytes(data[start:end], "big") if end > start else 0
+
+
+def index_mkv(data):
+    """
+    从 Matroska 的 Cues 读取关键帧的时间和 Cluster 偏移，只取视频轨道的条目。
+    Cues 通常在文件末尾，通过 SeekHead 定位，不遍历中间的 Cluster。
+    """
+    size = len(data)
+    segment = None
+    for element_id, body, end in iter_ebml(data, 0, size):
+        if element_id == 0x18538067:
+            segment = (body, end)
+            break
+    if segment is None:
+        return None
+    segment_start, segment_end = segment
+
+    timecode_scale = 1000000  # 纳秒
+    video_tracks = set()
+    cues = None
+    for element_id, body, end in iter_ebml(data, segment_start, segment_end):
+        if element_id == 0x114D9B74:  # SeekHead
+            for seek_id, seek_body, seek_end in iter_ebml(data, body, end):
+                if seek_id != 0x4DBB:
+                    continue
+                target, position = None, None
+                for child_id, child_body, child_end in iter_ebml(data, seek_body, seek_end):
+                    if child_id == 0x53AB:
+                        target = ebml_uint(data, child_body, child_end)
+                    elif child_id == 0x53AC:
+                        position = ebml_uint(data, child_body, child_end)
+                if target == 0x1C53BB6B and position is not None:
+                    cues = segment_start + position
+        elif element_id == 0x1549A966:  # Info
+            for child_id, child_body, child_end in iter_ebml(data, body, end):
+                if child_id == 0x2AD7B1:
+                    timecode_scale = ebml_uint(data, child_body, child_end)
+        elif element_id == 0x1654AE6B:  # Tracks
+            for entry_id, entry_body, entry_end in iter_ebml(data, body, end):
+                if entry_id != 0xAE:
+                    continue
+                fields = {child_id: ebml_uint(data, child_body, child_end)
+                          for child_id, child_body, child_end in iter_ebml(data, entry_body, entry_end)
+                          if child_id in (0xD7, 0x83)}
+                if fields.get(0x83) == 1:
+                    video_tracks.add(fields.get(0xD7))
+        elif element_id == 0x1C53BB6B:  # Cues 位于 Cluster 之前
+            return mkv_cues(data, body, end, segment_start, timecode_scale, video_tracks)
+        elif element_id == 0x1F43B675 and cues is not None:  # Cluster，Cues 位置已知时不再遍历
+            break
+
+    if cues is None or cues >= size:
+        return None
+    element_id, body = read_ebml_id(data, cues)
+    if element_id != 0x1C53BB6B:
+        return None
+    cues_size, body = read_ebml_size(data, body)
+    end = size if cues_size is None else min(size, body + cues_size)
+    return mkv_cues(data, body, end, segment_start, timecode_scale, video_tracks)
+
+
+def mkv_cues(data, start, end, segment_start, timecode_scale, video_tracks):
+    timestamps, offsets = [], []
+    for point_id, point_body, point_end in iter_ebml(data, start, end):
+        if point_id != 0xBB:
+            continue
+        time, position = None, None
+        for child_id, child_body, child_end in iter_ebml(data, point_body, point_end):
+            if child_id == 0xB3:
+                time = ebml_uint(data, child_body, child_end)
+            elif child_id == 0xB7 and position is None:
+                track, cluster = None, None
+                for field_id, field_body, field_end in iter_ebml(data, child_body, child_end):
+                    if field_id == 0xF7:
+                        track = ebml_uint(data, field_body, field_end)
+                    elif field_id == 0xF1:
+                        cluster = ebml_uint(data, field_body, field_end)
+                if cluster is not None and (not video_tracks or track in video_tracks):
+                    position = segment_start + cluster
+        if time is not None and position is not None:
+            timestamps.append(time * timecode_scale // 1000000)
+            offsets.append(position)
+    if len(timestamps) < 2:
+        return None
+    order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+    return SeekIndex([timestamps[i] for i in order], [offsets[i] for i in order])
+
+
+def ts_packet_layout(data):
+    """
+    检测 TS 包长度（188 或带 4 字节时间码的 192）和第一个同步字节的位置。
+    """
+    for packet_size, sync_offset in ((188, 0), (192, 4)):
+        for start in range(sync_offset, min(len(data), packet_size * 2), 1):
+            if all(start + i * packet_size < len(data) and data[start + i * packet_size] == 0x47 for i in range(5)):
+                return packet_size, start
+    return None
+
+
+def ts_payload(packet):
+    """
+    返回包的负载部分（跳过适配字段）。
+    """
+    control = (packet[3] >> 4) & 3
+    offset = 4
+    if control & 2:
+        offset += 1 + packet[4]
+    return packet[offset:] if control & 1 else b""
+
+
+def ts_video_pid(data, packet_size, start):
+    """
+    解析 PAT 和 PMT，找到第一个视频流的 PID。
+    """
+    pmt_pid = None
+    limit = min(len(data), start + packet_size * 20000)
+    for offset in range(start, limit - 187, packet_size):
+        packet = data[offset:offset + 188]
+        pid = ((packet[1] & 0x1F) << 8) | packet[2]
+        if not packet[1] & 0x40:
+            continue
+        payload = ts_payload(packet)
+        if not payload:
+            continue
+        section = payload[1 + payload[0]:]
+        if pid == 0 and pmt_pid is None and len(section) >= 16:
+            # PAT：跳过 program_number 为 0 的网络信息表
+            length = ((section[1] & 0x0F) << 8) | section[2]
+            for entry in range(8, min(len(section), 3 + length - 4), 4):
+                if (section[entry] << 8) | section[entry + 1]:
+                    pmt_pid = ((section[entry + 2] & 0x1F) << 8) | section[entry + 3]
+                    break
+        elif pid == pmt_pid and len(section) >= 12:
+            length = ((section[1] & 0x0F) << 8) | section[2]
+            info_length = ((section[10] & 0x0F) << 8) | section[11]
+            entry = 12 + info_length
+            while entry + 5 <= min(len(section), 3 + length - 4):
+                stream_type = section[entry]
+                stream_pid = ((section[entry + 1] & 0x1F) << 8) | section[entry + 2]
+                if stream_type in TS_VIDEO_STREAM_TYPES:
+                    return stream_pid
+                entry += 5 + (((section[entry + 3] & 0x0F) << 8) | section[entry + 4])
+    return None
+
+
+def pes_pts(payload):
+    """
+    读取 PES 头中的 PTS（90 kHz），没有时返回 None。
+    """
+    if len(payload) < 14 or payload[:3] != b"\x00\x00\x01" or not payload[7] & 0x80:
+        return None
+    p = payload[9:14]
+    return ((p[0] >> 1) & 0x07) << 30 | p[1] << 22 | (p[2] >> 1) << 15 | p[3] << 7 | p[4] >> 1
+
+
+def index_ts(data):
+    """
+    扫描视频 PID 上带随机访问标记的 PES 起始包，读取其 PTS。
+    包头字段的筛选按块向量化处理，只有候选包才逐个解析。需要 NumPy。
+    """
+    if np is None:
+        return None
+    layout = ts_packet_layout(data)
+    if layout is None:
+        return None
+    packet_size, start = layout
+    video_pid = ts_video_pid(data, packet_size, start)
+    if video_pid is None:
+        return None
+
+    timestamps, offsets = [], []
+    first_pts = None
+    chunk = TS_SCAN_CHUNK // packet_size * packet_size
+    for chunk_start in range(start, len(data), chunk):
+        count = min(chunk, len(data) - chunk_start) // packet_size
+        if count == 0:
+            break
+        packets = np.frombuffer(data, dtype=np.uint8, count=count * packet_size, offset=chunk_start)
+        packets = packets.reshape(count, packet_size)[:, :6]
+        pid = ((packets[:, 1].astype(np.uint16) & 0x1F) << 8) | packets[:, 2]
+        # 负载起始、带适配字段且适配字段非空、random_access_indicator 置位
+        candidates = np.nonzero(
+            (pid == video_pid) & (packets[:, 1] & 0x40 != 0) & (packets[:, 3] & 0x20 != 0)
+            & (packets[:, 4] > 0) & (packets[:, 5] & 0x40 != 0)
+        )[0]
+        for index in candidates.tolist():
+            offset = chunk_start + index * packet_size
+            pts = pes_pts(ts_payload(data[offset:offset + 188]))
+            if pts is None:
+                continue
+            if first_pts is None:
+                first_pts = pts
+            # PTS 为 33 位，处理回绕
+            timestamps.append(((pts - first_pts) % (1 << 33)) // 90)
+            offsets.append(offset)
+    if len(timestamps) < 2:
+        return None
+    return SeekIndex(timestamps, offsets)
+
+
+def build_seek_index(path):
+    """
+    通过内存映射读取容器头部，建立关键帧索引。
+    :return: SeekIndex，格式不支持、没有索引信息或每帧都是关键帧时返回 None
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in MP4_EXTENSIONS:
+        parser = index_mp4
+    elif extension in MKV_EXTENSIONS:
+        parser = index_mkv
+    elif extension in TS_EXTENSIONS:
+        parser = index_ts
+    else:
+        return None
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parser(data)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        logging.info(f"建立关键帧索引失败: {path}: {e}")
+        return None
+
+
+class SeekIndexCache:
+    """
+    关键帧索引的磁盘缓存，按文件身份标识存储，条目数超出上限时淘汰最久未使用的条目。
+    没有关键帧索引的文件也记录一个空索引，避免重复解析。
+    """
+
+    DEFAULT_MAX_ENTRIES = 2000
+
+    def __init__(self, directory=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory or get_cache_dir("seek_index")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # 键 -> None，按最近使用排序
+        found = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    found.append((os.path.getmtime(os.path.join(self.directory, name)), name[:-5]))
+                except OSError:
+                    continue
+        for _, key in sorted(found):
+            self.entries[key] = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        if key is None or key not in self.entries:
+            return None
+        index = SeekIndex.load(self._path(key))
+        if index is None:
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return index
+
+    def put(self, key, index):
+        try:
+            index.save(self._path(key))
+        except OSError as e:
+            logging.warning(f"写入关键帧索引缓存失败: {e}")
+            return
+        self.entries[key] = None
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        self.entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class SeekIndexService(QObject):
+    """
+    关键帧索引服务：缓存读取和容器解析都在后台线程中进行，完成后通过 ready 信号返回。
+    """
+
+    # 文件路径, SeekIndex 或 None
+    ready = Signal(str, object)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="seek-index")
+
+    def request(self, path, key=None):
+        """
+        请求文件的关键帧索引，结果由 ready 信号返回。
+        :param key: 已计算好的文件记录键，未提供时在后台线程中计算
+        """
+        self.executor.submit(self._load, path, key)
+
+    def _load(self, path, key):
+        if self.cache is None:
+            self.cache = SeekIndexCache()
+        key = key or media_key(path)
+        if key is None:
+            self.ready.emit(path, None)
+            return
+        index = self.cache.get(key)
+        if index is None:
+            index = build_seek_index(path) or SeekIndex([], [])
+            self.cache.put(key, index)
+        self.ready.emit(path, index if len(index) else None)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,158 @@
+import os
+import json
+import threading
+
+# 默认分块大小
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class SparseFile:
+    """
+    按固定大小分块写入的稀疏文件，使用位图记录已完成的分块。
+    数据写入 data_path 中对应的偏移位置，位图和元信息保存在 data_path + ".meta"，
+    中断后重新打开可以继续使用已完成的分块。
+    """
+
+    def __init__(self, data_path, total_size, chunk_size=DEFAULT_CHUNK_SIZE, info=None, validator=""):
+        """
+        :param data_path: 数据文件路径
+        :param total_size: 文件总大小
+        :param chunk_size: 分块大小
+        :param info: 随元信息一起保存的附加信息（如来源 URL、内容类型）
+        :param validator: 源站的 ETag 或 Last-Modified，与保存的值不一致时丢弃已完成的分块
+        """
+        self.data_path = data_path
+        self.meta_path = data_path + ".meta"
+        self.total_size = total_size
+        self.chunk_size = chunk_size
+        self.chunk_count = (total_size + chunk_size - 1) // chunk_size
+        self.info = info or {}
+        self.validator = validator
+        self.lock = threading.Lock()
+        self.bitmap = bytearray((self.chunk_count + 7) // 8)
+        self.completed = 0
+
+        self._load_meta()
+        mode = "r+b" if os.path.exists(data_path) else "w+b"
+        self.file = open(data_path, mode)
+        if os.path.getsize(data_path) != total_size:
+            # 只设置文件长度，未写入的区域在支持稀疏文件的文件系统上不占用空间
+            self.file.truncate(total_size)
+
+    def _load_meta(self):
+        """
+        读取已保存的位图，总大小或分块大小不一致时丢弃。
+        """
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        if meta.get("total_size") != self.total_size or meta.get("chunk_size") != self.chunk_size:
+            return
+        if self.validator and meta.get("validator") != self.validator:
+            # 源站内容已变化
+            return
+        bitmap = bytes.fromhex(meta.get("bitmap", ""))
+        if len(bitmap) == len(self.bitmap):
+            self.bitmap[:] = bitmap
+            self.completed = sum(bin(byte).count("1") for byte in self.bitmap)
+            self.info = {**meta.get("info", {}), **self.info}
+
+    def save_meta(self):
+        """
+        保存位图和元信息。
+        """
+        with self.lock:
+            meta = {
+                "total_size": self.total_size,
+                "chunk_size": self.chunk_size,
+                "bitmap": self.bitmap.hex(),
+                "validator": self.validator,
+                "info": self.info,
+            }
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def close(self):
+        """
+        保存位图并关闭文件。
+        """
+        self.save_meta()
+        with self.lock:
+            self.file.close()
+
+    def chunk_range(self, index):
+        """
+        分块对应的字节范围 [start, end)。
+        """
+        start = index * self.chunk_size
+        return start, min(start + self.chunk_size, self.total_size)
+
+    def chunk_of(self, offset):
+        """
+        字节偏移所在的分块序号。
+        """
+        return offset // self.chunk_size
+
+    def has_chunk(self, index):
+        return bool(self.bitmap[index >> 3] & (1 << (index & 7)))
+
+    def has_range(self, start, end):
+        """
+        字节范围 [start, end) 是否已全部写入。
+        """
+        if end <= start:
+            return True
+        return all(self.has_chunk(index) for index in range(self.chunk_of(start), self.chunk_of(end - 1) + 1))
+
+    def is_complete(self):
+        return self.completed == self.chunk_count
+
+    def write_chunk(self, index, data):
+        """
+        写入一个完整的分块并标记完成。
+        """
+        start, end = self.chunk_range(index)
+        if len(data) != end - start:
+            raise ValueError(f"分块 {index} 长度不匹配: {len(data)} != {end - start}")
+        with self.lock:
+            if self.has_chunk(index):
+                return
+            self.file.seek(start)
+            self.file.write(data)
+            self.file.flush()
+            self.bitmap[index >> 3] |= 1 << (index & 7)
+            self.completed += 1
+
+    def read(self, start, length):
+        """
+        读取已写入的数据，调用方需保证范围已完成。
+        """
+        with self.lock:
+            self.file.seek(start)
+            return self.file.read(length)
+
+    def contiguous_end(self, start=0):
+        """
+        从 start 开始连续已完成的数据的结束位置。
+        """
+        index = self.chunk_of(start)
+        while index < self.chunk_count and self.has_chunk(index):
+            index += 1
+        return max(start, min(index * self.chunk_size, self.total_size))
+
+
+def cached_size(meta_path):
+    """
+    根据位图计算稀疏文件已缓存的数据量，元信息缺失或损坏时返回 0。
+    """
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        completed = sum(bin(byte).count("1") for byte in bytes.fromhex(meta.get("bitmap", "")))
+        return min(completed * int(meta.get("chunk_size", 0)), int(meta.get("total_size", 0)))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return 0
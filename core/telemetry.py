@@ -0,0 +1,356 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from core.file import get_cache_dir
+
+# 播放位置跳变阈值（毫秒）：实际前进量与经过时间相差超过该值时记为一次跳变
+POSITION_JUMP_THRESHOLD = 1500
+
+# 跳转后等待位置到达目标的容差（毫秒）
+SEEK_TOLERANCE = 500
+
+
+def default_log_path():
+    """
+    默认的播放指标日志路径。
+    """
+    return os.path.join(get_cache_dir("telemetry"), "playback.jsonl")
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表，记录计数、数值和耗时分布，并把事件转发给已注册的输出。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.timings = {}  # 名称 -> {"count", "total", "min", "max"}
+        self.sinks = []
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name, value):
+        """
+        记录一次耗时或数值样本（毫秒）。
+        """
+        with self.lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                self.timings[name] = {"count": 1, "total": value, "min": value, "max": value}
+            else:
+                timing["count"] += 1
+                timing["total"] += value
+                timing["min"] = min(timing["min"], value)
+                timing["max"] = max(timing["max"], value)
+
+    def snapshot(self):
+        """
+        获取当前所有指标的副本。
+        """
+        with self.lock:
+            timings = {
+                name: {**timing, "mean": timing["total"] / timing["count"]}
+                for name, timing in self.timings.items()
+            }
+            return {"counters": dict(self.counters), "gauges": dict(self.gauges), "timings": timings}
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def emit(self, event, **fields):
+        """
+        向所有输出发送一条事件记录。
+        """
+        if not self.sinks:
+            return
+        record = {"time": round(time.time(), 3), "event": event, **fields}
+        for sink in self.sinks:
+            sink.write(record)
+
+    def close(self):
+        """
+        输出最终的指标快照并关闭所有输出。
+        """
+        self.emit("metrics", **self.snapshot())
+        for sink in self.sinks:
+            sink.close()
+        self.sinks.clear()
+
+
+class JsonlSink:
+    """
+    将事件按行写入 JSONL 文件。
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class PlaybackSession:
+    """
+    一次播放（一个媒体源）的指标。
+    """
+
+    def __init__(self, source, preloaded=False):
+        self.source = source
+        self.preloaded = preloaded  # 播放列表预加载的播放器，加载耗时不计入
+        self.start = time.perf_counter()
+        self.loaded_ms = None
+        self.first_frame_ms = None
+        self.first_position_ms = None
+        self.min_buffer = None
+        self.stall_count = 0
+        self.stall_ms = 0.0
+        self.stall_start = None
+        self.seek_count = 0
+        self.seek_ms = []
+        self.position_jumps = 0
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def summary(self):
+        return {
+            "source": self.source,
+            "preloaded": self.preloaded,
+            "duration_ms": round(self.elapsed_ms(), 1),
+            "time_to_loaded_ms": self.loaded_ms,
+            "time_to_first_frame_ms": self.first_frame_ms,
+            "time_to_first_position_ms": self.first_position_ms,
+            "min_buffer_progress": self.min_buffer,
+            "stall_count": self.stall_count,
+            "stall_ms": round(self.stall_ms, 1),
+            "seek_count": self.seek_count,
+            "seek_latency_ms": [round(value, 1) for value in self.seek_ms],
+            "position_jumps": self.position_jumps,
+        }
+
+
+class PlaybackTelemetry:
+    """
+    播放指标采集：监听当前媒体播放器的信号，按播放会话记录
+    加载耗时、首帧耗时、缓冲进度、卡顿次数和时长、跳转延迟以及播放位置跳变，
+    汇总到指标注册表，每个会话结束时输出一条 session 事件。
+    """
+
+    MAX_SOURCE_NAMES = 64  # 保留的代理地址 -> 原始地址映射数
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.media_player = None
+        self.session = None
+        self.last_position = None  # (位置, 时间点)，暂停、卡顿和倍速变化时清空
+        self.pending_seek = None  # (目标位置, 开始时间点)
+        self.source_names = OrderedDict()  # 交给播放器的地址 -> 会话记录的原始地址
+
+    def attach(self, media_player):
+        """
+        开始监听播放器信号；播放器已加载媒体时（播放列表预加载）立即开始新会话。
+        """
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        self.media_player = media_player
+        media_player.sourceChanged.connect(self.on_source_changed)
+        media_player.mediaStatusChanged.connect(self.on_media_status)
+        media_player.bufferProgressChanged.connect(self.on_buffer_progress)
+        media_player.positionChanged.connect(self.on_position)
+        media_player.playbackStateChanged.connect(self.reset_position_baseline)
+        media_player.playbackRateChanged.connect(self.reset_position_baseline)
+        media_player.errorOccurred.connect(self.on_error)
+        sink = media_player.videoSink()
+        if sink is not None:
+            sink.videoFrameChanged.connect(self.on_video_frame)
+
+        if not media_player.source().isEmpty():
+            loaded = media_player.mediaStatus() in (
+                QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia
+            )
+            self.begin_session(media_player.source().toString(), preloaded=loaded)
+
+    def detach(self, media_player):
+        """
+        停止监听播放器信号。
+        """
+        media_player.sourceChanged.disconnect(self.on_source_changed)
+        media_player.mediaStatusChanged.disconnect(self.on_media_status)
+        media_player.bufferProgressChanged.disconnect(self.on_buffer_progress)
+        media_player.positionChanged.disconnect(self.on_position)
+        media_player.playbackStateChanged.disconnect(self.reset_position_baseline)
+        media_player.playbackRateChanged.disconnect(self.reset_position_baseline)
+        media_player.errorOccurred.disconnect(self.on_error)
+        sink = media_player.videoSink()
+        if sink is not None:
+            sink.videoFrameChanged.disconnect(self.on_video_frame)
+        self.end_session()
+        self.media_player = None
+
+    def name_source(self, source, original):
+        """
+        记录交给播放器的地址（如本地缓存代理地址）对应的原始地址，会话中记录原始地址。
+        """
+        self.source_names[source] = original
+        self.source_names.move_to_end(source)
+        while len(self.source_names) > self.MAX_SOURCE_NAMES:
+            self.source_names.popitem(last=False)
+
+    def begin_session(self, source, preloaded=False):
+        self.end_session()
+        self.session = PlaybackSession(self.source_names.get(source, source), preloaded)
+        self.last_position = None
+        self.pending_seek = None
+        self.registry.increment("sessions")
+
+    def end_session(self):
+        """
+        结束当前会话并输出汇总。
+        """
+        session = self.session
+        if session is None:
+            return
+        self.session = None
+        if session.stall_start is not None:
+            self._finish_stall(session)
+        self.registry.emit("session", **session.summary())
+
+    def on_source_changed(self, source):
+        if source.isEmpty():
+            self.end_session()
+        else:
+            self.begin_session(source.toString())
+
+    def on_media_status(self, status):
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        session = self.session
+        if session is None:
+            return
+        Status = QMediaPlayer.MediaStatus
+        if status in (Status.LoadedMedia, Status.BufferedMedia) and session.loaded_ms is None and not session.preloaded:
+            session.loaded_ms = round(session.elapsed_ms(), 1)
+            self.registry.observe("time_to_loaded", session.loaded_ms)
+        if status == Status.StalledMedia:
+            # 卡顿期间位置停止前进，恢复后重新建立位置基准
+            self.last_position = None
+        if status == Status.StalledMedia and session.stall_start is None:
+            session.stall_start = time.perf_counter()
+            session.stall_count += 1
+            self.registry.increment("stalls")
+            self.registry.emit("stall", source=session.source, position=self.media_player.position())
+        elif status != Status.StalledMedia and session.stall_start is not None:
+            self._finish_stall(session)
+        if status == Status.EndOfMedia:
+            self.end_session()
+        elif status == Status.InvalidMedia:
+            self.registry.increment("invalid_media")
+
+    def _finish_stall(self, session):
+        stall_ms = (time.perf_counter() - session.stall_start) * 1000
+        session.stall_start = None
+        session.stall_ms += stall_ms
+        self.registry.observe("stall_duration", stall_ms)
+
+    def on_buffer_progress(self, progress):
+        self.registry.set_gauge("buffer_progress", progress)
+        session = self.session
+        if session is not None and session.loaded_ms is not None:
+            # 开始播放后缓冲的最低点反映卡顿风险
+            session.min_buffer = progress if session.min_buffer is None else min(session.min_buffer, progress)
+
+    def on_video_frame(self, frame):
+        session = self.session
+        if session is not None and session.first_frame_ms is None and frame.isValid():
+            session.first_frame_ms = round(session.elapsed_ms(), 1)
+            self.registry.observe("time_to_first_frame", session.first_frame_ms)
+
+    def on_position(self, position):
+        session = self.session
+        if session is None:
+            return
+        now = time.perf_counter()
+        if session.first_position_ms is None and position > 0:
+            session.first_position_ms = round(session.elapsed_ms(), 1)
+            self.registry.observe("time_to_first_position", session.first_position_ms)
+
+        if self.pending_seek is not None:
+            target, started = self.pending_seek
+            if abs(position - target) <= SEEK_TOLERANCE:
+                latency = (now - started) * 1000
+                self.pending_seek = None
+                session.seek_ms.append(latency)
+                self.registry.observe("seek_latency", latency)
+        elif self.last_position is not None:
+            last, last_time = self.last_position
+            rate = self.media_player.playbackRate() if self.media_player else 1.0
+            expected = (now - last_time) * 1000 * rate
+            if abs((position - last) - expected) > POSITION_JUMP_THRESHOLD:
+                session.position_jumps += 1
+                self.registry.increment("position_jumps")
+                self.registry.emit("position_jump", source=session.source, position=position, previous=last)
+        self.last_position = (position, now)
+
+    def reset_position_baseline(self, *args):
+        """
+        播放状态或倍速变化后位置不再按原速度前进，丢弃基准，避免把暂停后恢复记为位置跳变。
+        """
+        self.last_position = None
+
+    def on_error(self, error, message):
+        self.registry.increment("errors")
+        self.registry.emit("error", source=self.session.source if self.session else None, message=message)
+
+    def note_seek(self, target):
+        """
+        记录一次主动跳转，位置到达目标时计算跳转延迟。
+        """
+        if self.session is None:
+            return
+        self.session.seek_count += 1
+        self.registry.increment("seeks")
+        self.pending_seek = (target, time.perf_counter())
+        self.last_position = None
+
+    def close(self):
+        if self.media_player is not None:
+            self.detach(self.media_player)
+        self.registry.close()
+
+
+# 进程级的指标注册表
+metrics = MetricsRegistry()
+
+
+def enable_telemetry(path=None):
+    """
+    启用播放指标采集，事件写入 JSONL 文件。
+    :return: PlaybackTelemetry 实例，交给 Player.set_telemetry() 使用
+    """
+    path = path or default_log_path()
+    metrics.add_sink(JsonlSink(path))
+    logging.info(f"播放指标写入: {path}")
+    return PlaybackTelemetry(metrics)
@@ -0,0 +1,371 @@
+import os
+import json
+import bisect
+import logging
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QThread, QTimer, QUrl, QMetaObject, Qt, Signal, Slot
+from PySide6.QtGui import QImage, QPainter
+
+from core.file import get_cache_dir
+from core.probe import media_key
+
+
+class ThumbnailStrip:
+    """
+    预览帧条带，多帧缩略图按行列拼接成一张精灵图。
+    """
+
+    def __init__(self, image, timestamps, tile_width, tile_height, columns):
+        self.image = image
+        self.timestamps = timestamps  # 每一帧对应的时间点（毫秒），升序
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.columns = columns
+
+    def frame_at(self, position):
+        """
+        获取距离指定时间点最近的一帧。
+        :param position: 时间点（毫秒）
+        :return: QImage，没有帧时返回 None
+        """
+        if not self.timestamps:
+            return None
+        index = bisect.bisect_left(self.timestamps, position)
+        if index == len(self.timestamps) or (
+            index > 0 and position - self.timestamps[index - 1] < self.timestamps[index] - position
+        ):
+            index -= 1
+        row, column = divmod(index, self.columns)
+        return self.image.copy(
+            column * self.tile_width, row * self.tile_height, self.tile_width, self.tile_height
+        )
+
+    def save(self, image_path, meta_path):
+        """
+        保存精灵图和描述信息。
+        """
+        if not self.image.save(image_path, "JPG", 80):
+            raise OSError(f"保存预览图失败: {image_path}")
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "timestamps": self.timestamps,
+                "tile_width": self.tile_width,
+                "tile_height": self.tile_height,
+                "columns": self.columns,
+            }, f)
+
+    @classmethod
+    def load(cls, image_path, meta_path):
+        """
+        从磁盘加载，文件缺失或损坏时返回 None。
+        """
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        image = QImage(image_path)
+        if image.isNull():
+            return None
+        return cls(image, meta["timestamps"], meta["tile_width"], meta["tile_height"], meta["columns"])
+
+
+class ThumbnailCache:
+    """
+    预览帧条带的磁盘缓存，按文件身份标识存储，总大小超出上限时淘汰最久未使用的条目。
+    """
+
+    DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or get_cache_dir("thumbnails")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # 键 -> 占用字节数，按最近使用排序
+        self._load_entries()
+
+    def _load_entries(self):
+        """
+        根据磁盘上文件的修改时间恢复使用顺序。
+        """
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".jpg"):
+                continue
+            key = name[:-4]
+            try:
+                size = sum(os.path.getsize(path) for path in self._paths(key))
+                found.append((os.path.getmtime(self._paths(key)[0]), key, size))
+            except OSError:
+                continue
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+
+    def _paths(self, key):
+        return (os.path.join(self.directory, f"{key}.jpg"), os.path.join(self.directory, f"{key}.json"))
+
+    def get(self, key):
+        """
+        读取缓存的条带，命中时更新使用时间。
+        """
+        if key is None or key not in self.entries:
+            return None
+        strip = ThumbnailStrip.load(*self._paths(key))
+        if strip is None:
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        try:
+            os.utime(self._paths(key)[0])
+        except OSError:
+            pass
+        return strip
+
+    def put(self, key, strip):
+        """
+        写入条带并按总大小淘汰旧条目。
+        """
+        paths = self._paths(key)
+        try:
+            strip.save(*paths)
+            self.entries[key] = sum(os.path.getsize(p) for p in paths)
+            self.entries.move_to_end(key)
+        except OSError as e:
+            logging.warning(f"写入预览缓存失败: {e}")
+            return
+
+        total = sum(self.entries.values())
+        while total > self.max_bytes and len(self.entries) > 1:
+            old_key, size = next(iter(self.entries.items()))
+            self._remove(old_key)
+            total -= size
+
+    def _remove(self, key):
+        self.entries.pop(key, None)
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ThumbnailWorker(QObject):
+    """
+    预览帧生成器，运行在独立线程中：先查磁盘缓存，未命中时使用单独的播放器和 QVideoSink 抓帧，
+    不影响正在播放的画面，生成的条带也在该线程写入缓存。
+    同一时间只处理一个文件，新的请求会取代未完成的请求。
+    """
+
+    # 文件路径, ThumbnailStrip 或 None
+    finished = Signal(str, object)
+
+    FRAME_COUNT = 60  # 每个文件抓取的帧数
+    COLUMNS = 10  # 精灵图每行的帧数
+    TILE_WIDTH = 160  # 缩略图宽度
+    FRAME_TIMEOUT_MS = 2000  # 单帧等待超时
+    FRAME_TOLERANCE_MS = 2000  # 帧时间与目标时间允许的偏差
+
+    def __init__(self, cache=None):
+        super().__init__()
+        self.cache = cache  # 首次请求时在工作线程中创建
+        self.player = None
+        self.sink = None
+        self.timer = None
+        self.reset_job()
+
+    def reset_job(self):
+        self.path = None
+        self.key = None
+        self.timestamps = []
+        self.index = 0
+        self.sprite = None
+        self.tile_height = 0
+        self.last_frame = None
+
+    def _ensure_player(self):
+        """
+        在工作线程中创建播放器，保证其属于该线程的事件循环。
+        """
+        if self.player is not None:
+            return
+        from PySide6.QtMultimedia import QMediaPlayer, QVideoSink
+
+        self.player = QMediaPlayer(self)
+        self.sink = QVideoSink(self)
+        self.player.setVideoSink(self.sink)
+        self.player.mediaStatusChanged.connect(self.on_media_status)
+        self.sink.videoFrameChanged.connect(self.on_frame)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.on_frame_timeout)
+
+    @Slot(str, str)
+    def generate(self, path, key):
+        """
+        获取文件的预览条带：缓存命中时直接返回，否则开始生成。
+        :param key: 文件记录键，为空时在此计算
+        """
+        if self.path is not None:
+            self.timer.stop()
+            self.player.setSource(QUrl())
+            self.finished.emit(self.path, None)
+            self.reset_job()
+        if self.cache is None:
+            self.cache = ThumbnailCache()
+        key = key or media_key(path)
+        if key is None:
+            self.finished.emit(path, None)
+            return
+        strip = self.cache.get(key)
+        if strip is not None:
+            self.finished.emit(path, strip)
+            return
+        self._ensure_player()
+        self.path = path
+        self.key = key
+        self.player.setSource(QUrl.fromLocalFile(path))
+
+    def on_media_status(self, status):
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        if self.path is None or self.timestamps:
+            return
+        if status == QMediaPlayer.MediaStatus.InvalidMedia:
+            self.finish(None)
+        elif status in (QMediaPlayer.MediaStatus.LoadedMedia, QMediaPlayer.MediaStatus.BufferedMedia):
+            duration = self.player.duration()
+            if not self.player.hasVideo() or duration <= 0:
+                self.finish(None)
+                return
+            # 取各区间的中点，避开片头片尾的黑场
+            self.timestamps = [
+                int(duration * (i + 0.5) / self.FRAME_COUNT) for i in range(self.FRAME_COUNT)
+            ]
+            self.player.pause()
+            self.request_frame()
+
+    def request_frame(self):
+        """
+        跳转到下一个时间点，全部完成后拼接结果。
+        """
+        if self.index >= len(self.timestamps):
+            strip = None
+            if self.sprite is not None:
+                strip = ThumbnailStrip(
+                    self.sprite, self.timestamps, self.TILE_WIDTH, self.tile_height, self.COLUMNS
+                )
+            self.finish(strip)
+            return
+        self.last_frame = None
+        self.timer.start(self.FRAME_TIMEOUT_MS)
+        self.player.setPosition(self.timestamps[self.index])
+
+    def on_frame(self, frame):
+        if self.path is None or not self.timestamps or not frame.isValid():
+            return
+        self.last_frame = frame
+        target = self.timestamps[self.index]
+        if abs(frame.startTime() // 1000 - target) <= self.FRAME_TOLERANCE_MS:
+            self.timer.stop()
+            self.store_frame(frame)
+
+    def on_frame_timeout(self):
+        """
+        等待超时时使用最近收到的一帧，没有则留空。
+        """
+        if self.last_frame is not None:
+            self.store_frame(self.last_frame)
+        else:
+            self.index += 1
+            self.request_frame()
+
+    def store_frame(self, frame):
+        """
+        缩放帧并绘制到精灵图的对应位置。
+        """
+        image = frame.toImage()
+        if self.sprite is None:
+            self.tile_height = max(1, image.height() * self.TILE_WIDTH // max(1, image.width()))
+            rows = (len(self.timestamps) + self.COLUMNS - 1) // self.COLUMNS
+            self.sprite = QImage(self.TILE_WIDTH * self.COLUMNS, self.tile_height * rows, QImage.Format.Format_RGB32)
+            self.sprite.fill(Qt.GlobalColor.black)
+
+        tile = image.scaled(
+            self.TILE_WIDTH, self.tile_height,
+            Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation
+        )
+        row, column = divmod(self.index, self.COLUMNS)
+        painter = QPainter(self.sprite)
+        painter.drawImage(column * self.TILE_WIDTH, row * self.tile_height, tile)
+        painter.end()
+
+        self.index += 1
+        self.request_frame()
+
+    def finish(self, strip):
+        path = self.path
+        if strip is not None:
+            self.cache.put(self.key, strip)
+        self.timer.stop()
+        self.reset_job()
+        self.player.setSource(QUrl())
+        self.finished.emit(path, strip)
+
+    @Slot()
+    def release(self):
+        """
+        释放工作线程中的播放器。
+        """
+        if self.player is not None:
+            self.player.setSource(QUrl())
+
+
+class ThumbnailService(QObject):
+    """
+    预览条带服务，在界面线程中使用：缓存读取和生成都在后台线程进行，结果通过 ready 信号返回。
+    """
+
+    # 文件路径, ThumbnailStrip
+    ready = Signal(str, object)
+    _generate = Signal(str, str)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.thread = None
+        self.worker = None
+        self.pending_path = None
+
+    def _ensure_worker(self):
+        if self.worker is not None:
+            return
+        self.thread = QThread(self)
+        self.thread.setObjectName("thumbnail-worker")
+        self.worker = ThumbnailWorker(self.cache)
+        self.worker.moveToThread(self.thread)
+        self._generate.connect(self.worker.generate)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.thread.start(QThread.Priority.LowPriority)
+
+    def request(self, path, key=None):
+        """
+        请求文件的预览条带，缓存命中或生成完成后由 ready 信号返回。
+        :param key: 已计算好的文件记录键，未提供时在后台线程中计算
+        """
+        self._ensure_worker()
+        self.pending_path = path
+        self._generate.emit(path, key or "")
+
+    def on_worker_finished(self, path, strip):
+        if strip is not None and path == self.pending_path:
+            self.ready.emit(path, strip)
+
+    def shutdown(self):
+        """
+        停止后台线程。
+        """
+        if self.thread is not None:
+            QMetaObject.invokeMethod(self.worker, "release", Qt.ConnectionType.BlockingQueuedConnection)
+            self.thread.quit()
+            self.thread.wait()
+            self.thread = None
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import multiprocessing
+
+from core.headless import (
+    DEFAULT_RATE, DEFAULT_TIMEOUT_MS, expand_sources, summarize_results
+)
+
+# 验证模式每个文件默认播放的媒体时长（毫秒），只需确认能够解码
+DEFAULT_VALIDATE_PLAY_MS = 1000
+
+# 每个工作进程处理多少个文件后重启，避免后端资源泄漏累积
+DEFAULT_RECYCLE_AFTER = 50
+
+# 工作进程内超时未生效（事件循环卡死）时，额外等待的时间（秒）
+HARD_TIMEOUT_GRACE = 10
+
+# 工作进程启动（导入 Qt 并初始化多媒体后端）的超时时间（秒）
+STARTUP_TIMEOUT = 60
+
+
+def worker_main(worker_id, task_queue, result_queue, options):
+    """
+    工作进程入口：运行独立的无界面 Qt 事件循环，从任务队列逐个读取文件验证，
+    每个文件的结果立即发回主进程；读取到 None 时退出。
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    logging.getLogger().setLevel(logging.ERROR)
+    from PySide6.QtWidgets import QApplication
+    from core.headless import BatchRunner
+
+    app = QApplication(sys.argv[:1])
+    runner = BatchRunner(iter(task_queue.get, None), **options)
+    runner.fileFinished.connect(lambda result: result_queue.put(("result", worker_id, result)))
+    runner.finished.connect(app.quit)
+    # 多媒体后端初始化成功后才报告就绪，后端不可用时视为启动失败
+    runner.player.init_player()
+    result_queue.put(("ready", worker_id, None))
+    runner.start()
+    app.exec()
+    runner.player.release_resources()
+
+
+class WorkerHandle:
+    """
+    主进程中对一个工作进程的记录，每个工作进程同时只处理一个文件，
+    以便崩溃或卡死时准确定位到出问题的文件。
+    """
+
+    def __init__(self, context, worker_id, result_queue, options):
+        self.worker_id = worker_id
+        self.task_queue = context.Queue()
+        self.process = context.Process(
+            target=worker_main, args=(worker_id, self.task_queue, result_queue, options),
+            name=f"validate-{worker_id}", daemon=True
+        )
+        self.process.start()
+        self.spawned_at = time.monotonic()
+        self.ready = False
+        self.current = None  # 正在处理的文件
+        self.started_at = None
+        self.completed = 0
+
+    def assign(self, source):
+        self.current = source
+        self.started_at = time.monotonic()
+        self.task_queue.put(source)
+
+    def finish(self):
+        self.current = None
+        self.started_at = None
+        self.completed += 1
+
+    def retire(self):
+        """
+        通知工作进程正常退出。
+        """
+        self.task_queue.put(None)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+
+
+class ValidationPool:
+    """
+    多进程媒体验证：把文件分发给 N 个各自运行无界面播放器的工作进程。
+    单个文件的超时由工作进程内部处理；工作进程崩溃或卡死时主进程将其终止，
+    把当前文件记为 crashed/hung 并启动新的工作进程继续；
+    每个工作进程处理一定数量的文件后重启。
+    """
+
+    def __init__(self, workers=None, recycle_after=DEFAULT_RECYCLE_AFTER, rate=DEFAULT_RATE,
+                 play_ms=DEFAULT_VALIDATE_PLAY_MS, timeout_ms=DEFAULT_TIMEOUT_MS, seek=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.recycle_after = recycle_after
+        self.timeout_ms = timeout_ms
+        self.options = {"rate": rate, "play_ms": play_ms, "timeout_ms": timeout_ms, "seek": seek}
+        # Qt 在 fork 出的子进程中不可用，统一使用 spawn
+        self.context = multiprocessing.get_context("spawn")
+        self.result_queue = self.context.Queue()
+        self.handles = {}
+        self.next_worker_id = 0
+        self.restarts = 0
+        self.startup_failures = 0  # 连续启动失败次数
+
+    def spawn(self):
+        handle = WorkerHandle(self.context, self.next_worker_id, self.result_queue, self.options)
+        self.handles[handle.worker_id] = handle
+        self.next_worker_id += 1
+        return handle
+
+    def replace(self, handle, pending):
+        """
+        替换退出或被终止的工作进程，还有待处理文件时启动新进程。
+        """
+        del self.handles[handle.worker_id]
+        self.restarts += 1
+        if pending:
+            self.spawn()
+
+    def run(self, sources, on_result=None):
+        """
+        验证全部文件。
+        :param on_result: 每个文件完成时的回调
+        :return: 结果列表，按输入顺序排列
+        """
+        pending = list(reversed(sources))
+        results = []
+        hard_timeout = self.timeout_ms / 1000 + HARD_TIMEOUT_GRACE
+
+        def record(result):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        for _ in range(min(self.workers, len(sources))):
+            self.spawn()
+
+        while self.handles:
+            for handle in list(self.handles.values()):
+                if handle.ready and handle.current is None:
+                    if pending:
+                        handle.assign(pending.pop())
+                    else:
+                        handle.retire()
+                        del self.handles[handle.worker_id]
+
+            try:
+                kind, worker_id, result = self.result_queue.get(timeout=0.2)
+            except queue.Empty:
+                kind = None
+            handle = self.handles.get(worker_id) if kind else None
+            if handle is not None:
+                if kind == "ready":
+                    handle.ready = True
+                    self.startup_failures = 0
+                elif kind == "result":
+                    handle.finish()
+                    result["worker"] = worker_id
+                    record(result)
+                    if handle.completed >= self.recycle_after:
+                        handle.retire()
+                        self.replace(handle, pending)
+
+            now = time.monotonic()
+            for handle in list(self.handles.values()):
+                if not handle.process.is_alive():
+                    status, error = "crashed", f"工作进程异常退出，退出码 {handle.process.exitcode}"
+                elif handle.current is not None and now - handle.started_at > hard_timeout:
+                    handle.kill()
+                    status, error = "hung", "工作进程无响应，已终止"
+                elif not handle.ready and now - handle.spawned_at > STARTUP_TIMEOUT:
+                    handle.kill()
+                    status, error = "crashed", "工作进程启动超时"
+                else:
+                    continue
+                if handle.current is not None:
+                    record({"source": handle.current, "status": status, "error": error, "worker": handle.worker_id})
+                elif not handle.ready:
+                    self.startup_failures += 1
+                    if self.startup_failures > self.workers:
+                        # 工作进程反复无法启动，多媒体后端不可用
+                        self.shutdown()
+                        raise RuntimeError(error)
+                self.replace(handle, pending)
+
+        order = {source: position for position, source in enumerate(sources)}
+        results.sort(key=lambda result: order.get(result["source"], len(order)))
+        return results
+
+    def shutdown(self):
+        """
+        终止所有工作进程。
+        """
+        for handle in self.handles.values():
+            handle.kill()
+        self.handles.clear()
+
+
+def run_validation(paths, workers=None, recycle_after=DEFAULT_RECYCLE_AFTER, rate=DEFAULT_RATE,
+                   play_ms=DEFAULT_VALIDATE_PLAY_MS, timeout_ms=DEFAULT_TIMEOUT_MS, seek=True, report_path=None):
+    """
+    运行多进程媒体验证，输出 JSON 报告。
+    :return: 进程退出码，存在失败的文件时为 1
+    """
+    sources = expand_sources(paths)
+    pool = ValidationPool(workers, recycle_after, rate, play_ms, timeout_ms, seek)
+    start = time.perf_counter()
+    results = pool.run(
+        sources,
+        on_result=lambda result: print(f"[{result['status']}] {result['source']}", file=sys.stderr)
+    )
+    elapsed = time.perf_counter() - start
+
+    summary = summarize_results(results)
+    summary.update({
+        "workers": pool.workers,
+        "worker_restarts": pool.restarts,
+        "wall_seconds": round(elapsed, 2),
+        "files_per_second": round(len(results) / elapsed, 2) if elapsed > 0 else None,
+    })
+    report = {"summary": summary, "results": results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0 if all(result["status"] == "ok" for result in results) else 1
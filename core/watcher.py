@@ -0,0 +1,327 @@
+import os
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, QTimer, QFileSystemWatcher, Signal
+
+from core.file import FileHandler
+from core.library import get_library_extensions, normalize_roots, scan_directory
+
+
+def collect_directories(root):
+    """
+    收集目录树下的全部目录（含根目录），跳过隐藏目录和符号链接。
+    """
+    directories = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        directories.append(directory)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return directories
+
+
+class LibraryWatcher(QObject):
+    """
+    媒体库目录监听器，开始监听前先增量扫描目录，之后文件变化时增量更新索引。
+    目录数量较少时使用 QFileSystemWatcher 监听变化，目录过多时改为轮询：每次只检查各目录的修改时间，
+    文件原地增长不会改变目录的修改时间，因此最近有变化的目录每次还检查其中文件的大小和修改时间，
+    其余目录的文件按 FILE_SWEEP_MS 的周期分批轮流检查，空闲时每次轮询的开销接近只 stat 目录。
+    变化事件经过防抖合并后交给后台线程处理，界面线程只负责计时和维护监听列表。
+    """
+
+    # 新增或变化的文件路径列表, 删除的文件路径列表
+    libraryChanged = Signal(list, list)
+    # 开始监听前的扫描完成：ScanResult, 索引中的文件总数
+    indexed = Signal(object, int)
+
+    # 后台线程通知界面线程的内部信号
+    _directoriesFound = Signal(str, list)
+    _batchProcessed = Signal(str, list, list)
+    _pollingReady = Signal()
+
+    DEBOUNCE_MS = 300  # 最后一次变化后等待的时间
+    MAX_DELAY_MS = 800  # 持续变化时最长的合并时间
+    POLL_INTERVAL_MS = 3000  # 轮询模式下的检查间隔
+    RECENT_CHANGE_MS = 60000  # 目录有变化后，在这段时间内每次轮询都检查其中的文件
+    FILE_SWEEP_MS = 600000  # 轮询模式下全部目录的文件检查一遍的周期
+    MAX_WATCHED_DIRECTORIES = 4000  # 超过该目录数时改用轮询
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self.extensions = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="library-watch")
+
+        # 事件监听模式的状态，只在界面线程访问
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self.on_directory_changed)
+        self.watched = {}  # 目录 -> 根目录
+        self.pending = {}  # 待处理的目录 -> 根目录
+        self.first_pending_time = None
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.timeout.connect(self.flush_pending)
+
+        self.polled = set()  # 已改为轮询的根目录，只在界面线程访问
+        # 轮询模式的状态，只在后台线程访问
+        self.poll_roots = {}  # 根目录 -> {目录: 目录签名}
+        self.recent = {}  # 最近有变化的目录 -> 最后一次变化的时间
+        self.sweep_queue = deque()  # 本轮尚未检查文件的 (根目录, 目录)
+        self.poll_running = False
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.schedule_poll)
+
+        self._directoriesFound.connect(self.on_directories_found)
+        self._batchProcessed.connect(self.on_batch_processed)
+        self._pollingReady.connect(self.poll_timer.start)
+
+    def watch(self, root=None):
+        """
+        将目录加入媒体库，扫描后开始监听，默认监听下载文件夹。
+        """
+        root = os.path.abspath(root or FileHandler.get_default_download_folder())
+        if not os.path.isdir(root):
+            logging.warning(f"监听目录不存在: {root}")
+            return
+        self.executor.submit(self._index, [root])
+
+    def watch_library(self, roots=()):
+        """
+        添加目录后扫描并监听媒体库的全部扫描目录。
+        """
+        self.executor.submit(self._index, list(roots), True)
+
+    def stop(self):
+        """
+        停止监听并等待后台任务结束。
+        """
+        self.debounce_timer.stop()
+        self.poll_timer.stop()
+        if self.watched:
+            self.fs_watcher.removePaths(list(self.watched))
+        self.watched.clear()
+        self.pending.clear()
+        self.executor.shutdown(wait=True)
+
+    def _get_extensions(self):
+        if self.extensions is None:
+            self.extensions = get_library_extensions()
+        return self.extensions
+
+    def _index(self, roots, all_roots=False):
+        """
+        后台线程：添加并扫描目录，然后收集目录树通知界面线程添加监听。
+        :param all_roots: 扫描并监听媒体库的全部扫描目录
+        """
+        try:
+            # 已被其他扫描目录包含的目录由包含它的目录负责
+            roots = [self.library.add_root(root) for root in roots]
+            roots = normalize_roots(self.library.roots() if all_roots else roots)
+            if not roots:
+                return
+            result = self.library.scan(roots)
+            self.indexed.emit(result, self.library.count())
+            for root in roots:
+                self._directoriesFound.emit(root, collect_directories(root))
+        except Exception as e:
+            logging.error(f"扫描媒体库目录失败: {e}")
+
+    def on_directories_found(self, root, directories):
+        """
+        添加目录监听，目录过多时该根目录改为轮询模式。
+        """
+        if root in self.polled:
+            return
+        if len(self.watched) + len(directories) > self.MAX_WATCHED_DIRECTORIES:
+            logging.info(f"目录数量过多，使用轮询方式监听: {root}")
+            # 轮询状态交给后台线程维护，界面线程只记录该根目录已改为轮询
+            self.polled.add(root)
+            watched_under_root = [path for path, path_root in self.watched.items() if path_root == root]
+            for path in watched_under_root:
+                del self.watched[path]
+            if watched_under_root:
+                self.fs_watcher.removePaths(watched_under_root)
+            self.executor.submit(self._start_polling, root)
+            return
+
+        new_directories = [directory for directory in directories if directory not in self.watched]
+        for directory in directories:
+            # 上级目录加入媒体库后，原有子目录的记录改为归属上级目录
+            self.watched[directory] = root
+        if new_directories:
+            failed = self.fs_watcher.addPaths(new_directories)
+            for directory in failed:
+                self.watched.pop(directory, None)
+
+    def on_directory_changed(self, directory):
+        """
+        目录发生变化，加入待处理集合并防抖。
+        """
+        root = self.watched.get(directory)
+        if root is None:
+            return
+        self.pending[directory] = root
+
+        now = time.monotonic()
+        if self.first_pending_time is None:
+            self.first_pending_time = now
+        waited_ms = (now - self.first_pending_time) * 1000
+        # 持续有变化时不再推迟，保证最长合并时间
+        self.debounce_timer.start(max(0, min(self.DEBOUNCE_MS, int(self.MAX_DELAY_MS - waited_ms))))
+
+    def flush_pending(self):
+        """
+        将合并后的变化目录交给后台线程处理。
+        """
+        batch = self.pending
+        self.pending = {}
+        self.first_pending_time = None
+        for directory, root in batch.items():
+            self.executor.submit(self._process_directory, root, directory, set(self.watched))
+
+    def _process_directory(self, root, directory, watched):
+        """
+        后台线程：刷新单个目录的索引，发现新增或删除的子目录。
+        """
+        if not os.path.isdir(directory):
+            removed = self.library.remove_tree(directory)
+            self._batchProcessed.emit(directory, [], removed)
+            return
+
+        changed, removed = self.library.refresh_directory(directory, root, self._get_extensions())
+        _, subdirectories = scan_directory(directory, ())
+        for subdirectory in subdirectories:
+            if subdirectory not in watched:
+                # 新出现的子目录，扫描整棵子树并加入监听
+                new_directories = collect_directories(subdirectory)
+                for path in new_directories:
+                    new_changed, new_removed = self.library.refresh_directory(path, root, self._get_extensions())
+                    changed.extend(new_changed)
+                    removed.extend(new_removed)
+                self._directoriesFound.emit(root, new_directories)
+        self._batchProcessed.emit(directory, changed, removed)
+
+    def on_batch_processed(self, directory, changed, removed):
+        """
+        后台处理完成，清理已删除目录的监听并通知索引变化。
+        """
+        if not os.path.isdir(directory):
+            prefix = os.path.join(directory, "")
+            gone = [path for path in self.watched if path == directory or path.startswith(prefix)]
+            for path in gone:
+                self.watched.pop(path, None)
+            if gone:
+                self.fs_watcher.removePaths(gone)
+        if changed or removed:
+            self.libraryChanged.emit(changed, removed)
+
+    def _start_polling(self, root):
+        """
+        后台线程：记录各目录的签名，开始轮询。
+        """
+        if root in self.poll_roots:
+            return
+        self.poll_roots[root] = {directory: self._scan(directory)[0] for directory in collect_directories(root)}
+        self._pollingReady.emit()
+
+    def schedule_poll(self):
+        """
+        定期检查轮询目录，上一次检查未完成时跳过。
+        """
+        if not self.poll_running:
+            self.poll_running = True
+            self.executor.submit(self._poll)
+
+    @staticmethod
+    def _mtime(directory):
+        try:
+            return os.stat(directory).st_mtime
+        except OSError:
+            return None
+
+    def _scan(self, directory):
+        """
+        后台线程：扫描单个目录。
+        签名由目录修改时间和其中媒体文件的大小、修改时间组成，文件增删和原地修改都会改变签名。
+        :return: (签名, 媒体文件列表, 子目录列表)，目录不存在时签名为 None
+        """
+        mtime = self._mtime(directory)
+        if mtime is None:
+            return None, [], []
+        files, subdirectories = scan_directory(directory, self._get_extensions())
+        return (mtime, hash(frozenset(files))), files, subdirectories
+
+    def _next_sweep(self):
+        """
+        后台线程：取出本次需要检查文件的一批目录，全部目录在 FILE_SWEEP_MS 内轮流检查一遍。
+        """
+        if not self.sweep_queue:
+            self.sweep_queue.extend(
+                (root, directory) for root, signatures in self.poll_roots.items() for directory in signatures
+            )
+        ticks = max(1, self.FILE_SWEEP_MS // self.POLL_INTERVAL_MS)
+        count = min(len(self.sweep_queue), -(-sum(map(len, self.poll_roots.values())) // ticks))
+        return {self.sweep_queue.popleft() for _ in range(count)}
+
+    def _poll(self):
+        """
+        后台线程：检查各目录的修改时间，只对修改时间变化、最近有变化或轮到检查文件的目录扫描文件，
+        签名变化时更新索引。
+        """
+        try:
+            changed, removed = [], []
+            now = time.monotonic()
+            recent_seconds = self.RECENT_CHANGE_MS / 1000
+            for directory, changed_at in list(self.recent.items()):
+                if now - changed_at > recent_seconds:
+                    del self.recent[directory]
+            sweep = self._next_sweep()
+            for root, signatures in self.poll_roots.items():
+                for directory, previous in list(signatures.items()):
+                    if directory not in signatures:
+                        continue  # 已随上级目录一起删除
+                    mtime = self._mtime(directory)
+                    if mtime is None:
+                        removed.extend(self.library.remove_tree(directory))
+                        prefix = os.path.join(directory, "")
+                        for path in [path for path in signatures if path == directory or path.startswith(prefix)]:
+                            del signatures[path]
+                            self.recent.pop(path, None)
+                        continue
+                    if (previous is not None and mtime == previous[0] and directory not in self.recent
+                            and (root, directory) not in sweep):
+                        continue
+                    current, files, subdirectories = self._scan(directory)
+                    if current is None or current == previous:
+                        continue
+
+                    signatures[directory] = current
+                    self.recent[directory] = now
+                    new_changed, new_removed = self.library.refresh_directory(directory, root, files=files)
+                    changed.extend(new_changed)
+                    removed.extend(new_removed)
+                    for subdirectory in subdirectories:
+                        if subdirectory in signatures:
+                            continue
+                        for path in collect_directories(subdirectory):
+                            signatures[path], files, _ = self._scan(path)
+                            self.recent[path] = now
+                            new_changed, new_removed = self.library.refresh_directory(path, root, files=files)
+                            changed.extend(new_changed)
+                            removed.extend(new_removed)
+            if changed or removed:
+                self.libraryChanged.emit(changed, removed)
+        except Exception as e:
+            logging.error(f"轮询媒体库目录失败: {e}")
+        finally:
+            self.poll_running = False
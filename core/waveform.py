@@ -0,0 +1,400 @@
+import os
+import json
+import time
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QThread, Qt, Signal, Slot
+
+from core.file import get_cache_dir
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺少时波形降采样计算，频谱不可用
+    np = None
+
+# 采样格式名称 -> (NumPy 类型, array 类型码, 零点偏移, 满幅值)
+SAMPLE_FORMATS = {
+    "UInt8": ("u1", "B", 128, 128.0),
+    "Int16": ("<i2", "h", 0, 32768.0),
+    "Int32": ("<i4", "i", 0, 2147483648.0),
+    "Float": ("<f4", "f", 0, 1.0),
+}
+
+# 没有 NumPy 时每隔多少个采样取一个，控制纯 Python 计算量
+FALLBACK_STRIDE = 16
+
+
+def has_numpy():
+    return np is not None
+
+
+def make_audio_format(sample_rate, channels=1):
+    """
+    创建 32 位浮点 PCM 格式，交给解码器或音频缓冲输出做格式转换。
+    """
+    from PySide6.QtMultimedia import QAudioFormat
+
+    audio_format = QAudioFormat()
+    audio_format.setSampleRate(sample_rate)
+    audio_format.setChannelCount(channels)
+    audio_format.setSampleFormat(QAudioFormat.SampleFormat.Float)
+    return audio_format
+
+
+def buffer_samples(buffer):
+    """
+    将 QAudioBuffer 转换为 [-1, 1] 范围的浮点采样。
+    :return: (采样, 声道数, 采样率)；有 NumPy 时采样为 (帧数, 声道数) 的 float32 数组，
+             否则为按 FALLBACK_STRIDE 抽取的交错采样列表；格式不支持时返回 None
+    """
+    audio_format = buffer.format()
+    spec = SAMPLE_FORMATS.get(audio_format.sampleFormat().name)
+    channels = audio_format.channelCount()
+    if spec is None or channels <= 0 or buffer.byteCount() == 0:
+        return None
+    dtype, typecode, offset, scale = spec
+    data = buffer.constData()
+
+    if np is not None:
+        samples = np.frombuffer(data, dtype=dtype, count=buffer.sampleCount()).astype(np.float32)
+        if offset:
+            samples -= offset
+        if scale != 1.0:
+            samples *= 1.0 / scale
+        return samples.reshape(-1, channels), channels, audio_format.sampleRate()
+
+    values = array(typecode)
+    values.frombytes(bytes(data)[:buffer.sampleCount() * values.itemsize])
+    return [(value - offset) / scale for value in values[::FALLBACK_STRIDE]], channels, audio_format.sampleRate()
+
+
+def reduce_bins(peaks, squares, counts, size):
+    """
+    把细粒度的分段合并为 size 段：峰值取最大值，均方根按采样数加权。
+    :return: (峰值列表, 均方根列表)
+    """
+    total = len(peaks)
+    if total == 0 or size <= 0:
+        return [], []
+    size = min(size, total)
+
+    if np is not None:
+        edges = np.linspace(0, total, size + 1).astype(np.int64)[:-1]
+        peak = np.maximum.reduceat(np.asarray(peaks, dtype=np.float64), edges)
+        energy = np.add.reduceat(np.asarray(squares, dtype=np.float64), edges)
+        count = np.add.reduceat(np.asarray(counts, dtype=np.float64), edges)
+        rms = np.sqrt(energy / np.maximum(count, 1))
+        return peak.round(4).tolist(), rms.round(4).tolist()
+
+    peak, rms = [], []
+    for i in range(size):
+        start, end = total * i // size, total * (i + 1) // size
+        peak.append(round(max(peaks[start:end]), 4))
+        count = sum(counts[start:end])
+        rms.append(round((sum(squares[start:end]) / count) ** 0.5 if count else 0.0, 4))
+    return peak, rms
+
+
+class Waveform:
+    """
+    整个文件的降采样波形，每个点保存该时间段的峰值和均方根（0~1）。
+    """
+
+    def __init__(self, peaks, rms, duration):
+        self.peaks = peaks
+        self.rms = rms
+        self.duration = duration  # 毫秒
+
+    def columns(self, count):
+        """
+        按显示宽度重新合并，每列对应一个点。
+        """
+        if count >= len(self.peaks):
+            return self.peaks, self.rms
+        squares = [value * value for value in self.rms]
+        return reduce_bins(self.peaks, squares, [1] * len(squares), count)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"peaks": self.peaks, "rms": self.rms, "duration": self.duration}, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        """
+        从磁盘加载，文件缺失或损坏时返回 None。
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data["peaks"], data["rms"], data["duration"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+class WaveformBuilder:
+    """
+    逐块累积解码后的 PCM，按固定时长分段统计峰值和能量。
+    解码器送来的缓冲区较小，先攒够 BATCH_SECONDS 再整批向量化计算，减少逐块处理的开销。
+    """
+
+    POINTS = 2000  # 缓存的波形点数
+    BIN_MS = 50  # 细粒度分段时长
+    BATCH_SECONDS = 2.0  # 每批处理的音频时长
+
+    def __init__(self):
+        self.pending = []
+        self.pending_frames = 0
+        self.sample_rate = 0
+        self.peaks = []
+        self.squares = []
+        self.counts = []
+        self.frames = 0
+
+    def add_samples(self, samples, channels, sample_rate):
+        """
+        添加一块由 buffer_samples 转换好的采样。
+        """
+        if sample_rate != self.sample_rate:
+            # 采样率变化（通常只在开头发生）时先处理已有数据
+            self.process(final=True)
+            self.sample_rate = sample_rate
+        frames = len(samples) if np is not None else len(samples) * FALLBACK_STRIDE // channels
+        self.frames += frames
+        self.pending.append(samples)
+        self.pending_frames += frames
+        if self.pending_frames >= self.BATCH_SECONDS * sample_rate:
+            self.process()
+
+    def process(self, final=False):
+        """
+        处理已攒下的数据，不足一个分段的尾部留到下一批，final 时一并处理。
+        """
+        if not self.pending or self.sample_rate <= 0:
+            return
+        bin_frames = max(1, self.sample_rate * self.BIN_MS // 1000)
+
+        if np is not None:
+            samples = np.concatenate(self.pending) if len(self.pending) > 1 else self.pending[0]
+            amplitude = np.abs(samples).max(axis=1)
+            energy = np.square(samples).mean(axis=1)
+            whole = len(amplitude) // bin_frames * bin_frames
+            if whole:
+                self.peaks.extend(amplitude[:whole].reshape(-1, bin_frames).max(axis=1).tolist())
+                self.squares.extend(energy[:whole].reshape(-1, bin_frames).sum(axis=1).tolist())
+                self.counts.extend([bin_frames] * (whole // bin_frames))
+            rest = samples[whole:]
+            if final and len(rest):
+                self.peaks.append(float(amplitude[whole:].max()))
+                self.squares.append(float(energy[whole:].sum()))
+                self.counts.append(len(rest))
+                rest = rest[:0]
+            self.pending = [rest] if len(rest) else []
+            self.pending_frames = len(rest)
+            return
+
+        # 没有 NumPy 时采样已被抽取，按抽取后的数量分段
+        values = [value for chunk in self.pending for value in chunk]
+        step = max(1, bin_frames // FALLBACK_STRIDE)
+        whole = len(values) if final else len(values) // step * step
+        for start in range(0, whole, step):
+            chunk = values[start:start + step]
+            self.peaks.append(max(abs(value) for value in chunk))
+            self.squares.append(sum(value * value for value in chunk))
+            self.counts.append(len(chunk))
+        rest = values[whole:]
+        self.pending = [rest] if rest else []
+        self.pending_frames = len(rest) * FALLBACK_STRIDE
+
+    def result(self, points=POINTS):
+        """
+        生成指定点数的波形，没有解码到任何数据时返回 None。
+        """
+        self.process(final=True)
+        if not self.peaks:
+            return None
+        peaks, rms = reduce_bins(self.peaks, self.squares, self.counts, points)
+        duration = self.frames * 1000 // self.sample_rate if self.sample_rate else 0
+        return Waveform(peaks, rms, duration)
+
+
+class WaveformCache:
+    """
+    波形的磁盘缓存，按文件身份标识存储，条目数超出上限时淘汰最久未使用的条目。
+    """
+
+    DEFAULT_MAX_ENTRIES = 2000
+
+    def __init__(self, directory=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory or get_cache_dir("waveforms")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # 键 -> None，按最近使用排序
+        found = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    found.append((os.path.getmtime(os.path.join(self.directory, name)), name[:-5]))
+                except OSError:
+                    continue
+        for _, key in sorted(found):
+            self.entries[key] = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        if key is None or key not in self.entries:
+            return None
+        waveform = Waveform.load(self._path(key))
+        if waveform is None:
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return waveform
+
+    def put(self, key, waveform):
+        try:
+            waveform.save(self._path(key))
+        except OSError as e:
+            logging.warning(f"写入波形缓存失败: {e}")
+            return
+        self.entries[key] = None
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        self.entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class SpectrumWorker(QObject):
+    """
+    频谱计算，运行在独立线程中：对最近的采样加汉宁窗做 FFT，按对数间隔合并为若干频段。
+    """
+
+    # 各频段电平（0~1）
+    spectrumReady = Signal(list)
+
+    FFT_SIZE = 1024
+    BANDS = 32
+    MIN_FREQUENCY = 40
+    FLOOR_DB = -70.0  # 低于该电平显示为 0
+
+    def __init__(self):
+        super().__init__()
+        self.window = np.hanning(self.FFT_SIZE).astype(np.float32)
+        # 满幅正弦波加汉宁窗后的幅度，作为 0 dB 参考
+        self.reference = self.FFT_SIZE / 4
+        self.history = np.zeros(self.FFT_SIZE, dtype=np.float32)
+        self.band_edges = None
+        self.sample_rate = 0
+
+    def _ensure_bands(self, sample_rate):
+        """
+        按采样率计算各频段在 FFT 结果中的起始下标。
+        """
+        if sample_rate == self.sample_rate:
+            return
+        self.sample_rate = sample_rate
+        bins = self.FFT_SIZE // 2 + 1
+        resolution = sample_rate / self.FFT_SIZE
+        frequencies = np.geomspace(self.MIN_FREQUENCY, sample_rate / 2, self.BANDS + 1)[:-1]
+        edges = np.clip((frequencies / resolution).astype(np.int64), 1, bins - 1)
+        # 低频段可能落在同一个 FFT 下标上，合并重复的起始下标
+        self.band_edges = np.unique(edges)
+
+    @Slot(object)
+    def analyze(self, buffer):
+        converted = buffer_samples(buffer)
+        if converted is None:
+            self.spectrumReady.emit([])
+            return
+        samples, _, sample_rate = converted
+        mono = samples.mean(axis=1)
+        # 缓冲区短于 FFT 长度时与之前的采样拼接
+        self.history = np.concatenate((self.history, mono))[-self.FFT_SIZE:]
+        self._ensure_bands(sample_rate)
+
+        magnitude = np.abs(np.fft.rfft(self.history * self.window))
+        bands = np.maximum.reduceat(magnitude, self.band_edges)
+        level = 20 * np.log10(bands / self.reference + 1e-9)
+        level = np.clip(1 - level / self.FLOOR_DB, 0.0, 1.0)
+        self.spectrumReady.emit(level.astype(np.float64).round(3).tolist())
+
+
+class SpectrumAnalyzer(QObject):
+    """
+    播放中的实时频谱，通过 QAudioBufferOutput 获取播放器送往声卡的 PCM。
+    音频缓冲在播放线程中直接处理：同一时间只有一个缓冲在计算，
+    且每秒最多计算 MAX_FPS 次，多出的缓冲直接丢弃，保证播放时的额外 CPU 占用很低。
+    需要 NumPy。
+    """
+
+    # 各频段电平（0~1），停止播放时为空列表
+    spectrumReady = Signal(list)
+    _analyze = Signal(object)
+
+    MAX_FPS = 30
+    SAMPLE_RATE = 22050  # 请求的输出采样率，频谱上限为其一半
+
+    def __init__(self, parent=None):
+        from PySide6.QtMultimedia import QAudioBufferOutput
+
+        super().__init__(parent)
+        self.output = QAudioBufferOutput(make_audio_format(self.SAMPLE_RATE), self)
+        # 直接在送出缓冲的线程中调用，只做限流判断
+        self.output.audioBufferReceived.connect(self.on_buffer, Qt.ConnectionType.DirectConnection)
+
+        self.lock = threading.Lock()
+        self.busy = False
+        self.last_dispatch = 0.0
+        self.interval = 1.0 / self.MAX_FPS
+        self.dropped_buffers = 0
+
+        self.thread = QThread(self)
+        self.thread.setObjectName("spectrum-worker")
+        self.worker = SpectrumWorker()
+        self.worker.moveToThread(self.thread)
+        self._analyze.connect(self.worker.analyze)
+        self.worker.spectrumReady.connect(self.on_spectrum)
+        self.thread.start(QThread.Priority.LowPriority)
+
+    def attach(self, media_player):
+        media_player.setAudioBufferOutput(self.output)
+
+    def detach(self, media_player):
+        media_player.setAudioBufferOutput(None)
+
+    def on_buffer(self, buffer):
+        now = time.monotonic()
+        with self.lock:
+            if self.busy or now - self.last_dispatch < self.interval:
+                self.dropped_buffers += 1
+                return
+            self.busy = True
+            self.last_dispatch = now
+        self._analyze.emit(buffer)
+
+    def on_spectrum(self, levels):
+        with self.lock:
+            self.busy = False
+        if levels:
+            self.spectrumReady.emit(levels)
+
+    def shutdown(self):
+        """
+        停止后台线程。
+        """
+        self.output.audioBufferReceived.disconnect(self.on_buffer)
+        self.thread.quit()
+        self.thread.wait()
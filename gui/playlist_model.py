@@ -0,0 +1,76 @@
+import os
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PySide6.QtGui import QFont
+
+
+class PlaylistModel(QAbstractListModel):
+    """
+    播放列表的窗口化模型。
+    只向视图暴露已加载条目中的一个窗口，视图滚动到底部时再通过 fetchMore 扩展，
+    避免超大播放列表一次性创建全部行。
+    """
+
+    WINDOW_SIZE = 500  # 每次向视图暴露的行数
+
+    def __init__(self, playlist, parent=None):
+        super().__init__(parent)
+        self.playlist = playlist
+        self.visible_rows = 0
+        self.generation = playlist.generation
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.visible_rows
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.visible_rows:
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            entry = self.playlist.entries[row]
+            name = entry if entry.startswith(('http://', 'https://')) else os.path.basename(entry)
+            return f"{row + 1}. {name}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.playlist.resolve(row)
+        if role == Qt.ItemDataRole.FontRole and row == self.playlist.current_index:
+            font = QFont()
+            font.setBold(True)
+            return font
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self.visible_rows < len(self.playlist)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.WINDOW_SIZE, len(self.playlist) - self.visible_rows)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.visible_rows, self.visible_rows + count - 1)
+        self.visible_rows += count
+        self.endInsertRows()
+
+    def sync(self):
+        """
+        播放列表变化后同步模型：列表被替换时重置，窗口未填满时补齐新条目。
+        """
+        if self.generation != self.playlist.generation:
+            self.beginResetModel()
+            self.generation = self.playlist.generation
+            self.visible_rows = 0
+            self.endResetModel()
+        if self.visible_rows < self.WINDOW_SIZE:
+            self.fetchMore()
+
+    def refresh_current(self):
+        """
+        当前条目变化后刷新高亮显示。
+        """
+        if self.visible_rows:
+            self.dataChanged.emit(
+                self.index(0), self.index(self.visible_rows - 1), [Qt.ItemDataRole.FontRole]
+            )
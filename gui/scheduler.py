@@ -0,0 +1,61 @@
+from PySide6.QtCore import QObject, QTimer
+
+
+class UiRefreshScheduler(QObject):
+    """
+    界面刷新调度器。
+    播放器信号只记录最新值，由定时器按固定频率合并为一次界面刷新；
+    没有变化时定时器停止，窗口隐藏或最小化时跳过刷新，恢复显示后补上一次。
+    """
+
+    DEFAULT_RATE = 10  # 每秒刷新次数
+
+    def __init__(self, widget, render, rate=DEFAULT_RATE):
+        """
+        :param widget: 所属窗口，用于判断是否可见
+        :param render: 刷新回调，参数为 {键: 最新值}
+        :param rate: 每秒刷新次数
+        """
+        super().__init__(widget)
+        self.widget = widget
+        self.render = render
+        self.pending = {}
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        """
+        设置刷新频率。
+        """
+        self.timer.setInterval(max(1, int(1000 / rate)))
+
+    def request(self, key, value):
+        """
+        记录一项变化，等待下一次刷新。
+        """
+        self.pending[key] = value
+        if not self.timer.isActive() and self.is_widget_visible():
+            self.timer.start()
+
+    def is_widget_visible(self):
+        return self.widget.isVisible() and not self.widget.isMinimized()
+
+    def flush(self):
+        """
+        执行一次刷新，没有待处理的变化时停止定时器。
+        """
+        if not self.pending or not self.is_widget_visible():
+            self.timer.stop()
+            return
+        changes = self.pending
+        self.pending = {}
+        self.render(changes)
+
+    def resume(self):
+        """
+        窗口重新显示后立即刷新积压的变化。
+        """
+        if self.pending and self.is_widget_visible():
+            self.flush()
+            self.timer.start()
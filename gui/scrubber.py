@@ -0,0 +1,99 @@
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class SeekCoalescer(QObject):
+    """
+    拖动进度条时的实时跳转调度。
+    同一时间只有一个跳转在进行，拖动中产生的新目标只保留最新的一个，
+    上一个跳转完成（出现新画面或位置更新）后再发出；
+    两次跳转之间的间隔按实测的跳转延迟自适应调整，后端越慢跳转越稀疏，不会堆积请求。
+    """
+
+    # 单次跳转的实测延迟（毫秒）
+    latencyMeasured = Signal(float)
+
+    MIN_INTERVAL_MS = 16  # 最小跳转间隔，约每秒 60 次
+    MAX_INTERVAL_MS = 250  # 最大跳转间隔
+    INTERVAL_FACTOR = 0.5  # 间隔为平均延迟的倍数，给画面显示留出时间
+    COMPLETION_TIMEOUT_MS = 500  # 迟迟没有完成信号时视为已完成
+    SMOOTHING = 0.3  # 延迟的指数平均系数
+
+    def __init__(self, seek, parent=None):
+        """
+        :param seek: 执行跳转的函数，参数为目标位置（毫秒）
+        """
+        super().__init__(parent)
+        self.seek = seek
+        self.target = None  # 等待发出的最新目标
+        self.issued_at = None  # 正在进行的跳转的发出时间
+        self.completed_at = 0.0
+        self.latency_ms = None  # 平均跳转延迟
+        self.issued = 0
+        self.coalesced = 0  # 被更新的目标取代而没有发出的请求数
+
+        self.wait_timer = QTimer(self)
+        self.wait_timer.setSingleShot(True)
+        self.wait_timer.timeout.connect(self.dispatch)
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.timeout.connect(self.seek_completed)
+
+    def interval_ms(self):
+        """
+        当前的最小跳转间隔。
+        """
+        if self.latency_ms is None:
+            return self.MIN_INTERVAL_MS
+        return min(self.MAX_INTERVAL_MS, max(self.MIN_INTERVAL_MS, self.latency_ms * self.INTERVAL_FACTOR))
+
+    def request(self, position):
+        """
+        记录新的跳转目标，能立即发出时立即发出。
+        """
+        if self.target is not None:
+            self.coalesced += 1
+        self.target = position
+        self.dispatch()
+
+    def dispatch(self):
+        if self.target is None or self.issued_at is not None:
+            return
+        wait = self.completed_at + self.interval_ms() / 1000 - time.perf_counter()
+        if wait > 0:
+            if not self.wait_timer.isActive():
+                self.wait_timer.start(int(wait * 1000) + 1)
+            return
+        position = self.target
+        self.target = None
+        self.issued += 1
+        self.issued_at = time.perf_counter()
+        self.timeout_timer.start(self.COMPLETION_TIMEOUT_MS)
+        self.seek(position)
+
+    def seek_completed(self, *args):
+        """
+        跳转完成的通知，连接到视频帧或位置变化信号，超时也按完成处理。
+        """
+        if self.issued_at is None:
+            return
+        now = time.perf_counter()
+        latency = (now - self.issued_at) * 1000
+        self.latency_ms = latency if self.latency_ms is None else (
+            self.SMOOTHING * latency + (1 - self.SMOOTHING) * self.latency_ms
+        )
+        self.issued_at = None
+        self.completed_at = now
+        self.timeout_timer.stop()
+        self.latencyMeasured.emit(latency)
+        self.dispatch()
+
+    def stop(self):
+        """
+        结束拖动，丢弃未发出的目标；平均延迟保留给下一次拖动使用。
+        """
+        self.target = None
+        self.issued_at = None
+        self.wait_timer.stop()
+        self.timeout_timer.stop()
@@ -1,37 +1,62 @@
+import os
 import sys
-import time
-from PySide6.QtCore import Qt
+from urllib.parse import urlsplit
+from PySide6.QtCore import Qt, QTimer, QPoint, QEvent
+from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import (
     QApplication, QPushButton, QVBoxLayout, QHBoxLayout, QSlider, QLabel, QSizePolicy,
-    QMessageBox
+    QMessageBox, QWidget, QListView
 )
-from PySide6.QtMultimedia import QMediaPlayer,QAudioOutput
-from PySide6.QtMultimediaWidgets import QVideoWidget
 from core.player import Player
-from core.file import FileHandler
-from PySide6.QtWidgets import QInputDialog
+from gui.playlist_model import PlaylistModel
+from gui.scheduler import UiRefreshScheduler
+from gui.scrubber import SeekCoalescer
+from gui.waveform_slider import WaveformSlider
+from core.profiler import profiler
+from core.thumbnail import ThumbnailService
+from PySide6.QtWidgets import QInputDialog, QFileDialog
 
 
 class PlayerUI(Player):
     """
     媒体播放器 UI, 负责界面布局和交互逻辑。
     """
-    FPS_LIMIT = 1  # 每秒刷新一次 UI
+    UI_REFRESH_RATE = 10  # 每秒界面刷新次数
+    # 循环模式对应的按钮文本
+    REPEAT_LABELS = {"off": "循环: 关", "all": "循环: 列表", "one": "循环: 单曲"}
+    # 视频渲染方式：widget 使用 QVideoWidget，sink 使用 QVideoSink 自绘并在界面繁忙时丢帧
+    RENDERERS = ("widget", "sink")
+    AUDIO_VISUALS = True  # 是否在进度条背景中显示波形和实时频谱
+    LIVE_SCRUB = True  # 拖动进度条时是否实时跳转
+
+    def __init__(self, lazy_init=True, renderer="widget"):
+        # 先构建界面，多媒体后端在界面创建之后再初始化
+        super().__init__(lazy_init=True)
+        self.lazy_init = lazy_init
+        self.renderer = renderer
+        # 播放器信号合并后按固定频率刷新界面
+        self.refresh_scheduler = UiRefreshScheduler(self, self.refresh_ui, self.UI_REFRESH_RATE)
+        self._rendered_seconds = None  # 上次显示的 (当前秒数, 总秒数)
+        self.video_widget = None
+        self._first_paint_done = False
+        self.thumbnail_service = None  # 预览帧服务，首次需要时创建
+        self.preview_strip = None
+        self.preview_pending = None  # 等待确认有视频后再请求预览帧的 (文件, 记录键)
+        self.spectrum_analyzer = None  # 实时频谱，需要 NumPy
+        self.seek_index_service = None  # 关键帧索引服务，首次需要时创建
+        self.seek_index = None
+        # 拖动进度条时的实时跳转，合并请求并按实测延迟限速
+        self.scrubber = SeekCoalescer(self.seek, self)
+        self.scrubber.latencyMeasured.connect(self.on_scrub_latency)
+        self.scrub_signal = None  # 当前用于判断跳转完成的信号
+        self.scrub_resume_playing = False
 
-    def __init__(self):
-        super().__init__()
-        self.file_handler = FileHandler()
-        self.last_update_time = 0  # 限制进度更新频率的变量
-
-        self.init_player()
         self.setup_ui()
         self.set_default_size()
         self.setWindowTitle("媒体播放器")
-        self.connect_signals()
 
-        # 添加音频输出对象
-        self.audio_output = QAudioOutput()
-        self.media_player.setAudioOutput(self.audio_output)
+        if not lazy_init:
+            self.init_player()
 
     def setup_ui(self):
         """
@@ -44,12 +69,93 @@ class PlayerUI(Player):
 
     def init_video_widget(self):
         """
-        初始化视频组件。
+        初始化视频区域容器，视频组件在多媒体后端初始化后再放入。
+        """
+        self.video_container = QWidget()
+        # 设置视频区域的大小策略为可扩展
+        self.video_container.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        container_layout = QVBoxLayout(self.video_container)
+        container_layout.setContentsMargins(0, 0, 0, 0)
+
+    def on_player_created(self):
         """
-        self.video_widget = QVideoWidget()
-        # 设置视频组件的大小策略为可扩展
+        多媒体后端初始化时，创建视频组件。
+        """
+        if self.renderer == "sink":
+            from gui.video_view import VideoView
+
+            self.video_widget = VideoView()
+            self.video_widget.statsUpdated.connect(self.on_render_stats)
+        else:
+            from PySide6.QtMultimediaWidgets import QVideoWidget
+
+            self.video_widget = QVideoWidget()
         self.video_widget.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.media_player.setVideoOutput(self.video_widget)
+        self.video_container.layout().addWidget(self.video_widget)
+
+        if profiler.enabled:
+            self.video_widget.videoSink().videoFrameChanged.connect(self._mark_first_frame)
+
+        if self.AUDIO_VISUALS:
+            from core.waveform import SpectrumAnalyzer, has_numpy
+
+            if has_numpy():
+                self.spectrum_analyzer = SpectrumAnalyzer(self)
+                self.spectrum_analyzer.spectrumReady.connect(self.progress_slider.set_spectrum)
+                QApplication.instance().aboutToQuit.connect(self.spectrum_analyzer.shutdown)
+
+    def on_player_attached(self, media_player):
+        """
+        播放器绑定后，设置视频输出并连接界面信号。
+        """
+        if self.renderer == "sink":
+            media_player.setVideoSink(self.video_widget.videoSink())
+        else:
+            media_player.setVideoOutput(self.video_widget)
+        if self.spectrum_analyzer is not None:
+            self.spectrum_analyzer.attach(media_player)
+        self.connect_signals(media_player)
+
+    def on_player_detached(self, media_player):
+        """
+        播放器解绑前，解除视频输出和界面信号。
+        """
+        self.disconnect_signals(media_player)
+        if self.renderer == "sink":
+            media_player.setVideoSink(None)
+        else:
+            media_player.setVideoOutput(None)
+        if self.spectrum_analyzer is not None:
+            self.spectrum_analyzer.detach(media_player)
+
+    def _mark_first_frame(self, frame):
+        """
+        记录首帧渲染时间点，只记录一次。
+        """
+        if frame.isValid():
+            self.video_widget.videoSink().videoFrameChanged.disconnect(self._mark_first_frame)
+            profiler.mark("first_frame")
+
+    def on_render_stats(self, fps, dropped):
+        """
+        显示渲染帧率和丢帧数，启用播放指标时一并记录。
+        """
+        self.render_stats_label.setText(f"渲染: {fps:.0f} fps, 丢帧: {dropped}")
+        self.render_stats_label.show()
+        if self.telemetry is not None:
+            self.telemetry.registry.set_gauge("render_fps", round(fps, 1))
+            self.telemetry.registry.set_gauge("dropped_frames", dropped)
+
+    def paintEvent(self, event):
+        """
+        首次绘制后，在空闲时预热多媒体后端。
+        """
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            profiler.mark("first_paint")
+            if not self.is_player_ready():
+                QTimer.singleShot(0, self.init_player)
 
 
     def init_controls(self):
@@ -59,15 +165,35 @@ class PlayerUI(Player):
         self.select_file_button = self.create_button("选择文件", self.open_file)
         self.play_button = self.create_button("暂停", self.toggle_play)
         self.volume_button = self.create_button("静音", self.toggle_mute)
+        self.previous_button = self.create_button("上一首", self.play_previous)
+        self.next_button = self.create_button("下一首", self.play_next)
+        self.shuffle_button = self.create_button("随机: 关", self.toggle_shuffle)
+        self.repeat_button = self.create_button(self.REPEAT_LABELS["off"], self.cycle_repeat)
+
+        # 播放列表视图，条目较多时按窗口逐步加载
+        self.playlist_model = PlaylistModel(self.playlist_engine.playlist, self)
+        self.playlist_view = QListView()
+        self.playlist_view.setModel(self.playlist_model)
+        self.playlist_view.setUniformItemSizes(True)
+        self.playlist_view.setMaximumHeight(150)
+        self.playlist_view.setVisible(False)
+        self.playlist_view.doubleClicked.connect(self.play_playlist_row)
 
         self.volume_slider = self.create_slider(0, 100, 50, self.set_volume)
-        self.progress_slider = self.create_slider(0, 1000, 0)
+        # 进度条背景中绘制波形和频谱，取值为毫秒，范围随媒体时长设置
+        self.progress_slider = WaveformSlider(Qt.Orientation.Horizontal)
+        self.progress_slider.setRange(0, 0)
 
         # 连接滑块的信号与槽函数
         self.progress_slider.sliderPressed.connect(self.slider_pressed)
         self.progress_slider.sliderReleased.connect(self.slider_released)
         self.progress_slider.sliderMoved.connect(self.update_label_preview)
 
+        # 拖动进度条时显示的预览帧
+        self.preview_label = QLabel(self)
+        self.preview_label.setStyleSheet("border: 1px solid white; background: black;")
+        self.preview_label.hide()
+
     def init_status_labels(self):
         """
         初始化标签。
@@ -75,6 +201,9 @@ class PlayerUI(Player):
         self.status_label = QLabel("未加载文件")
         self.current_file_label = QLabel("当前文件: 无")
         self.play_time_label = QLabel("播放时间: 00:00 / 00:00")
+        # 自绘渲染的帧率和丢帧数，只在 sink 渲染方式下显示
+        self.render_stats_label = QLabel()
+        self.render_stats_label.hide()
 
     def init_layouts(self):
         """
@@ -82,15 +211,19 @@ class PlayerUI(Player):
         """
 
         # 视频模块，包括视频播放和视频进度条，手动调整间距
-        video_layout = self.create_layout(QVBoxLayout, self.video_widget, self.progress_slider, spacing=0,
+        video_layout = self.create_layout(QVBoxLayout, self.video_container, self.progress_slider, spacing=0,
                                           margins=(0, 0, 0, 0))
 
         # 声音模块，包含静音按钮和声音进度条
         volume_layout = self.create_layout(QHBoxLayout, self.volume_button, self.volume_slider)
         # 控制模块，包含选择文件按钮和播放暂停按钮
         controls_layout = self.create_layout(QHBoxLayout, self.select_file_button, self.play_button)
+        # 播放列表模块，包含上一首、下一首、随机和循环按钮
+        playlist_layout = self.create_layout(QHBoxLayout, self.previous_button, self.next_button,
+                                             self.shuffle_button, self.repeat_button)
         # 状态模块，包含播放状态标签和播放时间标签，Qt.AlignmentFlag.AlignLeft设置左对齐
-        labels_layout = self.create_layout(QHBoxLayout, self.status_label, self.play_time_label)
+        labels_layout = self.create_layout(QHBoxLayout, self.status_label, self.play_time_label,
+                                           self.render_stats_label)
         labels_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
 
         # 主界面布局
@@ -98,6 +231,8 @@ class PlayerUI(Player):
         main_layout.addLayout(video_layout)
         main_layout.addLayout(volume_layout)
         main_layout.addLayout(controls_layout)
+        main_layout.addLayout(playlist_layout)
+        main_layout.addWidget(self.playlist_view)
         main_layout.addLayout(labels_layout)
 
         self.setLayout(main_layout)
@@ -135,17 +270,183 @@ class PlayerUI(Player):
             layout.addWidget(widget)
         return layout
 
-    def connect_signals(self):
+    def connect_signals(self, media_player):
         """
         连接播放器的信号与槽函数。
         """
-        self.media_player.positionChanged.connect(self.update_slider)
-        self.media_player.durationChanged.connect(self.set_slider_range)
+        media_player.positionChanged.connect(self.update_slider)
+        media_player.durationChanged.connect(self.set_slider_range)
+        media_player.playbackStateChanged.connect(self.on_playback_state_changed)
+        media_player.mediaStatusChanged.connect(self.on_media_status_changed)
+
+    def disconnect_signals(self, media_player):
+        """
+        断开播放器的信号与槽函数。
+        """
+        media_player.positionChanged.disconnect(self.update_slider)
+        media_player.durationChanged.disconnect(self.set_slider_range)
+        media_player.playbackStateChanged.disconnect(self.on_playback_state_changed)
+        media_player.mediaStatusChanged.disconnect(self.on_media_status_changed)
+
+    def update_file_info(self, source, key=None):
+        """
+        更新当前文件标签，并请求预览帧、波形和关键帧索引。
+        缓存读取都在后台进行，文件记录键已在打开文件的后台线程中计算好时直接传给后台。
+        """
+        super().update_file_info(source, key)
+        self.current_file_label.setText(f"当前文件: {source}")
+        self.playlist_model.refresh_current()
+        self.request_preview_strip(source, key)
+        self.request_waveform(source, key)
+        self.request_seek_index(source, key)
+
+    def request_preview_strip(self, source, key=None):
+        """
+        为本地视频请求预览帧条带，缓存读取和生成都在后台进行。
+        媒体加载完成、确认有视频后才发出请求，纯音频文件不生成。
+        """
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        self.preview_strip = None
+        self.preview_pending = None
+        if source.startswith(('http://', 'https://')):
+            return
+        self.preview_pending = (source, key)
+        # 切换到预加载的播放器或下载完成时媒体已加载好
+        Status = QMediaPlayer.MediaStatus
+        if self.media_player.mediaStatus() in (Status.LoadedMedia, Status.BufferedMedia):
+            self.on_media_loaded()
+
+    def on_media_loaded(self):
+        """
+        媒体加载完成，有视频时请求等待中的预览帧条带。
+        """
+        super().on_media_loaded()
+        if self.preview_pending is None:
+            return
+        source, key = self.preview_pending
+        self.preview_pending = None
+        if source != self.current_file or not self.media_player.hasVideo():
+            return
+        if self.thumbnail_service is None:
+            self.thumbnail_service = ThumbnailService(parent=self)
+            self.thumbnail_service.ready.connect(self.on_preview_strip_ready)
+            QApplication.instance().aboutToQuit.connect(self.thumbnail_service.shutdown)
+        self.thumbnail_service.request(source, key)
+
+    def on_preview_strip_ready(self, path, strip):
+        """
+        预览帧条带生成完成。
+        """
+        if path == self.current_file:
+            self.preview_strip = strip
+
+    def request_waveform(self, source, key=None):
+        """
+        为本地文件请求整个文件的波形，与响度分析共用分析线程和同一次解码。
+        """
+        self.progress_slider.set_waveform(None)
+        if not self.AUDIO_VISUALS or source.startswith(('http://', 'https://')):
+            return
+        self.get_loudness_analyzer().request(source, priority=True, key=key, waveform=True)
+
+    def on_waveform_ready(self, path, waveform):
+        """
+        波形生成完成。
+        """
+        if path == self.current_file:
+            self.progress_slider.set_waveform(waveform)
+
+    def request_seek_index(self, source, key=None):
+        """
+        为本地文件请求关键帧索引，读取和解析在后台进行。
+        """
+        self.seek_index = None
+        if source.startswith(('http://', 'https://')):
+            return
+        if self.seek_index_service is None:
+            from core.seek_index import SeekIndexService
+
+            self.seek_index_service = SeekIndexService(parent=self)
+            self.seek_index_service.ready.connect(self.on_seek_index_ready)
+            QApplication.instance().aboutToQuit.connect(self.seek_index_service.shutdown)
+        self.seek_index_service.request(source, key)
+
+    def on_seek_index_ready(self, path, index):
+        """
+        关键帧索引就绪。
+        """
+        if path == self.current_file:
+            self.seek_index = index
+
+    def slider_target(self, value):
+        """
+        进度条取值对应的跳转位置（毫秒）。
+        有关键帧索引时，吸附到一个像素对应的时长范围内最近的关键帧：
+        拖动精度本来就只有一个像素，跳到关键帧可以省去后端从关键帧解码到目标位置的开销。
+        """
+        if self.seek_index is None:
+            return value
+        span = self.progress_slider.maximum() - self.progress_slider.minimum()
+        tolerance = span // max(1, self.progress_slider.width())
+        return self.seek_index.nearest(value, tolerance)
+
+    def show_frame_preview(self, value, position):
+        """
+        在进度条上方显示距离拖动位置最近的预览帧。
+        """
+        frame = self.preview_strip.frame_at(position) if self.preview_strip else None
+        if frame is None:
+            self.preview_label.hide()
+            return
+        self.preview_label.setPixmap(QPixmap.fromImage(frame))
+        self.preview_label.adjustSize()
+
+        slider_origin = self.progress_slider.mapTo(self, QPoint(0, 0))
+        ratio = value / max(1, self.progress_slider.maximum())
+        x = slider_origin.x() + int(ratio * self.progress_slider.width()) - self.preview_label.width() // 2
+        x = max(0, min(x, self.width() - self.preview_label.width()))
+        y = max(0, slider_origin.y() - self.preview_label.height() - 4)
+        self.preview_label.move(x, y)
+        self.preview_label.raise_()
+        self.preview_label.show()
+
+    def on_playlist_changed(self):
+        """
+        播放列表条目变化后刷新列表视图。
+        """
+        self.playlist_model.sync()
+        self.playlist_view.setVisible(len(self.playlist_engine.playlist) > 0)
+
+    def play_playlist_row(self, index):
+        """
+        双击播放列表中的条目时播放该条目。
+        """
+        self.playlist_engine.play_index(index.row())
+
+    def toggle_shuffle(self):
+        """
+        切换随机播放，并更新按钮文本。
+        """
+        playlist = self.playlist_engine.playlist
+        playlist.set_shuffle(not playlist.shuffle)
+        self.playlist_engine.preload_next()
+        self.shuffle_button.setText("随机: 开" if playlist.shuffle else "随机: 关")
+
+    def cycle_repeat(self):
+        """
+        切换循环模式，并更新按钮文本。
+        """
+        repeat = self.playlist_engine.playlist.cycle_repeat()
+        self.playlist_engine.preload_next()
+        self.repeat_button.setText(self.REPEAT_LABELS[repeat])
 
     def toggle_play(self):
         """
         切换播放或暂停，并更新按钮文本。
         """
+        from PySide6.QtMultimedia import QMediaPlayer
+
         super().toggle_play()
         is_playing = self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
 
@@ -157,8 +458,9 @@ class PlayerUI(Player):
         """
         设置音量大小，同时更新按钮状态和静音状态。
         """
-        volume = value / 100.0  # 将百分比转换为 0-1 的值
-        self.audio_output.setVolume(volume)
+        self.volume = value / 100.0  # 将百分比转换为 0-1 的值
+        # 实际输出音量还要乘以当前文件的响度归一化增益
+        self.apply_volume()
 
         # 当用户调整音量时，如果之前是静音状态，则取消静音
         if self.audio_output.isMuted() and value > 0:
@@ -194,8 +496,15 @@ class PlayerUI(Player):
         """
         打开文件选择对话框或输入流媒体 URL。
         """
-        choice, ok = QInputDialog.getItem(self, "选择播放内容", "请选择:", ["本地文件", "流媒体 URL"], 0, False)
+        choices = ["本地文件", "流媒体 URL", "边下载边播放", "添加媒体库目录"]
+        choice, ok = QInputDialog.getItem(self, "选择播放内容", "请选择:", choices, 0, False)
         if ok:
+            if choice == "边下载边播放":
+                self.open_download()
+                return
+            if choice == "添加媒体库目录":
+                self.add_library_directory()
+                return
             if choice == "本地文件":
                 # 通过实例对象调用 select_file 方法
                 selected_file = self.file_handler.select_file()
@@ -212,30 +521,111 @@ class PlayerUI(Player):
             if not selected_file:
                 return
 
+            # 状态随后由文件检查结果和媒体状态变化更新
             self.status_label.setText("加载中，请稍候...")
-            QApplication.processEvents()
             self.play_file(selected_file)
-            self.status_label.setText("播放中")
-            self.current_file_label.setText(f"当前文件: {selected_file}")
         else:
             return
 
+    def on_open_started(self, source):
+        """
+        开始打开文件，显示加载状态。
+        """
+        self.status_label.setText("加载中，请稍候...")
+
+    def on_open_failed(self, source):
+        """
+        文件打开失败，显示失败状态。
+        """
+        self.status_label.setText("加载失败")
+
+    def open_download(self):
+        """
+        输入下载地址和保存位置，开始边下载边播放。
+        """
+        url, ok = QInputDialog.getText(self, "边下载边播放", "请输入下载地址:")
+        if not ok:
+            return
+        if not url.startswith(('http://', 'https://')):
+            QMessageBox.warning(self, "错误", "请输入有效的下载地址。")
+            return
+        name = os.path.basename(urlsplit(url).path) or "download"
+        path, _ = QFileDialog.getSaveFileName(self, "保存到", name)
+        if path:
+            self.status_label.setText("下载中，文件头到达后开始播放...")
+            self.download_and_play(url, path)
+
+    def add_library_directory(self):
+        """
+        选择目录加入媒体库，扫描在后台进行。
+        """
+        directory = QFileDialog.getExistingDirectory(
+            self, "添加媒体库目录", self.file_handler.get_default_download_folder()
+        )
+        if directory:
+            self.status_label.setText("正在扫描媒体库...")
+            self.open_library([directory])
+
+    def on_library_scanned(self, result, count):
+        """
+        媒体库扫描完成，显示索引的文件数。
+        """
+        super().on_library_scanned(result, count)
+        self.status_label.setText(f"媒体库: {count} 个文件（新增 {result.added}，删除 {result.removed}）")
+
+    def open_remote(self, files, enqueue, library=None):
+        """
+        处理其他启动转发过来的文件和媒体库目录，并将窗口切换到前台。
+        :param library: 要添加的媒体库目录，空列表表示重新扫描，None 表示不涉及媒体库
+        """
+        if library is not None:
+            self.open_library(library)
+        self.open_sources(files, enqueue)
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
     def slider_pressed(self):
         """
-        用户按下进度条，屏蔽播放器信号更新。
+        用户按下进度条。实时跳转模式下暂停播放，拖动过程中画面跟随跳转；
+        否则屏蔽播放器信号更新，释放时才跳转。
         """
-        self.media_player.blockSignals(True)
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        media_player = self.media_player
+        if not self.LIVE_SCRUB:
+            media_player.blockSignals(True)
+            return
+        self.scrub_resume_playing = media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+        if self.scrub_resume_playing:
+            media_player.pause()
+        # 有视频时以新画面到达作为跳转完成，纯音频以位置更新作为完成
+        if media_player.hasVideo() and self.video_widget is not None:
+            self.scrub_signal = self.video_widget.videoSink().videoFrameChanged
+        else:
+            self.scrub_signal = media_player.positionChanged
+        self.scrub_signal.connect(self.scrubber.seek_completed)
 
     def slider_released(self):
         """
-        用户释放进度条，更新进度位置。
+        用户释放进度条，跳转到最终位置并恢复播放状态。
         """
-        self.media_player.blockSignals(False)
-        position = self.progress_slider.value()
-        duration = self.media_player.duration()
-        if duration > 0:
-            self.media_player.setPosition(position * duration // 1000)
+        if self.LIVE_SCRUB:
+            self.scrubber.stop()
+            if self.scrub_signal is not None:
+                self.scrub_signal.disconnect(self.scrubber.seek_completed)
+                self.scrub_signal = None
+        else:
+            self.media_player.blockSignals(False)
+        if self.media_player.duration() > 0:
+            self.seek(self.slider_target(self.progress_slider.value()))
+        if self.scrub_resume_playing:
+            self.scrub_resume_playing = False
+            self.media_player.play()
         self.play_time_label.setStyleSheet("")  # 恢复原状
+        self.preview_label.hide()
+        self._rendered_seconds = None  # 拖动时改过时间标签，下次刷新时重新生成
 
     def update_label_preview(self, value):
         """
@@ -243,40 +633,127 @@ class PlayerUI(Player):
         """
         total_duration = self.media_player.duration()
         if total_duration > 0:
-            preview_time = value * total_duration // 1000  # 将滑块值转换为时间戳
+            preview_time = value  # 滑块取值即为毫秒
             current_time_str = self.format_time(preview_time // 1000)
             total_time_str = self.format_time(total_duration // 1000)
             self.play_time_label.setText(f"播放时间: {current_time_str} / {total_time_str}")
             self.play_time_label.setStyleSheet("color: red;")  # 设置高亮颜色
+            self.show_frame_preview(value, preview_time)
+            if self.scrub_signal is not None:
+                self.scrubber.request(self.slider_target(value))
+
+    def on_scrub_latency(self, latency):
+        """
+        启用播放指标时记录拖动跳转的延迟。
+        """
+        if self.telemetry is not None:
+            self.telemetry.registry.observe("scrub_seek_ms", round(latency, 1))
 
     def set_slider_range(self, duration):
         """
-        根据视频的总时长设置进度条范围。
+        记录总时长变化，等待下一次界面刷新。
         """
-        if duration > 0:
-            self.progress_slider.setRange(0, 1000)  # 进度条范围保持不变
-            total_time_str = self.format_time(duration // 1000)
-            self.play_time_label.setText(f"播放时间: 00:00 / {total_time_str}")
+        self.refresh_scheduler.request("duration", duration)
 
     def update_slider(self, position):
         """
-        更新进度条位置，限制更新频率。
+        记录播放位置变化，等待下一次界面刷新。
+        """
+        self.refresh_scheduler.request("position", position)
+
+    def on_playback_state_changed(self, state):
+        """
+        记录播放状态变化，等待下一次界面刷新。
+        """
+        self.refresh_scheduler.request("state", state)
+
+    def on_media_status_changed(self, status):
         """
-        current_time = time.time()
-        if current_time - self.last_update_time < 1 / self.FPS_LIMIT:
+        记录媒体状态变化，等待下一次界面刷新。
+        """
+        self.refresh_scheduler.request("media_status", status)
+
+    def status_text(self):
+        """
+        根据当前媒体状态和播放状态生成状态文本。
+        """
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        Status = QMediaPlayer.MediaStatus
+        status = self.media_player.mediaStatus()
+        if status == Status.LoadingMedia:
+            return "加载中，请稍候..."
+        if status in (Status.StalledMedia, Status.BufferingMedia):
+            return "缓冲中..."
+        if status == Status.InvalidMedia:
+            return "加载失败"
+        if status == Status.EndOfMedia:
+            return "播放结束"
+        if status == Status.NoMedia:
+            return "未加载文件"
+        is_playing = self.media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+        return "播放中" if is_playing else "已暂停"
+
+    def refresh_ui(self, changes):
+        """
+        合并刷新进度条、时间标签和播放状态，只更新内容发生变化的控件。
+        """
+        from PySide6.QtMultimedia import QMediaPlayer
+
+        if "state" in changes:
+            is_playing = changes["state"] == QMediaPlayer.PlaybackState.PlayingState
+            self.set_text_if_changed(self.play_button, "暂停" if is_playing else "播放")
+            if not is_playing:
+                self.progress_slider.set_spectrum(None)
+        if "state" in changes or "media_status" in changes:
+            self.set_text_if_changed(self.status_label, self.status_text())
+
+        if "position" not in changes and "duration" not in changes:
+            return
+        if "duration" in changes and self.progress_slider.maximum() != max(0, changes["duration"]):
+            self.progress_slider.setRange(0, max(0, changes["duration"]))
+            # 保持原来按 1% 步进的键盘和点击行为
+            self.progress_slider.setPageStep(max(1, changes["duration"] // 100))
+        if self.progress_slider.isSliderDown():
+            return
+        position = changes.get("position", self.media_player.position())
+        duration = changes.get("duration", self.media_player.duration())
+        if duration <= 0:
             return
 
-        self.last_update_time = current_time
-        if not self.progress_slider.isSliderDown():
-            duration = self.media_player.duration()
-            if duration > 0:
-                value = position * 1000 // duration
-                self.progress_slider.setValue(value)
+        if self.progress_slider.value() != position:
+            self.progress_slider.setValue(position)
 
-                # 更新时间标签
-                current_time_str = self.format_time(position // 1000)
-                total_time_str = self.format_time(duration // 1000)
-                self.play_time_label.setText(f"播放时间: {current_time_str} / {total_time_str}")
+        # 秒数不变时不重新格式化时间文本
+        seconds = (position // 1000, duration // 1000)
+        if seconds != self._rendered_seconds:
+            self._rendered_seconds = seconds
+            current_time_str = self.format_time(seconds[0])
+            total_time_str = self.format_time(seconds[1])
+            self.set_text_if_changed(self.play_time_label, f"播放时间: {current_time_str} / {total_time_str}")
+
+    @staticmethod
+    def set_text_if_changed(widget, text):
+        """
+        文本变化时才更新控件，避免无意义的重绘。
+        """
+        if widget.text() != text:
+            widget.setText(text)
+
+    def changeEvent(self, event):
+        """
+        窗口从最小化恢复时补上积压的界面刷新。
+        """
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.refresh_scheduler.resume()
+
+    def showEvent(self, event):
+        """
+        窗口重新显示时补上积压的界面刷新。
+        """
+        super().showEvent(event)
+        self.refresh_scheduler.resume()
 
     @staticmethod
     def format_time(seconds):
@@ -292,13 +769,13 @@ class PlayerUI(Player):
         窗口大小调整时动态设置视频窗口高度。
         """
         super().resizeEvent(event)
-        if self.video_widget and not event.oldSize().isEmpty():
+        if self.video_container and not event.oldSize().isEmpty():
             # 计算窗口的宽高比
             aspect_ratio = self.width() / self.height()
             if aspect_ratio > 16 / 9:  # 宽屏情况
-                self.video_widget.setFixedHeight(int(self.height() * 0.8))
+                self.video_container.setFixedHeight(int(self.height() * 0.8))
             else:  # 竖屏情况
-                self.video_widget.setFixedHeight(int(self.height() * 0.6))
+                self.video_container.setFixedHeight(int(self.height() * 0.6))
 
     def set_default_size(self):
         """
@@ -307,11 +784,16 @@ class PlayerUI(Player):
         self.resize(800, 600)
 
     @staticmethod
-    def create_app():
+    def create_app(lazy_init=True, renderer="widget"):
         """
         创建应用程序实例。
+        :param lazy_init: 是否推迟多媒体后端初始化，先显示窗口
+        :param renderer: 视频渲染方式，见 RENDERERS
         """
         app = QApplication(sys.argv)
         app.setStyle("Fusion")
-        player_ui = PlayerUI()
+        profiler.mark("qapplication")
+        player_ui = PlayerUI(lazy_init=lazy_init, renderer=renderer)
+        app.aboutToQuit.connect(player_ui.release_resources)
+        profiler.mark("window_constructed")
         return app, player_ui
\ No newline at end of file
@@ -0,0 +1,127 @@
+import time
+import threading
+
+from PySide6.QtCore import Qt, QRect, QSize, QTimer, Signal
+from PySide6.QtGui import QPainter
+from PySide6.QtWidgets import QWidget
+
+
+class VideoView(QWidget):
+    """
+    基于 QVideoSink 的视频渲染组件。
+    解码线程送来的帧只保存最新的一帧，界面线程来不及绘制时旧帧直接丢弃，
+    只有实际绘制的帧才转换为图像；缩放目标区域只在窗口大小或视频尺寸变化时重新计算。
+    由定时器每秒通过 statsUpdated 报告一次渲染帧率和累计丢帧数，没有新帧绘制时帧率报告为 0。
+    """
+
+    frameReady = Signal()  # 有新帧等待绘制（排队到界面线程）
+    statsUpdated = Signal(float, int)  # 渲染帧率，累计丢帧数
+
+    def __init__(self, parent=None):
+        from PySide6.QtMultimedia import QVideoSink
+
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.setAutoFillBackground(False)
+
+        self.lock = threading.Lock()
+        self.latest_frame = None  # 等待绘制的最新帧
+        self.update_pending = False
+        self.image = None  # 当前显示的图像
+        self.frame_size = QSize()
+        self.target_rect = QRect()  # 缓存的绘制区域
+
+        self.rendered_frames = 0
+        self.dropped_frames = 0
+        self.window_start = time.perf_counter()
+        self.window_frames = 0
+
+        self.sink = QVideoSink(self)
+        # 直接在送帧的线程中调用，只做替换和计数，不做任何转换
+        self.sink.videoFrameChanged.connect(self.on_video_frame, Qt.ConnectionType.DirectConnection)
+        self.frameReady.connect(self.update)
+
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.report_stats)
+        self.stats_timer.start(1000)
+
+    def videoSink(self):
+        """
+        与 QVideoWidget 一致的接口，供播放器和首帧统计使用。
+        """
+        return self.sink
+
+    def on_video_frame(self, frame):
+        with self.lock:
+            if self.latest_frame is not None:
+                # 上一帧还没来得及绘制
+                self.dropped_frames += 1
+            self.latest_frame = frame
+            notify = not self.update_pending
+            self.update_pending = True
+        if notify:
+            self.frameReady.emit()
+
+    def take_frame(self):
+        with self.lock:
+            frame = self.latest_frame
+            self.latest_frame = None
+            self.update_pending = False
+        return frame
+
+    def paintEvent(self, event):
+        frame = self.take_frame()
+        if frame is not None:
+            if frame.isValid():
+                self.image = frame.toImage()
+                if frame.size() != self.frame_size:
+                    self.frame_size = frame.size()
+                    self.update_target_rect()
+                self.count_rendered()
+            else:
+                # 停止播放时清空画面
+                self.image = None
+
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+        if self.image is not None and not self.image.isNull():
+            painter.drawImage(self.target_rect, self.image)
+        painter.end()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_target_rect()
+
+    def update_target_rect(self):
+        """
+        按视频宽高比计算居中的绘制区域。
+        """
+        if self.frame_size.isEmpty():
+            self.target_rect = self.rect()
+            return
+        size = self.frame_size.scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio)
+        self.target_rect = QRect(
+            (self.width() - size.width()) // 2, (self.height() - size.height()) // 2, size.width(), size.height()
+        )
+
+    def count_rendered(self):
+        self.rendered_frames += 1
+        self.window_frames += 1
+
+    def report_stats(self):
+        """
+        报告上一个统计窗口的渲染帧率，暂停或界面卡住后恢复时也能及时更新。
+        """
+        now = time.perf_counter()
+        elapsed = now - self.window_start
+        # 还没有绘制过任何帧时不报告
+        if elapsed > 0 and self.rendered_frames:
+            self.statsUpdated.emit(self.window_frames / elapsed, self.dropped_frames)
+        self.window_start = now
+        self.window_frames = 0
+
+    def stats(self):
+        """
+        获取累计的渲染统计。
+        """
+        return {"rendered_frames": self.rendered_frames, "dropped_frames": self.dropped_frames}
@@ -0,0 +1,124 @@
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QColor, QPainter, QPixmap
+from PySide6.QtWidgets import QSlider
+
+from gui.scheduler import UiRefreshScheduler
+
+
+class WaveformSlider(QSlider):
+    """
+    在背景中绘制整个文件波形和实时频谱的进度条。
+    波形只在内容或尺寸变化时渲染为缓存图像，每次重绘只需贴图；
+    频谱更新经过刷新调度器合并，重绘频率不超过 SPECTRUM_FPS。
+    """
+
+    SPECTRUM_FPS = 30  # 频谱最高重绘频率
+    VISUAL_HEIGHT = 40  # 有波形或频谱时的最小高度
+    PLAYED_COLOR = QColor(80, 160, 255, 170)
+    REMAINING_COLOR = QColor(150, 150, 150, 110)
+    SPECTRUM_COLOR = QColor(255, 170, 60, 90)
+
+    def __init__(self, orientation=Qt.Orientation.Horizontal, parent=None):
+        super().__init__(orientation, parent)
+        self.waveform = None
+        self.spectrum = None
+        self.played_pixmap = None  # 缓存的已播放部分波形
+        self.remaining_pixmap = None  # 缓存的未播放部分波形
+        self.spectrum_scheduler = UiRefreshScheduler(self, self.render_spectrum, self.SPECTRUM_FPS)
+
+    def set_waveform(self, waveform):
+        """
+        设置整个文件的波形，None 时清除。
+        """
+        self.waveform = waveform
+        self.played_pixmap = None
+        self.remaining_pixmap = None
+        self.update_visual_height()
+        self.update()
+
+    def set_spectrum(self, levels):
+        """
+        记录最新的频谱，等待下一次重绘；None 时清除。
+        """
+        self.spectrum_scheduler.request("spectrum", levels)
+
+    def render_spectrum(self, changes):
+        levels = changes["spectrum"]
+        if levels is None and self.spectrum is None:
+            return
+        self.spectrum = levels
+        self.update_visual_height()
+        self.update()
+
+    def update_visual_height(self):
+        self.setMinimumHeight(self.VISUAL_HEIGHT if self.waveform is not None or self.spectrum else 0)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.played_pixmap = None
+        self.remaining_pixmap = None
+
+    def render_waveform(self, color):
+        """
+        将波形渲染为与控件同尺寸的图像，每个像素列一条以中线对称的竖线。
+        """
+        width, height = max(1, self.width()), max(1, self.height())
+        pixmap = QPixmap(width, height)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        peaks, rms = self.waveform.columns(width)
+        if not peaks:
+            return pixmap
+        # 按整个文件的最大峰值归一化，安静的文件也能看清起伏
+        scale = (height / 2 - 1) / max(max(peaks), 1e-3)
+        step = width / len(peaks)
+        middle = height / 2
+
+        painter = QPainter(pixmap)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(color)
+        for index, peak in enumerate(peaks):
+            half = max(0.5, peak * scale)
+            painter.drawRect(QRectF(index * step, middle - half, max(1.0, step), half * 2))
+        # 均方根部分颜色更深，显示响度轮廓
+        painter.setBrush(color.darker(140))
+        for index, value in enumerate(rms):
+            half = value * scale
+            if half >= 0.5:
+                painter.drawRect(QRectF(index * step, middle - half, max(1.0, step), half * 2))
+        painter.end()
+        return pixmap
+
+    def paintEvent(self, event):
+        if self.waveform is not None or self.spectrum:
+            painter = QPainter(self)
+            if self.spectrum:
+                self.paint_spectrum(painter)
+            if self.waveform is not None:
+                self.paint_waveform(painter)
+            painter.end()
+        # 滑槽和滑块绘制在最上层
+        super().paintEvent(event)
+
+    def paint_waveform(self, painter):
+        if self.played_pixmap is None:
+            self.played_pixmap = self.render_waveform(self.PLAYED_COLOR)
+            self.remaining_pixmap = self.render_waveform(self.REMAINING_COLOR)
+        span = self.maximum() - self.minimum()
+        ratio = (self.value() - self.minimum()) / span if span > 0 else 0
+        split = int(self.width() * ratio)
+        painter.drawPixmap(0, 0, self.played_pixmap, 0, 0, split, self.height())
+        painter.drawPixmap(split, 0, self.remaining_pixmap, split, 0, self.width() - split, self.height())
+
+    def paint_spectrum(self, painter):
+        """
+        频谱柱从底部向上绘制，横向铺满整个进度条。
+        """
+        count = len(self.spectrum)
+        width = self.width() / count
+        height = self.height()
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.SPECTRUM_COLOR)
+        for index, level in enumerate(self.spectrum):
+            bar = level * height
+            if bar >= 1:
+                painter.drawRect(QRectF(index * width + 1, height - bar, max(1.0, width - 2), bar))
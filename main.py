@@ -1,14 +1,130 @@
 # main.py
 import sys
-from gui.ui import PlayerUI
+import argparse
+from core.profiler import profiler
+
+
+def parse_arguments():
+    """
+    解析命令行参数。
+    """
+    parser = argparse.ArgumentParser(description="媒体播放器")
+    parser.add_argument("files", nargs="*",
+                        help="启动后直接播放的文件路径、播放列表或流媒体 URL，多个时加入播放队列")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="输出启动各阶段的耗时明细")
+    parser.add_argument("--eager-init", action="store_true",
+                        help="创建窗口时立即初始化多媒体后端")
+    parser.add_argument("--renderer", choices=("widget", "sink"), default="widget",
+                        help="视频渲染方式：widget 使用 QVideoWidget，sink 自绘并在界面繁忙时丢帧")
+    parser.add_argument("--enqueue", action="store_true",
+                        help="已有实例在运行时，把文件加入其播放队列而不是立即播放")
+    parser.add_argument("--new-instance", action="store_true",
+                        help="总是启动新的实例，不转发给已运行的实例")
+    parser.add_argument("--exit-after-startup", action="store_true",
+                        help="多媒体后端初始化完成后立即退出，用于测量启动耗时")
+    parser.add_argument("--library", action="append", nargs="?", const="", metavar="DIR",
+                        help="添加媒体库目录并在后台扫描，可重复使用；不带目录时只重新扫描已添加的目录")
+    parser.add_argument("--telemetry", nargs="?", const="", metavar="PATH",
+                        help="记录缓冲、卡顿、跳转等播放指标到 JSONL 文件（默认写入缓存目录）")
+    headless = parser.add_argument_group("无界面批量模式")
+    headless.add_argument("--headless", action="store_true",
+                          help="不创建界面，依次播放所有文件并输出各文件的耗时报告")
+    headless.add_argument("--rate", type=float, default=4.0, help="播放倍速（默认 4.0）")
+    headless.add_argument("--play-seconds", type=float,
+                          help="每个文件播放的媒体时长（秒），默认批量模式 5 秒、验证模式 1 秒")
+    headless.add_argument("--timeout", type=float, default=30.0, help="单个文件的超时时间（秒）")
+    headless.add_argument("--no-seek", action="store_true", help="不测试跳转")
+    headless.add_argument("--report", metavar="PATH", help="JSON 报告输出路径，默认输出到标准输出")
+    headless.add_argument("--validate", action="store_true",
+                          help="多进程并行验证文件能否正常加载和解码")
+    headless.add_argument("--workers", type=int, help="验证模式的工作进程数（默认 CPU 核数）")
+    headless.add_argument("--recycle", type=int, default=50, help="每个工作进程处理多少个文件后重启")
+    # 忽略 Qt 自身的命令行参数
+    args, _ = parser.parse_known_args()
+    return args
+
+
+def run_headless(args):
+    """
+    无界面批量模式或多进程验证模式，默认使用 offscreen 平台以便在没有显示的服务器上运行。
+    """
+    import os
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    if args.validate:
+        from core.validate import run_validation
+        play_seconds = 1.0 if args.play_seconds is None else args.play_seconds
+        return run_validation(
+            args.files, workers=args.workers, recycle_after=args.recycle, rate=args.rate,
+            play_ms=int(play_seconds * 1000), timeout_ms=int(args.timeout * 1000),
+            seek=not args.no_seek, report_path=args.report
+        )
+
+    from core.headless import run_headless
+    play_seconds = 5.0 if args.play_seconds is None else args.play_seconds
+    return run_headless(
+        args.files, rate=args.rate, play_ms=int(play_seconds * 1000),
+        timeout_ms=int(args.timeout * 1000), seek=not args.no_seek, report_path=args.report
+    )
 
 
 if __name__ == "__main__":
-    app, player_ui = PlayerUI.create_app()
+    args = parse_arguments()
+    if args.headless or args.validate:
+        sys.exit(run_headless(args))
+
+    # 已有实例在运行时只转发参数，不创建窗口和多媒体后端。
+    # 启动耗时统计和播放指标只对新进程有意义，无法转发，这时启动新的实例
+    local_only = [name for name, value in (
+        ("--startup-profile", args.startup_profile),
+        ("--exit-after-startup", args.exit_after_startup),
+        ("--telemetry", args.telemetry is not None),
+    ) if value]
+    library = None if args.library is None else [path for path in args.library if path]
+    if not args.new_instance:
+        from core.instance import is_server_running, send_to_running_instance, server_name
+        if not local_only:
+            if send_to_running_instance(args.files, enqueue=args.enqueue, library=library):
+                sys.exit(0)
+        elif is_server_running(server_name()):
+            print(f"{', '.join(local_only)} 无法转发给已运行的实例，启动新的实例", file=sys.stderr)
+    if args.startup_profile:
+        # 有文件时统计到首帧，否则统计到多媒体后端就绪
+        profiler.enable(report_phase="first_frame" if args.files else "multimedia_ready")
 
-    # 如果传入文件路径,直接加载播放
-    if len(sys.argv) > 1:
-        player_ui.play_file(sys.argv[1])
+    from PySide6.QtCore import QTimer
+    from gui.ui import PlayerUI
+    profiler.mark("imports")
+
+    app, player_ui = PlayerUI.create_app(lazy_init=not args.eager_init, renderer=args.renderer)
+    app.aboutToQuit.connect(profiler.report)
+
+    if args.telemetry is not None:
+        from core.telemetry import enable_telemetry
+        player_ui.set_telemetry(enable_telemetry(args.telemetry or None))
+
+    if not args.new_instance:
+        from core.instance import InstanceServer
+        instance_server = InstanceServer(app)
+        instance_server.messageReceived.connect(player_ui.open_remote)
+        instance_server.listen()
 
     player_ui.show()
+    profiler.mark("window_shown")
+
+    if args.exit_after_startup:
+        def exit_after_startup():
+            if not player_ui.is_player_ready():
+                player_ui.init_player()
+            app.quit()
+        QTimer.singleShot(0, exit_after_startup)
+
+    if library is not None:
+        QTimer.singleShot(0, lambda: player_ui.open_library(library))
+
+    # 如果传入文件路径,直接加载播放，多个文件时加入播放队列
+    if args.files:
+        QTimer.singleShot(0, lambda: player_ui.open_sources(args.files))
+
     sys.exit(app.exec())
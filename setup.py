@@ -4,6 +4,9 @@ import logging
 import platform
 import argparse
 import shutil
+import statistics
+import subprocess
+import time
 from datetime import datetime
 from PyInstaller.__main__ import run
 
@@ -36,6 +39,37 @@ class PackageConfig:
         'PyInstaller'  # 打包工具
     ]
 
+    # 程序实际使用的 Qt 模块，fast-start 配置只打包这些模块
+    QT_MODULES = [
+        'QtCore',
+        'QtGui',
+        'QtWidgets',
+        'QtMultimedia',
+        'QtMultimediaWidgets',
+        'QtNetwork'  # 单实例本地套接字
+    ]
+
+    # 打包配置档
+    PROFILES = {
+        'default': '默认配置，单文件发布',
+        'fast-start': '启动优化配置，目录发布、只包含用到的 Qt 模块、预编译字节码'
+    }
+
+    # fast-start 配置在系统参数基础上移除的参数
+    FAST_START_REMOVED_ARGS = (
+        '--onefile',  # 单文件每次启动都要先解压全部内容
+        '--runtime-tmpdir'
+    )
+
+    # fast-start 配置追加的参数
+    FAST_START_ARGS = [
+        '--onedir',  # 目录发布，启动时直接加载，无需解压
+        '--noupx'  # 不压缩动态库，避免加载时解压
+    ]
+
+    # 启动耗时测试的重复次数（第一次为冷启动）
+    LAUNCH_RUNS = 5
+
     # 各操作系统特定的打包配置
     SYSTEM_CONFIGS = {
         'windows': {
@@ -123,6 +157,13 @@ def parse_arguments():
                         help='启用调试模式')
     parser.add_argument('--output-dir',
                         help='指定输出目录')
+    parser.add_argument('--profile',
+                        choices=list(PackageConfig.PROFILES),
+                        default='default',
+                        help='打包配置档：default 单文件发布，fast-start 启动优化')
+    parser.add_argument('--skip-launch-test',
+                        action='store_true',
+                        help='fast-start 配置打包后不测试启动耗时')
     return parser.parse_args()
 
 
@@ -184,13 +225,78 @@ def select_target_os():
         print("错误：无效选项，请重新选择！")
 
 
-def prepare_build_args(target_os, output_dir):
+def list_unused_qt_modules():
+    """
+    列出已安装但程序没有用到的 PySide6 模块
+
+    Returns:
+        list: 模块名列表，如 ['QtWebEngineCore', ...]
+    """
+    import PySide6
+
+    package_dir = os.path.dirname(PySide6.__file__)
+    installed = set()
+    for name in os.listdir(package_dir):
+        # QtCore.abi3.so / QtCore.pyd / QtCore.cpython-311-darwin.so
+        if name.startswith('Qt') and name.endswith(('.so', '.pyd')):
+            installed.add(name.split('.')[0])
+    return sorted(installed - set(PackageConfig.QT_MODULES))
+
+
+def supports_optimize_option():
+    """
+    PyInstaller 6.6 起支持 --optimize，在打包时生成优化级别的字节码
+
+    Returns:
+        bool: 是否支持
+    """
+    import PyInstaller
+
+    version = tuple(int(part) for part in PyInstaller.__version__.split('.')[:2] if part.isdigit())
+    return version >= (6, 6)
+
+
+def apply_fast_start_profile(args, target_os):
+    """
+    将系统参数转换为 fast-start 配置
+
+    Args:
+        args (list): 系统特定的 PyInstaller 参数
+        target_os (str): 目标操作系统
+
+    Returns:
+        list: 转换后的参数列表
+    """
+    logger = logging.getLogger(__name__)
+
+    args = [arg for arg in args if not arg.startswith(PackageConfig.FAST_START_REMOVED_ARGS)]
+    if target_os != 'macos':
+        # macOS 的 .app 本身就是目录发布
+        args += PackageConfig.FAST_START_ARGS
+    else:
+        args.append('--noupx')
+
+    # 排除没有用到的 Qt 模块，连同其插件和动态库一起不打包
+    unused = list_unused_qt_modules()
+    args += [f'--exclude-module=PySide6.{module}' for module in unused]
+    logger.info(f"排除 {len(unused)} 个未使用的 Qt 模块")
+
+    # 字节码在打包时编译好，运行时不需要再编译
+    if supports_optimize_option():
+        args.append('--optimize=1')
+    else:
+        logger.warning("当前 PyInstaller 版本不支持 --optimize，使用默认字节码")
+    return args
+
+
+def prepare_build_args(target_os, output_dir, profile='default'):
     """
     准备构建参数
 
     Args:
         target_os (str): 目标操作系统
         output_dir (str): 输出目录
+        profile (str): 打包配置档
 
     Returns:
         list: PyInstaller命令行参数列表
@@ -217,9 +323,105 @@ def prepare_build_args(target_os, output_dir):
     icon_path = PackageConfig.ICONS[target_os]
     specific_args = [arg.format(icon_path) if '{}' in arg else arg for arg in specific_args]
 
+    if profile == 'fast-start':
+        specific_args = apply_fast_start_profile(specific_args, target_os)
+
     return base_args + specific_args
 
 
+def find_executable(target_os, output_dir):
+    """
+    查找打包生成的可执行文件
+
+    Returns:
+        str: 可执行文件路径，找不到时返回 None
+    """
+    name = PackageConfig.APP_NAME
+    candidates = {
+        'windows': [os.path.join(output_dir, name, f'{name}.exe'), os.path.join(output_dir, f'{name}.exe')],
+        'macos': [os.path.join(output_dir, f'{name}.app', 'Contents', 'MacOS', name)],
+        'linux': [os.path.join(output_dir, name, name), os.path.join(output_dir, name)],
+    }[target_os]
+    for path in candidates:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def get_bundle_size(path):
+    """
+    计算文件或目录的总大小（字节）
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                total += os.path.getsize(file_path)
+    return total
+
+
+def measure_launch_time(executable, runs=PackageConfig.LAUNCH_RUNS):
+    """
+    测量从启动进程到多媒体后端初始化完成并退出的耗时
+
+    Args:
+        executable (str): 可执行文件路径
+        runs (int): 测量次数，第一次视为冷启动
+
+    Returns:
+        tuple: (冷启动毫秒数, 热启动毫秒数中位数)，启动失败时返回 None
+    """
+    logger = logging.getLogger(__name__)
+
+    env = dict(os.environ)
+    if platform.system() == 'Linux' and not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY'):
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            subprocess.run([executable, '--new-instance', '--exit-after-startup'],
+                           env=env, timeout=120, check=True, capture_output=True)
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"启动耗时测试失败: {e}")
+            return None
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples[0], statistics.median(samples[1:]) if len(samples) > 1 else samples[0]
+
+
+def report_startup(target_os, output_dir, launch_test=True):
+    """
+    输出发布包大小和冷、热启动耗时
+
+    Returns:
+        dict: 报告内容
+    """
+    logger = logging.getLogger(__name__)
+
+    executable = find_executable(target_os, output_dir)
+    if executable is None:
+        logger.warning("未找到可执行文件，跳过启动报告")
+        return {}
+
+    # 目录发布统计整个目录，单文件发布统计文件本身
+    bundle = os.path.dirname(executable) if target_os != 'macos' else os.path.join(output_dir, f"{PackageConfig.APP_NAME}.app")
+    if os.path.samefile(bundle, output_dir):
+        bundle = executable
+    report = {'bundle_size_mb': round(get_bundle_size(bundle) / 1024 / 1024, 1)}
+    logger.info(f"发布包大小: {report['bundle_size_mb']} MB ({bundle})")
+
+    if launch_test and target_os == platform.system().lower().replace('darwin', 'macos'):
+        timings = measure_launch_time(executable)
+        if timings is not None:
+            report['cold_launch_ms'], report['warm_launch_ms'] = round(timings[0], 1), round(timings[1], 1)
+            logger.info(f"冷启动: {report['cold_launch_ms']} ms, 热启动中位数: {report['warm_launch_ms']} ms")
+    return report
+
+
 def post_build_tasks(target_os, output_dir):
     """
     执行打包后的处理任务
@@ -299,7 +501,8 @@ def main():
         os.makedirs(output_dir, exist_ok=True)
 
         # 准备构建参数
-        build_args = prepare_build_args(target_os, output_dir)
+        build_args = prepare_build_args(target_os, output_dir, args.profile)
+        logger.info(f"打包配置: {args.profile}（{PackageConfig.PROFILES[args.profile]}）")
         logger.debug(f"构建参数: {build_args}")
 
         # 执行打包
@@ -310,6 +513,10 @@ def main():
         logger.info("执行后处理任务...")
         post_build_tasks(target_os, output_dir)
 
+        # 启动优化配置输出发布包大小和启动耗时，便于与默认配置比较
+        if args.profile == 'fast-start':
+            report_startup(target_os, output_dir, launch_test=not args.skip_launch_test)
+
         logger.info(f"打包完成！输出目录: {output_dir}")
 
     except Exception as e:
@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# Range: bytes=0-99 / bytes=100-
+RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    """
+    模拟源站：静态文件支持 Range 和 ETag，endless 路径模拟没有长度、不支持范围请求的网络电台。
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        if not self.server.origin.head_allowed:
+            self.send_response(501)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.respond(send_body=False)
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def respond(self, send_body):
+        origin = self.server.origin
+        path = urlsplit(self.path).path
+        with origin.lock:
+            origin.requests.append((self.command, path, self.headers.get("Range")))
+        if self.command == "GET" and origin.delay:
+            time.sleep(origin.delay)
+
+        if path in origin.endless:
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                while send_body:
+                    self.wfile.write(b"\0" * 4096)
+            except OSError:
+                pass
+            return
+
+        entry = origin.files.get(path)
+        if entry is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        data, etag = entry
+        start, end = 0, len(data)
+        match = RANGE_PATTERN.match(self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(len(data), int(match.group(2)) + 1 if match.group(2) else len(data))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", origin.content_types.get(path, "application/octet-stream"))
+        self.send_header("Content-Length", str(end - start))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if send_body:
+            try:
+                self.wfile.write(data[start:end])
+            except OSError:
+                pass
+
+
+class OriginServer:
+    """
+    本机随机端口上的模拟源站，记录收到的请求。
+    """
+
+    def __init__(self):
+        self.files = {}  # 路径 -> (数据, ETag)
+        self.content_types = {}
+        self.endless = set()
+        self.head_allowed = True
+        self.delay = 0  # 每个 GET 请求的响应延迟（秒）
+        self.requests = []  # (方法, 路径, Range)
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler)
+        self.server.daemon_threads = True
+        self.server.origin = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def add(self, path, data, etag="", content_type=None):
+        self.files[path] = (data, etag)
+        if content_type:
+            self.content_types[path] = content_type
+        return self.url(path)
+
+    def range_requests(self, path=None):
+        """
+        收到的带 Range 的 GET 请求。
+        """
+        with self.lock:
+            return [
+                request for request in self.requests
+                if request[0] == "GET" and request[2] and (path is None or request[1] == path)
+            ]
+
+    def get_requests(self, path):
+        with self.lock:
+            return [request for request in self.requests if request[0] == "GET" and request[1] == path]
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def origin():
+    server = OriginServer()
+    yield server
+    server.stop()
+
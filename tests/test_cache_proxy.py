@@ -0,0 +1,113 @@
+import os
+import time
+import threading
+import urllib.request
+
+from core.cache_proxy import CachingProxy
+from core.http_client import FetchPool, HttpClient
+
+CHUNK_SIZE = 64 * 1024
+
+
+def fetch(url, start=None, end=None):
+    request = urllib.request.Request(url)
+    if start is not None:
+        request.add_header("Range", f"bytes={start}-{end}")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status, response.read()
+
+
+def test_serves_ranges_and_replays_from_cache(origin, tmp_path):
+    data = os.urandom(CHUNK_SIZE * 10 + 123)
+    source = origin.add("/video.mp4", data, etag='"v1"')
+
+    proxy = CachingProxy(str(tmp_path), chunk_size=CHUNK_SIZE, read_ahead=2)
+    try:
+        url = proxy.proxy_url(source)
+        assert fetch(url) == (200, data)
+        assert fetch(url, 100000, 300000) == (206, data[100000:300001])
+    finally:
+        proxy.stop()
+
+    # 新的代理实例重播：只探测源站，数据全部来自磁盘缓存
+    origin.requests.clear()
+    proxy = CachingProxy(str(tmp_path), chunk_size=CHUNK_SIZE, read_ahead=2)
+    try:
+        assert fetch(proxy.proxy_url(source)) == (200, data)
+    finally:
+        proxy.stop()
+    assert origin.range_requests("/video.mp4") == []
+
+
+def test_refetches_when_origin_changes(origin, tmp_path):
+    source = origin.add("/video.mp4", b"a" * CHUNK_SIZE * 3, etag='"v1"')
+    proxy = CachingProxy(str(tmp_path), chunk_size=CHUNK_SIZE)
+    try:
+        fetch(proxy.proxy_url(source))
+    finally:
+        proxy.stop()
+
+    # 大小相同但 ETag 变化，旧缓存不能再使用
+    changed = b"b" * CHUNK_SIZE * 3
+    origin.add("/video.mp4", changed, etag='"v2"')
+    proxy = CachingProxy(str(tmp_path), chunk_size=CHUNK_SIZE)
+    try:
+        assert fetch(proxy.proxy_url(source)) == (200, changed)
+    finally:
+        proxy.stop()
+
+
+def test_evicts_least_recently_used_files(origin, tmp_path):
+    sources = [origin.add(f"/{name}.mp4", os.urandom(CHUNK_SIZE * 4), etag=f'"{name}"') for name in "abc"]
+    paths = []
+    for source in sources[:2]:
+        proxy = CachingProxy(str(tmp_path), chunk_size=CHUNK_SIZE, max_cache_size=CHUNK_SIZE * 6)
+        try:
+            fetch(proxy.proxy_url(source))
+            paths.append(proxy.resources[next(iter(proxy.resources))].sparse.data_path)
+        finally:
+            proxy.stop()
+    os.utime(paths[0] + ".meta", (1, 1))
+
+    proxy = CachingProxy(str(tmp_path), chunk_size=CHUNK_SIZE, max_cache_size=CHUNK_SIZE * 6)
+    try:
+        fetch(proxy.proxy_url(sources[2]), 0, 0)
+    finally:
+        proxy.stop()
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1])
+
+
+def test_endless_stream_is_forwarded_without_probing_body(origin, tmp_path):
+    origin.endless.add("/radio")
+    origin.head_allowed = False
+    source = origin.url("/radio")
+
+    started = time.perf_counter()
+    info = HttpClient(timeout=5).probe(source)
+    assert time.perf_counter() - started < 2
+    assert info.total_size is None and not info.supports_range
+
+    proxy = CachingProxy(str(tmp_path), chunk_size=CHUNK_SIZE)
+    try:
+        with urllib.request.urlopen(proxy.proxy_url(source), timeout=5) as response:
+            assert len(response.read(CHUNK_SIZE)) == CHUNK_SIZE
+    finally:
+        proxy.stop()
+
+
+def test_urgent_fetch_runs_before_queued_read_ahead():
+    pool = FetchPool(1)
+    gate = threading.Event()
+    order = []
+    try:
+        pool.submit(gate.wait)
+        prefetch = [pool.submit(order.append, f"ahead-{i}") for i in range(3)]
+        pool.submit(order.append, "urgent", priority=FetchPool.URGENT)
+        pool.promote(prefetch[2])
+        gate.set()
+        for future in prefetch:
+            future.result(timeout=5)
+    finally:
+        pool.shutdown()
+    assert order == ["urgent", "ahead-2", "ahead-0", "ahead-1"]
@@ -0,0 +1,120 @@
+import os
+import time
+
+from core.downloader import DownloadTask
+from core.sparse import SparseFile
+
+CHUNK_SIZE = 16 * 1024
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_downloads_every_chunk_once(origin, tmp_path):
+    data = os.urandom(CHUNK_SIZE * 7 + 7)
+    source = origin.add("/file.bin", data, etag='"v1"')
+    path = str(tmp_path / "file.bin")
+
+    task = DownloadTask(source, path, chunk_size=CHUNK_SIZE)
+    task.start()
+    try:
+        assert wait_for(task.is_complete, 20)
+        with open(path, "rb") as f:
+            assert f.read() == data
+        assert not os.path.exists(path + ".part")
+        # 每个分块只请求一次
+        assert len(origin.range_requests("/file.bin")) == task.sparse.chunk_count
+    finally:
+        task.close()
+
+
+def requested_chunks(origin, path, chunk_size=CHUNK_SIZE):
+    """
+    按请求顺序返回各范围请求对应的分块序号。
+    """
+    return [int(request[2][len("bytes="):].split("-")[0]) // chunk_size for request in origin.range_requests(path)]
+
+
+def test_progress_signal_is_throttled(tmp_path):
+    task = DownloadTask("http://127.0.0.1/unused.bin", str(tmp_path / "unused.bin"), chunk_size=1024)
+    task.sparse = SparseFile(task.part_path, 1024 * 500, 1024)
+    reports = []
+    task.progressChanged.connect(lambda completed, count: reports.append(completed))
+    try:
+        # 小分块快速写入时只按时间间隔报告进度，全部完成时总会报告
+        for index in range(500):
+            task.sparse.write_chunk(index, b"\0" * 1024)
+            task._check_progress()
+        assert len(reports) < 10
+        assert reports[-1] == 500
+    finally:
+        task.sparse.close()
+
+
+def test_resumes_from_existing_part_file(origin, tmp_path):
+    data = os.urandom(CHUNK_SIZE * 6)
+    source = origin.add("/resume.bin", data, etag='"v1"')
+    path = str(tmp_path / "resume.bin")
+
+    # 上次中断时已完成分块 0、1、2
+    sparse = SparseFile(path + ".part", len(data), CHUNK_SIZE, info={"url": source}, validator='"v1"')
+    for index in (0, 1, 2):
+        sparse.write_chunk(index, data[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE])
+    sparse.save_meta()
+    sparse.close()
+
+    task = DownloadTask(source, path, chunk_size=CHUNK_SIZE)
+    task.start()
+    try:
+        assert wait_for(task.is_complete, 20)
+        with open(path, "rb") as f:
+            assert f.read() == data
+        assert sorted(requested_chunks(origin, "/resume.bin")) == [3, 4, 5]
+    finally:
+        task.close()
+
+
+def test_fetches_header_and_tail_first_then_focus(origin, tmp_path):
+    data = os.urandom(CHUNK_SIZE * 10)
+    source = origin.add("/order.bin", data, etag='"v1"')
+    origin.delay = 0.2
+    path = str(tmp_path / "order.bin")
+
+    task = DownloadTask(source, path, chunk_size=CHUNK_SIZE, connections=1)
+    task.start()
+    try:
+        assert wait_for(lambda: task.header_sent)
+        task.focus_on(6 * CHUNK_SIZE)
+        assert wait_for(task.is_complete, 20)
+        order = requested_chunks(origin, "/order.bin")
+        assert order[:2] == [0, 9]
+        # 跳转时可能已有一个分块在下载中
+        rest = order[3:] if order[2] == 1 else order[2:]
+        assert rest[:3] == [6, 7, 8]
+    finally:
+        task.close()
+
+
+def test_close_does_not_wait_for_running_requests(origin, tmp_path):
+    source = origin.add("/slow.bin", os.urandom(CHUNK_SIZE * 8), etag='"v1"')
+    origin.delay = 1.0
+    path = str(tmp_path / "slow.bin")
+
+    task = DownloadTask(source, path, chunk_size=CHUNK_SIZE, connections=2)
+    task.start()
+    assert wait_for(lambda: task.inflight)
+    started = time.perf_counter()
+    task.close()
+    assert time.perf_counter() - started < 0.2
+
+    # 最后一个线程退出后保存位图并关闭稀疏文件，已完成的分块可用于续传
+    assert wait_for(lambda: task.active == 0)
+    assert task.sparse.file.closed
+    assert os.path.exists(path + ".part.meta")
+    assert not os.path.exists(path)
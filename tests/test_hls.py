@@ -0,0 +1,123 @@
+import os
+import urllib.request
+
+from core.cache_proxy import CachingProxy
+from core.hls import HlsSession
+from core.http_client import FetchPool, HttpClient
+
+MASTER = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=100000
+low.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=5000000
+high.m3u8
+"""
+
+# 低码率版本：三个片段是同一文件中的字节范围，后两个省略偏移
+LOW = """#EXTM3U
+#EXT-X-VERSION:4
+#EXT-X-TARGETDURATION:4
+#EXT-X-MEDIA-SEQUENCE:0
+#EXT-X-PROGRAM-DATE-TIME:2020-01-01T00:00:00Z
+#EXTINF:4.0,
+#EXT-X-BYTERANGE:1000@0
+low.ts
+#EXTINF:4.0,
+#EXT-X-BYTERANGE:1500
+low.ts
+#EXTINF:4.0,
+#EXT-X-BYTERANGE:800
+low.ts
+#EXT-X-ENDLIST
+"""
+
+HIGH = """#EXTM3U
+#EXT-X-TARGETDURATION:4
+#EXT-X-MEDIA-SEQUENCE:0
+#EXT-X-PROGRAM-DATE-TIME:2030-01-01T00:00:00Z
+#EXTINF:4.0,
+high0.ts
+#EXTINF:4.0,
+high1.ts
+#EXTINF:4.0,
+high2.ts
+#EXT-X-ENDLIST
+"""
+
+
+def serve_stream(origin):
+    """
+    在模拟源站上生成一个两档码率的 HLS 流。
+    :return: (主播放列表地址, 低码率文件数据, 高码率片段数据列表)
+    """
+    low = os.urandom(3300)
+    high = [os.urandom(5000) for _ in range(3)]
+    origin.add("/live/low.ts", low)
+    for index, data in enumerate(high):
+        origin.add(f"/live/high{index}.ts", data)
+    origin.add("/live/low.m3u8", LOW.encode("utf-8"))
+    origin.add("/live/high.m3u8", HIGH.encode("utf-8"))
+    return origin.add("/live/master.m3u8", MASTER.encode("utf-8")), low, high
+
+
+def fetch(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return response.read()
+
+
+def test_byte_range_segments_become_local_segments(origin, tmp_path):
+    serve_stream(origin)
+    low = origin.files["/live/low.ts"][0]
+    proxy = CachingProxy(str(tmp_path))
+    try:
+        # 直接使用媒体播放列表，只有一个版本，片段不会切换到其他码率
+        url = proxy.hls_url(origin.url("/live/low.m3u8"))
+        playlist = fetch(url).decode("utf-8")
+        assert "#EXT-X-BYTERANGE" not in playlist
+        assert [line for line in playlist.splitlines() if line.startswith("seg/")] == [
+            "seg/0.ts", "seg/1.ts", "seg/2.ts"
+        ]
+        base = url.rsplit("/", 1)[0]
+        assert fetch(f"{base}/seg/1.ts") == low[1000:2500]
+        assert fetch(f"{base}/seg/2.ts") == low[2500:3300]
+    finally:
+        proxy.stop()
+    assert ("GET", "/live/low.ts", "bytes=1000-2499") in origin.range_requests("/live/low.ts")
+
+
+def test_segments_and_tags_follow_their_variant(origin):
+    master, low, high = serve_stream(origin)
+    pool = FetchPool(2)
+    try:
+        session = HlsSession(master, HttpClient(), pool)
+        session.PREFETCH_SEGMENTS = 0
+        assert session.segment(0) == low[:1000]
+
+        # 吞吐量足够后切换到高码率，之前下载的片段仍按原版本提供
+        session.throughput = 1e9
+        assert session.segment(1) == high[1]
+        assert session.current.uri.endswith("high.m3u8")
+        assert session.segment(0) == low[:1000]
+        assert set(session.segments) == {(session.variants[0].uri, 0), (session.variants[1].uri, 1)}
+
+        playlist = session.render_playlist(lambda segment: ".ts").splitlines()
+        first = playlist.index("seg/0.ts")
+        assert "#EXT-X-PROGRAM-DATE-TIME:2020-01-01T00:00:00Z" in playlist[:first]
+        assert "#EXT-X-PROGRAM-DATE-TIME:2030-01-01T00:00:00Z" not in playlist[:first]
+    finally:
+        pool.shutdown()
+
+
+def test_encrypted_stream_keeps_initial_variant(origin):
+    master, _, _ = serve_stream(origin)
+    origin.add("/live/low.m3u8", LOW.replace(
+        "#EXT-X-MEDIA-SEQUENCE:0", '#EXT-X-MEDIA-SEQUENCE:0\n#EXT-X-KEY:METHOD=AES-128,URI="key.bin"'
+    ).encode("utf-8"))
+    pool = FetchPool(1)
+    try:
+        session = HlsSession(master, HttpClient(), pool)
+        session.throughput = 1e9
+        assert not session.adaptive
+        assert session.choose_variant() is session.variants[0]
+        assert 'URI="http://' in session.render_playlist(lambda segment: ".ts")
+    finally:
+        pool.shutdown()
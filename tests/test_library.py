@@ -0,0 +1,141 @@
+import os
+import logging
+
+from core.library import MediaLibrary, normalize_roots
+
+
+def make_file(path, data=b"\0"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def media_roots(library):
+    return dict(library.connection.execute("SELECT path, root FROM media"))
+
+
+def test_normalize_roots_drops_nested_directories(tmp_path):
+    base = str(tmp_path)
+    roots = normalize_roots([f"{base}/music/rock", f"{base}/music", f"{base}/musicals", f"{base}/music"])
+    assert roots == [f"{base}/music", f"{base}/musicals"]
+
+
+def test_parent_root_takes_over_nested_root(tmp_path):
+    base = str(tmp_path)
+    make_file(f"{base}/music/rock/a.mp3")
+    make_file(f"{base}/music/b.mp3")
+    library = MediaLibrary(db_path=f"{base}/library.db")
+    try:
+        assert library.add_root(f"{base}/music/rock") == f"{base}/music/rock"
+        assert library.scan().added == 1
+
+        assert library.add_root(f"{base}/music") == f"{base}/music"
+        # 已被包含的子目录不再单独添加
+        assert library.add_root(f"{base}/music/rock") == f"{base}/music"
+        assert library.roots() == [f"{base}/music"]
+
+        result = library.scan()
+        assert (result.added, result.unchanged) == (1, 1)
+        # 只扫描子目录时记录仍归属于上层扫描目录
+        assert library.scan([f"{base}/music/rock"]).unchanged == 1
+        assert set(media_roots(library).values()) == {f"{base}/music"}
+    finally:
+        library.close()
+
+
+def test_stale_probe_result_does_not_overwrite_changed_file(tmp_path):
+    base = str(tmp_path)
+    make_file(f"{base}/music/a.mp3")
+    library = MediaLibrary(db_path=f"{base}/library.db")
+    try:
+        library.add_root(f"{base}/music")
+        library.scan()
+        [(path, size, mtime)] = library.pending_metadata()
+
+        # 探测期间文件被改写，扫描重置了记录
+        make_file(path, b"\0" * 64)
+        os.utime(path, (mtime + 10, mtime + 10))
+        library.scan()
+        library.update_metadata(path, size, mtime, 1000, "MP3", 0, 1)
+        assert [row[0] for row in library.pending_metadata()] == [path]
+
+        _, new_size, new_mtime = library.pending_metadata()[0]
+        library.update_metadata(path, new_size, new_mtime, 2000, "MP3", 0, 1)
+        assert library.pending_metadata() == []
+    finally:
+        library.close()
+
+
+def test_background_scan_errors_are_logged(tmp_path, caplog):
+    library = MediaLibrary(db_path=str(tmp_path / "library.db"))
+    try:
+        def broken_scan(roots=None):
+            raise RuntimeError("disk gone")
+
+        library.scan = broken_scan
+        with caplog.at_level(logging.ERROR):
+            future = library.scan_in_background(callback=lambda result: None)
+            assert isinstance(future.exception(timeout=5), RuntimeError)
+            library.background.shutdown(wait=True)
+        assert "disk gone" in caplog.text
+    finally:
+        library.close()
+
+
+def test_watch_indexes_root_and_polling_sees_files_growing_in_place(tmp_path):
+    from PySide6.QtCore import QCoreApplication
+    from core.watcher import LibraryWatcher
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    base = str(tmp_path)
+    make_file(f"{base}/music/a.mp3", b"\0" * 10)
+    library = MediaLibrary(db_path=f"{base}/library.db")
+    watcher = LibraryWatcher(library)
+
+    def grow_in_place(path):
+        # 保持目录修改时间不变，只让文件原地增长
+        directory = os.path.dirname(path)
+        directory_mtime = os.stat(directory).st_mtime_ns
+        with open(path, "ab") as f:
+            f.write(b"\0" * 10)
+        os.utime(directory, ns=(directory_mtime, directory_mtime))
+
+    try:
+        indexed = []
+        watcher.indexed.connect(lambda result, count: indexed.append(count))
+        # 后台任务直接在当前线程执行，信号为直接连接
+        watcher._index([f"{base}/music"])
+        assert indexed == [1]
+        assert library.roots() == [f"{base}/music"]
+
+        changes = []
+        watcher.libraryChanged.connect(lambda changed, removed: changes.append(sorted(changed)))
+        watcher._start_polling(f"{base}/music")
+        sweep = watcher._next_sweep
+        watcher._next_sweep = lambda: set()
+
+        # 目录修改时间不变且不在最近变化中时，不检查其中的文件
+        grow_in_place(f"{base}/music/a.mp3")
+        watcher._poll()
+        assert changes == []
+
+        # 新增文件改变目录修改时间，该目录随后每次轮询都检查文件
+        make_file(f"{base}/music/b.mp3", b"\0" * 10)
+        watcher._poll()
+        assert changes == [[f"{base}/music/a.mp3", f"{base}/music/b.mp3"]]
+        grow_in_place(f"{base}/music/b.mp3")
+        watcher._poll()
+        assert changes[-1] == [f"{base}/music/b.mp3"]
+        assert library.search("b.mp3")[0][1] == 20
+
+        # 不再是最近变化的目录时，由分批轮换的文件检查发现
+        watcher.recent.clear()
+        watcher._next_sweep = sweep
+        grow_in_place(f"{base}/music/a.mp3")
+        watcher._poll()
+        assert changes[-1] == [f"{base}/music/a.mp3"]
+        assert library.search("a.mp3")[0][1] == 30
+    finally:
+        watcher.stop()
+        library.close()
+        del app
@@ -0,0 +1,148 @@
+import struct
+
+import pytest
+
+from core.seek_index import index_mkv, index_mp4, index_ts, np
+
+
+def box(kind, body):
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+
+def full_box(kind, body, version=0):
+    return box(kind, bytes([version, 0, 0, 0]) + body)
+
+
+def table(kind, fmt, rows, version=0):
+    return full_box(kind, struct.pack(">I", len(rows)) + b"".join(struct.pack(fmt, *row) for row in rows), version)
+
+
+def mp4_movie(stbl_boxes, timescale=1000, elst=None, movie_timescale=1000):
+    """
+    构造只有一个视频轨道的 moov。
+    """
+    mvhd = full_box(b"mvhd", struct.pack(">IIII", 0, 0, movie_timescale, 0) + b"\0" * 80)
+    tkhd = full_box(b"tkhd", struct.pack(">IIII", 0, 0, 1, 0) + b"\0" * 64)
+    mdhd = full_box(b"mdhd", struct.pack(">IIII", 0, 0, timescale, 0) + b"\0" * 4)
+    hdlr = full_box(b"hdlr", b"\0" * 4 + b"vide" + b"\0" * 13)
+    edts = box(b"edts", table(b"elst", ">Iihh", elst)) if elst else b""
+    stbl = box(b"stbl", b"".join(stbl_boxes))
+    trak = box(b"trak", tkhd + edts + box(b"mdia", mdhd + hdlr + box(b"minf", stbl)))
+    return box(b"ftyp", b"isom" + b"\0" * 4) + box(b"moov", mvhd + trak)
+
+
+def test_mp4_sample_table_offsets():
+    data = mp4_movie([
+        table(b"stss", ">I", [(1,), (3,), (6,)]),
+        table(b"stts", ">II", [(7, 1000)]),
+        # 第 1 块 3 帧，第 2、3 块各 2 帧
+        table(b"stsc", ">III", [(1, 3, 1), (2, 2, 1)]),
+        full_box(b"stsz", struct.pack(">II", 0, 7) + struct.pack(">7I", 10, 20, 30, 40, 50, 60, 70)),
+        table(b"stco", ">I", [(1000,), (2000,), (3000,)]),
+    ])
+    index = index_mp4(data)
+    assert index.timestamps == [0, 2000, 5000]
+    assert index.offsets == [1000, 1030, 3000]
+
+
+def test_mp4_applies_composition_offsets_and_edit_list():
+    samples = 100
+    data = mp4_movie([
+        table(b"stss", ">I", [(1,), (51,)]),
+        table(b"stts", ">II", [(samples, 3000)]),
+        table(b"ctts", ">Ii", [(samples, 6000)], version=1),
+        table(b"stsc", ">III", [(1, samples, 1)]),
+        full_box(b"stsz", struct.pack(">II", 100, samples)),
+        table(b"stco", ">I", [(5000,)]),
+    ], timescale=90000, elst=[(500, -1, 1, 0), (10000, 6000, 1, 0)])
+    index = index_mp4(data)
+    # 显示时间 = 解码时间 + 6000，编辑列表跳过媒体开头的 6000 并延后 500 毫秒
+    assert index.timestamps == [500, 2166]
+    assert index.offsets == [5000, 10000]
+
+
+def test_mp4_fragment_random_access_table():
+    moov = mp4_movie([], timescale=1000, elst=[(0, 200, 1, 0)])
+    # tfra 版本 1，traf/trun/sample 序号各 1 字节
+    entries = b"".join(struct.pack(">QQ", time, moof) + b"\1\1\1" for time, moof in ((200, 4000), (2200, 9000)))
+    tfra = full_box(b"tfra", struct.pack(">III", 1, 0, 2) + entries, version=1)
+    mfra_size = 8 + len(tfra) + 16
+    mfra = box(b"mfra", tfra + full_box(b"mfro", struct.pack(">I", mfra_size)))
+    index = index_mp4(moov + mfra)
+    assert index.timestamps == [0, 2000]
+    assert index.offsets == [4000, 9000]
+
+
+def ebml(element_id, body):
+    identifier = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return identifier + (1 << 56 | len(body)).to_bytes(8, "big") + body
+
+
+def ebml_uint(element_id, value, size=8):
+    return ebml(element_id, value.to_bytes(size, "big"))
+
+
+def cue_point(time, track, cluster):
+    return ebml(0xBB, ebml_uint(0xB3, time) + ebml(0xB7, ebml_uint(0xF7, track) + ebml_uint(0xF1, cluster)))
+
+
+MKV_HEADER = ebml(0x1A45DFA3, ebml_uint(0x4282, 0))
+MKV_INFO = ebml(0x1549A966, ebml_uint(0x2AD7B1, 1000000))
+# 轨道 1 为视频，轨道 2 为音频
+MKV_TRACKS = ebml(0x1654AE6B, ebml(0xAE, ebml_uint(0xD7, 1) + ebml_uint(0x83, 1))
+                  + ebml(0xAE, ebml_uint(0xD7, 2) + ebml_uint(0x83, 2)))
+MKV_CUES = ebml(0x1C53BB6B, cue_point(4000, 1, 500) + cue_point(2000, 2, 300) + cue_point(0, 1, 100))
+SEGMENT_START = len(MKV_HEADER) + 4 + 8
+
+
+def test_mkv_cues_before_clusters():
+    data = MKV_HEADER + ebml(0x18538067, MKV_INFO + MKV_TRACKS + MKV_CUES)
+    index = index_mkv(data)
+    # 只取视频轨道的条目，按时间排序
+    assert index.timestamps == [0, 4000]
+    assert index.offsets == [SEGMENT_START + 100, SEGMENT_START + 500]
+
+
+def test_mkv_cues_located_through_seek_head():
+    def seek_head(position):
+        return ebml(0x114D9B74, ebml(0x4DBB, ebml_uint(0x53AB, 0x1C53BB6B, 4) + ebml_uint(0x53AC, position)))
+
+    cluster = ebml(0x1F43B675, b"\0" * 32)
+    position = len(seek_head(0) + MKV_INFO + MKV_TRACKS + cluster)
+    data = MKV_HEADER + ebml(0x18538067, seek_head(position) + MKV_INFO + MKV_TRACKS + cluster + MKV_CUES)
+    index = index_mkv(data)
+    assert index.timestamps == [0, 4000]
+    assert index.offsets == [SEGMENT_START + 100, SEGMENT_START + 500]
+
+
+def ts_packet(pid, payload, start=False, random_access=False):
+    header = bytes([0x47, (0x40 if start else 0) | pid >> 8, pid & 0xFF])
+    if random_access:
+        length = 188 - 4 - 1 - len(payload)
+        return header + b"\x30" + bytes([length, 0x40]) + b"\xff" * (length - 1) + payload
+    return header + b"\x10" + payload + b"\xff" * (184 - len(payload))
+
+
+def pes_header(pts):
+    return b"\x00\x00\x01\xe0\x00\x00\x80\x80\x05" + bytes([
+        0x21 | (pts >> 29) & 0x0E, (pts >> 22) & 0xFF, (pts >> 14) & 0xFE | 1, (pts >> 7) & 0xFF, (pts << 1) & 0xFE | 1,
+    ])
+
+
+@pytest.mark.skipif(np is None, reason="TS 索引需要 NumPy")
+def test_ts_random_access_points():
+    # PAT：节目 1 的 PMT 在 PID 0x100；PMT：H.264 视频在 PID 0x101
+    pat = b"\x00" + b"\x00\xb0\x0d\x00\x01\xc1\x00\x00" + b"\x00\x01\xe1\x00" + b"\0" * 4
+    pmt = b"\x00" + b"\x02\xb0\x12\x00\x01\xc1\x00\x00\xe1\x01\xf0\x00" + b"\x1b\xe1\x01\xf0\x00" + b"\0" * 4
+    packets = [ts_packet(0, pat, start=True), ts_packet(0x100, pmt, start=True)]
+    offsets = []
+    base = (1 << 33) - 90000  # 第二个关键帧处 PTS 回绕
+    for second in range(3):
+        offsets.append(len(packets) * 188)
+        packets.append(ts_packet(0x101, pes_header((base + second * 90000) % (1 << 33)), start=True, random_access=True))
+        # 非关键帧的 PES 起始包不计入
+        packets.append(ts_packet(0x101, pes_header((base + second * 90000 + 3000) % (1 << 33)), start=True))
+        packets.append(ts_packet(0x101, b""))
+    index = index_ts(b"".join(packets))
+    assert index.timestamps == [0, 1000, 2000]
+    assert index.offsets == offsets